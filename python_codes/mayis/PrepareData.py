@@ -345,11 +345,11 @@ def prepare_data():
     return X_train, X_test, y_train, y_test, scaler
 
 def save_processed_data(X_train, X_test, y_train, y_test, file_prefix='C:\@biyokomurlestirme\python_codes\mayis\ProcessedData'):
-    """İşlenmiş verileri CSV dosyaları olarak kaydeder"""
-    X_train.to_csv(f'{file_prefix}_X_train.csv', index=False)
-    X_test.to_csv(f'{file_prefix}_X_test.csv', index=False)
-    y_train.to_csv(f'{file_prefix}_y_train.csv', index=False)
-    y_test.to_csv(f'{file_prefix}_y_test.csv', index=False)
+    """İşlenmiş verileri Parquet dosyaları olarak kaydeder"""
+    X_train.to_parquet(f'{file_prefix}_X_train.parquet', index=False)
+    X_test.to_parquet(f'{file_prefix}_X_test.parquet', index=False)
+    y_train.to_parquet(f'{file_prefix}_y_train.parquet', index=False)
+    y_test.to_parquet(f'{file_prefix}_y_test.parquet', index=False)
     print("İşlenmiş veriler başarıyla kaydedildi!")
 
 # Ana çalıştırma kodu
@@ -23,10 +23,10 @@ from sklearn.metrics import r2_score
 
 # ---------- Dosya yolları ----------------------------------------------------
 BASE = Path(r"C:\@biyokomurlestirme\python_codes\mayis")
-X_train = pd.read_csv(BASE / "ProcessedData_X_train.csv")
-X_test  = pd.read_csv(BASE / "ProcessedData_X_test.csv")
-y_train = pd.read_csv(BASE / "ProcessedData_y_train.csv")
-y_test  = pd.read_csv(BASE / "ProcessedData_y_test.csv")
+X_train = pd.read_parquet(BASE / "ProcessedData_X_train.parquet")
+X_test  = pd.read_parquet(BASE / "ProcessedData_X_test.parquet")
+y_train = pd.read_parquet(BASE / "ProcessedData_y_train.parquet")
+y_test  = pd.read_parquet(BASE / "ProcessedData_y_test.parquet")
 
 # ---------- Hedef sütunlar ---------------------------------------------------
 TARGETS = [
@@ -4,32 +4,59 @@ import numpy as np
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.impute import KNNImputer
+import pyarrow as pa
+import pyarrow.compute as pc
 import pyodbc
 import warnings
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 warnings.filterwarnings('ignore')
 
 # SQL Server bağlantı bilgileri
 server = 'DESKTOP-DRO84HP\\SQLEXPRESS'
 database = 'BIOOIL'
 
+connection_string = 'DRIVER={SQL Server};SERVER='+server+';DATABASE='+database+';Trusted_Connection=yes'
+
 # SQL Server'a bağlanma
 try:
-    conn = pyodbc.connect('DRIVER={SQL Server};SERVER='+server+';DATABASE='+database+';Trusted_Connection=yes')
+    conn = pyodbc.connect(connection_string)
     print("Veritabanı bağlantısı başarılı!")
 except Exception as e:
     print(f"Bağlantı hatası: {str(e)}")
 
+# merge_all_data içindeki sorguları paralel çalıştırmak için bağlantı havuzu
+# (pyodbc bağlantıları thread'ler arasında paylaşılmamalı: her sorguya ayrı bağlantı)
+_connection_pool = []
+
+def _get_connection_pool(size):
+    """Havuzda en az `size` bağlantı olmasını sağlar ve ilk `size` bağlantıyı döndürür"""
+    while len(_connection_pool) < size:
+        _connection_pool.append(pyodbc.connect(connection_string))
+    return _connection_pool[:size]
+
+def close_connection_pool():
+    """Havuzdaki bağlantıları kapatır ve havuzu boşaltır"""
+    while _connection_pool:
+        try:
+            _connection_pool.pop().close()
+        except Exception as e:
+            print(f"Bağlantı kapatma hatası: {str(e)}")
+
+# Betik hangi yoldan çıkarsa çıksın havuzdaki bağlantılar kapatılır
+atexit.register(close_connection_pool)
+
 # Veri çekme fonksiyonları
-def get_biomass_data():
+def get_biomass_data(connection=None):
     """Biomass tablosundan verileri çeker"""
     query = """
     SELECT BiomassId,Reference_Id, Carbon, Hydrogen, Nitrogen, Sulfur, Oxygen, 
            Ash, Volatiles, FixedCarbon, HHV, [O/C], [H/C], Cellulose, Hemicellulose, Lignin, Holocellulose
     FROM Biomass
     """
-    return pd.read_sql(query, conn)
+    return pd.read_sql(query, connection or conn)
 
-def get_experiment_data():
+def get_experiment_data(connection=None):
     """Experiment tablosundan verileri çeker"""
     query = """
     SELECT ExperimentId, Biomass_Id, 
@@ -40,9 +67,9 @@ def get_experiment_data():
     FROM Experiment
     """
     
-    return pd.read_sql(query, conn)
+    return pd.read_sql(query, connection or conn)
 
-def get_biooil_data():
+def get_biooil_data(connection=None):
     """Biooil tablosundan FTIR değerlerini çeker"""
     query = """
     SELECT BiooilId, Experiment_Id,
@@ -53,53 +80,58 @@ def get_biooil_data():
     FROM Biooil where BiooilId <19
     """
     #   ester,oxides
-    return pd.read_sql(query, conn)
+    return pd.read_sql(query, connection or conn)
 
-def get_catalyst_data():
+def get_catalyst_data(connection=None):
     """Catalyst tablosundan verileri çeker"""
     query = """
     SELECT CatalystId, CatalystSymbol, CatalystName, CatalystType_Id,
            Si_over_Al, PoreD, Acidity, SBET, Vtot, MetalRatio
     FROM Catalyst
     """
-    return pd.read_sql(query, conn)
+    return pd.read_sql(query, connection or conn)
 
 # Verileri çekme ve birleştirme
 def merge_all_data():
     """Tüm tabloları birleştirir"""
     try:
-        biomass_df = get_biomass_data()
-        experiment_df = get_experiment_data()
-        biooil_df = get_biooil_data()
-        catalyst_df = get_catalyst_data()
+        # 4 sorgu ayrı bağlantılar üzerinden eşzamanlı çalışır (DB beklerken GIL serbest)
+        getters = [get_biomass_data, get_experiment_data, get_biooil_data, get_catalyst_data]
+        pool = _get_connection_pool(len(getters))
+        with ThreadPoolExecutor(max_workers=len(getters)) as executor:
+            biomass_df, experiment_df, biooil_df, catalyst_df = executor.map(
+                lambda getter, connection: getter(connection), getters, pool
+            )
         print("Veriler başarıyla çekildi!")
         
+        # Birleştirmeler indeks join ile yapılır. BiomassId ve CatalystId PK'dır
+        # (her experiment satırı en fazla bir biomass/catalyst satırıyla eşleşir);
+        # Experiment_Id ise Biooil'de FK'dır ve benzersiz değildir: bir deneyin
+        # birden çok biooil satırı olabilir (experiment -> biooil bire-çok).
+        # validate= bu kardinaliteleri birleştirme sırasında doğrular.
         # Önce experiment ve biomass tablolarını birleştir
-        merged_df = pd.merge(
-            experiment_df,
-            biomass_df,
-            left_on='Biomass_Id',
-            right_on='BiomassId',
-            how='inner'
+        merged_df = experiment_df.join(
+            biomass_df.set_index('BiomassId'),
+            on='Biomass_Id',
+            how='inner',
+            validate='many_to_one'
         )
         
         # Sonra catalyst tablosunu experiment verisiyle birleştir
-        merged_df = pd.merge(
-            merged_df,
-            catalyst_df,
-            left_on='Catalyst_Id',
-            right_on='CatalystId',
-            how='left'
+        merged_df = merged_df.join(
+            catalyst_df.set_index('CatalystId'),
+            on='Catalyst_Id',
+            how='left',
+            validate='many_to_one'
         )
         
-        # Sonra biooil tablosunu ekle
-        final_df = pd.merge(
-            merged_df,
-            biooil_df,
-            left_on='ExperimentId',
-            right_on='Experiment_Id',
-            how='inner'
-        )
+        # Sonra biooil tablosunu ekle (her biooil satırı ayrı bir örnek olur)
+        final_df = merged_df.join(
+            biooil_df.set_index('Experiment_Id'),
+            on='ExperimentId',
+            how='inner',
+            validate='one_to_many'
+        ).reset_index(drop=True)
         
         return final_df
     except Exception as e:
@@ -113,27 +145,22 @@ def _calculate_oc_hc_ratios(df):
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors='coerce')
 
-    # Fill O/C
-    # Assuming df has 'O/C' (not '[O/C]') based on user feedback
-    oc_mask = df['O/C'].isna()
-    df.loc[oc_mask, 'O/C'] = df.loc[oc_mask].apply(
-        lambda row: round(row['Oxygen'] / row['Carbon'], 6) if pd.notnull(row['Oxygen']) and pd.notnull(row['Carbon']) and row['Carbon'] != 0 else np.nan,
-        axis=1
-    )
-    filled_oc_count = oc_mask.sum() - df['O/C'].isna().sum()
-    if oc_mask.sum() > 0: # Only print if there were initial NaNs to process
-        print(f"Toplam {oc_mask.sum()} eksik O/C değerinden {filled_oc_count} tanesi dolduruldu.")
-
-    # Fill H/C
-    # Assuming df has 'H/C' (not '[H/C]') based on user feedback
-    hc_mask = df['H/C'].isna()
-    df.loc[hc_mask, 'H/C'] = df.loc[hc_mask].apply(
-        lambda row: round(row['Hydrogen'] / row['Carbon'], 6) if pd.notnull(row['Hydrogen']) and pd.notnull(row['Carbon']) and row['Carbon'] != 0 else np.nan,
-        axis=1
-    )
-    filled_hc_count = hc_mask.sum() - df['H/C'].isna().sum()
-    if hc_mask.sum() > 0: # Only print if there were initial NaNs to process
-        print(f"Toplam {hc_mask.sum()} eksik H/C değerinden {filled_hc_count} tanesi dolduruldu.")
+    # O/C ve H/C tek geçişte: Carbon/Oxygen/Hydrogen sütunları bir kez NumPy'a alınır,
+    # satır bazlı apply yerine vektörel bölme + maske ile yalnızca eksikler doldurulur
+    carbon = df['Carbon'].to_numpy(dtype=np.float64)
+    valid_carbon = ~np.isnan(carbon) & (carbon != 0)
+    for ratio_col, element_col in (('O/C', 'Oxygen'), ('H/C', 'Hydrogen')):
+        # Assuming df has 'O/C'/'H/C' (not '[O/C]'/'[H/C]') based on user feedback
+        ratio = pd.to_numeric(df[ratio_col], errors='coerce').to_numpy(dtype=np.float64, copy=True)
+        element = df[element_col].to_numpy(dtype=np.float64)
+        missing = np.isnan(ratio)
+        fill = missing & valid_carbon & ~np.isnan(element)
+        ratio[fill] = np.round(element[fill] / carbon[fill], 6)
+        df[ratio_col] = ratio
+
+        missing_count = missing.sum()
+        if missing_count > 0: # Only print if there were initial NaNs to process
+            print(f"Toplam {missing_count} eksik {ratio_col} değerinden {fill.sum()} tanesi dolduruldu.")
     return df
 
 def _impute_missing_values_knn(df):
@@ -174,7 +201,8 @@ def _impute_missing_values_knn(df):
         print(f"Impute edilecek sütunlar: {actual_cols_to_impute}")
         print(f"Imputasyon için kullanılacak öznitelikler (ve impute edilecekler): {knn_imputation_cols}")
 
-        nan_counts_before_knn = df[actual_cols_to_impute].isnull().sum()
+        # Rapor için eksik sayıları tek bir maske indirgemesiyle önceden al
+        nan_counts_before_knn = df[actual_cols_to_impute].isna().to_numpy().sum(axis=0)
         
         for col in knn_imputation_cols:
             if not pd.api.types.is_numeric_dtype(df[col]):
@@ -184,23 +212,26 @@ def _impute_missing_values_knn(df):
 
         imputer = KNNImputer(n_neighbors=5)
         
-        original_index = df.index
-        df_knn_subset = df[knn_imputation_cols].copy()
+        # Ara DataFrame kopyası yerine doğrudan sütun-bitişik NumPy matrisi
+        knn_matrix = np.column_stack([df[col].to_numpy(dtype=np.float64) for col in knn_imputation_cols])
 
         try:
-            imputed_values = imputer.fit_transform(df_knn_subset)
+            imputed_values = imputer.fit_transform(knn_matrix)
+            if imputed_values.shape[1] != len(knn_imputation_cols):
+                raise ValueError("Tamamen NaN olan sütunlar KNN imputer tarafından atıldı.")
             # Round imputed values to 6 decimal places
             imputed_values = np.round(imputed_values, 6)
-            df_imputed_subset = pd.DataFrame(imputed_values, columns=knn_imputation_cols, index=df_knn_subset.index)
-            
-            for col in knn_imputation_cols:
-                df[col] = df_imputed_subset[col]
+
+            # Sütun sütun atama yerine tek seferde toplu yazım
+            df[knn_imputation_cols] = imputed_values
 
             print("KNN imputasyonu tamamlandı.")
-            for col in actual_cols_to_impute:
-                nans_before = nan_counts_before_knn.get(col, 0)
-                nans_after = df[col].isnull().sum()
-                filled_knn = nans_before - nans_after
+            impute_positions = [knn_imputation_cols.index(col) for col in actual_cols_to_impute]
+            nan_counts_after_knn = np.isnan(imputed_values[:, impute_positions]).sum(axis=0)
+            filled_counts = nan_counts_before_knn - nan_counts_after_knn
+            for col, nans_before, nans_after, filled_knn in zip(
+                actual_cols_to_impute, nan_counts_before_knn, nan_counts_after_knn, filled_counts
+            ):
                 if nans_before > 0:
                     print(f"'{col}' sütununda {nans_before} eksik değerden {filled_knn} tanesi KNN ile dolduruldu.")
                 if nans_after > 0:
@@ -221,14 +252,9 @@ def _calculate_holocellulose(df):
             return df
 
         # Calculate Holocellulose for rows where it's missing and Cellulose/Hemicellulose are available
-        mask_missing_holo = df['Holocellulose'].isnull()
-        mask_can_calculate = df['Cellulose'].notnull() & df['Hemicellulose'].notnull()
-        
-        df.loc[mask_missing_holo & mask_can_calculate, 'Holocellulose'] = (
-            df.loc[mask_missing_holo & mask_can_calculate, 'Cellulose'] +
-            df.loc[mask_missing_holo & mask_can_calculate, 'Hemicellulose']
-        )
-        
+        # (Cellulose + Hemicellulose is NaN if either is missing, so fillna leaves those rows untouched)
+        df['Holocellulose'] = df['Holocellulose'].fillna(df['Cellulose'] + df['Hemicellulose'])
+
         holocellulose_filled = holocellulose_missing_before - df['Holocellulose'].isnull().sum()
         
         if holocellulose_filled > 0:
@@ -297,10 +323,13 @@ def clean_numeric_data(df):
     for col in numeric_columns:
         if col in df.columns:
             try:
-                df[col] = df[col].astype(str).str.strip()
-                df[col] = df[col].str.replace(',', '.')
-                df[col] = df[col].str.replace('[^\d\.-]', '', regex=True)
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+                # Arrow string buffer'ı üzerinde C++ kernel'ları (her adımda Python str kopyası yok)
+                arr = pa.array(df[col].astype('string[pyarrow]'))
+                arr = pc.utf8_trim_whitespace(arr)
+                arr = pc.replace_substring(arr, pattern=',', replacement='.')
+                arr = pc.replace_substring_regex(arr, pattern=r'[^\d.\-]', replacement='')
+                cleaned = pd.Series(pd.arrays.ArrowExtensionArray(arr), index=df.index)
+                df[col] = pd.to_numeric(cleaned, errors='coerce').astype('float64')
                 print(f"{col} sütunu başarıyla sayısala çevrildi.")
             except Exception as e:
                 print(f"{col} sütununda hata: {str(e)}")
@@ -335,32 +364,32 @@ def normalize_features(df):
     print("\nEksik değer sayıları:")
     print(df[input_columns + output_columns].isnull().sum())
     
-    # Giriş değişkenlerindeki kalan eksik değerleri ortalama ile doldur
-    df_input_subset = df[input_columns].copy()
-    
     # ResidenceTime'ı Duration'un min-max değerleri arasına ölçekle
     if 'ResidenceTime' in input_columns and 'Duration' in input_columns:
-        duration_min = df_input_subset['Duration'].min()
-        duration_max = df_input_subset['Duration'].max()
-        
+        # Duration ve ResidenceTime tek bir NumPy matrisine alınır; ortalama/min/max
+        # her biri tek nan-reduction ile hesaplanır (ortalama ile doldurma min/max'ı değiştirmez)
+        time_matrix = df[['Duration', 'ResidenceTime']].to_numpy(dtype=np.float64)
+        means = np.nanmean(time_matrix, axis=0)
+        mins = np.nanmin(time_matrix, axis=0)
+        maxs = np.nanmax(time_matrix, axis=0)
+        duration_min, residence_min = mins
+        duration_max, residence_max = maxs
+
         # ResidenceTime'ı Duration'un min-max aralığına ölçekle
-        if df_input_subset['ResidenceTime'].isnull().any():
-            mean_val = round(df_input_subset['ResidenceTime'].mean(), 6)
-            df_input_subset['ResidenceTime'].fillna(mean_val, inplace=True)
+        residence = time_matrix[:, 1]
+        residence_nan = np.isnan(residence)
+        if residence_nan.any():
+            mean_val = round(means[1], 6)
+            residence = np.where(residence_nan, mean_val, residence)
             print(f"ResidenceTime sütunundaki eksik değerler ortalama ({mean_val:.6f}) ile dolduruldu.")
-        
-        residence_min = df_input_subset['ResidenceTime'].min()
-        residence_max = df_input_subset['ResidenceTime'].max()
-        
-        df_input_subset['ResidenceTime'] = round(((df_input_subset['ResidenceTime'] - residence_min) * 
-                                          (duration_max - duration_min) / 
-                                          (residence_max - residence_min) + 
-                                          duration_min), 6)
+
+        df['ResidenceTime'] = np.round((residence - residence_min) *
+                                       (duration_max - duration_min) /
+                                       (residence_max - residence_min) +
+                                       duration_min, 6)
         
         print(f"ResidenceTime sütunu Duration'un min-max aralığına ölçeklendi (Duration min: {duration_min:.6f}, max: {duration_max:.6f})")
 
-    df[input_columns] = df_input_subset
-
     # Duration ve ResidenceTime'ı birleştir
     if 'Duration' in input_columns and 'ResidenceTime' in input_columns:
         print("Duration null olan satırlar için ResidenceTime değeri atanıyor...")
@@ -448,11 +477,11 @@ def prepare_data():
     return X_train, X_test, y_train, y_test, scaler
 
 def save_processed_data(X_train, X_test, y_train, y_test, file_prefix='C:\@biyokomurlestirme\python_codes\mayis\ProcessedData'):
-    """İşlenmiş verileri CSV dosyaları olarak kaydeder"""
-    X_train.to_csv(f'{file_prefix}_X_train.csv', index=False)
-    X_test.to_csv(f'{file_prefix}_X_test.csv', index=False)
-    y_train.to_csv(f'{file_prefix}_y_train.csv', index=False)
-    y_test.to_csv(f'{file_prefix}_y_test.csv', index=False)
+    """İşlenmiş verileri Parquet dosyaları olarak kaydeder"""
+    X_train.to_parquet(f'{file_prefix}_X_train.parquet', index=False)
+    X_test.to_parquet(f'{file_prefix}_X_test.parquet', index=False)
+    y_train.to_parquet(f'{file_prefix}_y_train.parquet', index=False)
+    y_test.to_parquet(f'{file_prefix}_y_test.parquet', index=False)
     print("İşlenmiş veriler başarıyla kaydedildi!")
 
 # Ana çalıştırma kodu
@@ -2,8 +2,8 @@
 train_biooil_models.py
 ----------------------
 • Verisetlerini okur
-• Eksik değerlere medyan imputasyonu + ölçekleme uygular
-• RandomForestRegressor (her bir hedef için) ile modeli kurar
+• Ölçekleme uygular (eksik değerler HistGradientBoosting tarafından doğrudan işlenir)
+• HistGradientBoostingRegressor (her bir hedef için) ile modeli kurar
 • Test kümesindeki R² skorlarını raporlar
 """
 
@@ -11,26 +11,28 @@ from pathlib import Path
 import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.metrics import r2_score
 
 # --- DOSYA YOLLARI -----------------------------------------------------------
 BASE_DIR = Path(r"C:\@biyokomurlestirme\python_codes\mayis")
-X_train = pd.read_csv(BASE_DIR / "ProcessedData_X_train.csv")
-X_test  = pd.read_csv(BASE_DIR / "ProcessedData_X_test.csv")
-y_train = pd.read_csv(BASE_DIR / "ProcessedData_y_train.csv")
-y_test  = pd.read_csv(BASE_DIR / "ProcessedData_y_test.csv")
+X_train = pd.read_parquet(BASE_DIR / "ProcessedData_X_train.parquet")
+X_test  = pd.read_parquet(BASE_DIR / "ProcessedData_X_test.parquet")
+y_train = pd.read_parquet(BASE_DIR / "ProcessedData_y_train.parquet")
+y_test  = pd.read_parquet(BASE_DIR / "ProcessedData_y_test.parquet")
 
 # --- ÖN-İŞLEME ---------------------------------------------------------------
 numeric_features   = X_train.columns.tolist()
 numeric_transform  = Pipeline([
-    ("imputer", SimpleImputer(strategy="median")),
-    ("scaler",  StandardScaler())
+    ("scaler",  StandardScaler())       # NaN'ler korunur, HGB kendisi yönetir
 ])
 preproc = ColumnTransformer([("num", numeric_transform, numeric_features)])
 
+# Ön-işleme yalnızca X sütunlarına bağlı -> hedef döngüsünden önce bir kez uygula
+X_train_t = pd.DataFrame(preproc.fit_transform(X_train), index=X_train.index)
+X_test_t  = pd.DataFrame(preproc.transform(X_test),      index=X_test.index)
+
 # --- HEDEF LİSTESİ -----------------------------------------------------------
 targets = ["aromatics",
            "aliphatichydrocarbon",  # ad sütunlarda farklı ise düzeltin
@@ -40,34 +42,35 @@ targets = ["aromatics",
            "phenols",
            "aldehyde_ketone"]       # CSV’deki tam sütun adını kullanın
 
-r2_scores = {}
+for tgt in [t for t in targets if t not in y_train.columns]:
+    print(f"[SKIP] {tgt:<25} -> sütun bulunamadı")
+targets = [t for t in targets if t in y_train.columns]
 
-for tgt in targets:
-    if tgt not in y_train.columns:
-        print(f"[SKIP] {tgt:<25} -> sütun bulunamadı")
-        continue
+# Ortak özellik matrisi (bir kez NumPy'a) + her hedef için kendi NaN maskesi:
+# her hedef tüm dolu satırlarıyla eğitilir, satırlar tek bir notna geçişiyle seçilir
+Xtr_all, Xte_all = X_train_t.to_numpy(), X_test_t.to_numpy()
+ytr_all, yte_all = y_train[targets].to_numpy(), y_test[targets].to_numpy()
+train_mask = ~pd.isna(ytr_all)
+test_mask  = ~pd.isna(yte_all)
 
-    # hedef NaN satırlarını at
-    train_idx = y_train[tgt].dropna().index
-    test_idx  = y_test[tgt].dropna().index
-    if len(test_idx) < 2:                # <2 satırda R² tanımsız
+r2_scores = {}
+
+for j, tgt in enumerate(targets):
+    tr, te = train_mask[:, j], test_mask[:, j]
+    if te.sum() < 2:                     # <2 satırda R² tanımsız
         print(f"[SKIP] {tgt:<25} -> test verisi yetersiz")
         continue
 
-    Xtr, ytr = X_train.loc[train_idx], y_train.loc[train_idx, tgt]
-    Xte, yte = X_test.loc[test_idx],  y_test.loc[test_idx,  tgt]
-
-    model = Pipeline([
-        ("prep", preproc),
-        ("rf",   RandomForestRegressor(n_estimators=500,
-                                       random_state=42,
-                                       n_jobs=-1))
-    ])
-    model.fit(Xtr, ytr)
-    ypred = model.predict(Xte)
-    r2    = r2_score(yte, ypred)
+    model = HistGradientBoostingRegressor(max_iter=500,
+                                          learning_rate=0.05,
+                                          early_stopping=True,
+                                          min_samples_leaf=2,   # küçük veri seti
+                                          random_state=42)
+    model.fit(Xtr_all[tr], ytr_all[tr, j])
+    ypred = model.predict(Xte_all[te])
+    r2    = r2_score(yte_all[te, j], ypred)
     r2_scores[tgt] = r2
-    print(f"{tgt:<25} R² = {r2:5.3f}")
+    print(f"{tgt:<25} R² = {r2:5.3f}  (eğitim: {tr.sum()}, test: {te.sum()} satır)")
 
 # --- ÖZET --------------------------------------------------------------------
 print("\n=== R² Özet ===")
@@ -0,0 +1,86 @@
+"""
+==============================================================================
+ASPEN AUTOMATION - SCENARIO RESULT CACHE
+==============================================================================
+Purpose: Skip re-running scenarios that were already simulated
+Author: Orhun Uzdiyem
+Date: 2025-11-16
+
+Results are stored in a single SQLite file (config.RESULT_CACHE_PATH),
+keyed by a hash of the Aspen model file (path, size, modification time)
+and the scenario inputs (composition, T, P, S/C, flow), so editing the
+.bkp file invalidates earlier results. Only converged results are stored.
+Each process opens its own connection on first use.
+==============================================================================
+"""
+
+import atexit
+import hashlib
+import os
+import pickle
+import sqlite3
+
+import config
+
+
+_db = None
+_model = None  # Model file signature, read once per process
+
+
+def model_signature():
+    """Identify the Aspen model file: (path, size, mtime), path only if missing."""
+    global _model
+    if _model is None:
+        path = os.path.abspath(config.ASPEN_MODEL_PATH)
+        try:
+            st = os.stat(path)
+            _model = (path, st.st_size, st.st_mtime_ns)
+        except OSError:
+            _model = (path,)
+    return _model
+
+
+def key(comp, T, P, SC, flow):
+    """Cache key for a scenario's inputs on the current model file."""
+    return hashlib.blake2b(
+        repr((model_signature(), sorted(comp.items()), T, P, SC, flow)).encode(),
+        digest_size=16
+    ).hexdigest()
+
+
+def scenario_key(scenario):
+    """Cache key for a scenario dictionary (see AspenInterface.run_scenario)."""
+    return key(
+        scenario['composition'], scenario['temp_c'], scenario['pres_bar'],
+        scenario['sc_ratio'], scenario['biooil_flow_kgh']
+    )
+
+
+def _conn():
+    """Get this process's cache connection (table created on first use)."""
+    global _db
+    if _db is None:
+        os.makedirs(os.path.dirname(config.RESULT_CACHE_PATH), exist_ok=True)
+        _db = sqlite3.connect(config.RESULT_CACHE_PATH, timeout=30)
+        _db.execute(
+            "CREATE TABLE IF NOT EXISTS results (k TEXT PRIMARY KEY, v BLOB NOT NULL)"
+        )
+        _db.commit()
+        atexit.register(_db.close)
+    return _db
+
+
+def get(k):
+    """Get the cached result for key k, or None."""
+    row = _conn().execute("SELECT v FROM results WHERE k = ?", (k,)).fetchone()
+    return pickle.loads(row[0]) if row else None
+
+
+def put(k, result):
+    """Store a result under key k."""
+    db = _conn()
+    db.execute(
+        "INSERT OR REPLACE INTO results (k, v) VALUES (?, ?)",
+        (k, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)),
+    )
+    db.commit()
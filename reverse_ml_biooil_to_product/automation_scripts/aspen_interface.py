@@ -16,9 +16,85 @@ Functions:
 ==============================================================================
 """
 
-import win32com.client as win32
+import atexit
+import logging
 import time
+from datetime import datetime
+import numpy as np
 import config
+import _cache
+from config import (BIOOIL_COMP_ITEMS, H2_OUTPUT_KEYS, PATHS_INPUT, PATHS_OUTPUT,
+                    PATHS_H2_COMPOSITION, RESULT_DTYPE, SYNGAS_COMPONENTS,
+                    SYNGAS_PATH_TABLE, SYNGAS_STREAMS)
+
+
+log = logging.getLogger("aspen")
+
+# COM call failures. pywin32 is only needed once connect() runs, so the
+# module still imports without it (nothing can raise com_error then).
+try:
+    from pywintypes import com_error as _com_error
+except ImportError:
+    class _com_error(Exception):
+        """Placeholder: pywin32 not installed."""
+
+# Paths read or written on every simulation, resolved once at import
+_PATH_REFORMER_TEMP = PATHS_INPUT['reformer_temp']
+_PATH_REFORMER_PRES = PATHS_INPUT['reformer_pres']
+_PATH_BIOOIL_FLOW = PATHS_INPUT['biooil_flow']
+_PATH_STEAM_FLOW = PATHS_INPUT['steam_flow']
+_PATH_CONVERGENCE = PATHS_OUTPUT['convergence_status']
+_PATH_REFORMER_DUTY = PATHS_OUTPUT['reformer_duty']
+_PATH_PREHEAT_DUTY = PATHS_OUTPUT['preheat_duty']
+
+# H2 product mass flow, mole flow, temperature, pressure paths
+_H2_OUTPUT_PATHS = tuple(PATHS_OUTPUT[key] for key in H2_OUTPUT_KEYS)
+
+# H2 product H2, CO, CO2, CH4 mole fraction paths
+_H2_FRACTION_PATHS = tuple(PATHS_H2_COMPOSITION[comp] for comp in ('H2', 'CO', 'CO2', 'CH4'))
+
+_SYNGAS_STREAM_ITEMS = tuple(SYNGAS_STREAMS.items())
+
+# Every node path used per scenario (inputs written, status and results
+# read), resolved together after each model load
+_NODE_PATHS = (
+    tuple(path for _, path in BIOOIL_COMP_ITEMS)
+    + (_PATH_REFORMER_TEMP, _PATH_REFORMER_PRES, _PATH_BIOOIL_FLOW, _PATH_STEAM_FLOW)
+    + (_PATH_CONVERGENCE,)
+    + _H2_OUTPUT_PATHS + _H2_FRACTION_PATHS
+    + tuple(path for paths in SYNGAS_PATH_TABLE.values() for path in paths.values())
+    + (_PATH_REFORMER_DUTY, _PATH_PREHEAT_DUTY)
+)
+
+# Syngas result fields reported in mol % (converted from mole fractions)
+_SYNGAS_MOLPERCENT_KEYS = tuple(f"{comp}_molpercent" for comp in SYNGAS_COMPONENTS)
+
+# Bio-oil components and their approximate carbon mass fraction
+_COMPS = ('aromatics', 'acids', 'alcohols', 'furans', 'phenols', 'aldehyde_ketone')
+_CARBON_CONTENTS = np.array([
+    0.913,  # Toluene: C7H8
+    0.400,  # Acetic acid: C2H4O2
+    0.522,  # Ethanol: C2H6O
+    0.706,  # Furan: C4H4O
+    0.766,  # Phenol: C6H6O
+    0.621,  # Acetone: C3H6O
+], dtype=np.float64)
+
+# Steam (kg) per kg bio-oil per unit S/C ratio
+_STEAM_PER_FEED_SC = config.BIOOIL_CARBON_FRACTION * config.STEAM_PER_SC
+
+
+class ConvergenceTimeout(Exception):
+    """Aspen stopped answering while waiting for a run to finish."""
+
+
+def _log_error(message):
+    """Append a timestamped message to the error log."""
+    try:
+        with open(config.LOG_FILE_ERROR, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} [ASPEN] {message}\n")
+    except OSError:
+        pass
 
 
 class AspenInterface:
@@ -29,27 +105,36 @@ class AspenInterface:
         self.aspen = None
         self.model_loaded = False
         self.last_simulation_time = 0
+        self._node_cache = {}  # Aspen tree path -> COM node
+        self._engine = None    # Cached Aspen Engine object
+        self._input_values = {}  # Aspen tree path -> last value written
+        self._last_comp = None        # Last applied composition signature
+        self._last_conditions = None  # Last applied (T, P, S/C, flow)
 
     def connect(self):
         """Connect to Aspen Plus."""
-        print("\n[ASPEN] Connecting to Aspen Plus V8.8...")
+        # Imported here: loading win32com.client walks the type library cache,
+        # which scripts that only import this module do not need
+        import win32com.client as win32
+
+        log.info("\n[ASPEN] Connecting to Aspen Plus V8.8...")
 
         # Try different dispatch options
         for dispatch_str in config.ASPEN_DISPATCH_OPTIONS:
             try:
-                print(f"  Trying: {dispatch_str}")
+                log.debug("  Trying: %s", dispatch_str)
                 self.aspen = win32.Dispatch(dispatch_str)
-                print(f"  [OK] Connected using: {dispatch_str}")
+                log.info("  [OK] Connected using: %s", dispatch_str)
                 return True
             except Exception as e:
-                print(f"  [FAILED] {dispatch_str}: {str(e)[:50]}")
+                log.warning("  [FAILED] %s: %.50s", dispatch_str, e)
                 continue
 
-        print("[ERROR] Could not connect to Aspen Plus!")
-        print("Possible solutions:")
-        print("  1. Ensure Aspen Plus V8.8 is installed")
-        print("  2. Run Python as administrator")
-        print("  3. Check Aspen license is active")
+        log.error("[ERROR] Could not connect to Aspen Plus!")
+        log.error("Possible solutions:")
+        log.error("  1. Ensure Aspen Plus V8.8 is installed")
+        log.error("  2. Run Python as administrator")
+        log.error("  3. Check Aspen license is active")
         return False
 
     def load_model(self, model_path=None):
@@ -57,17 +142,71 @@ class AspenInterface:
         if model_path is None:
             model_path = config.ASPEN_MODEL_PATH
 
-        print(f"\n[ASPEN] Loading model: {model_path}")
+        log.info("\n[ASPEN] Loading model: %s", model_path)
+
+        # Nodes from a previously loaded model are no longer valid
+        self._node_cache.clear()
+        self._input_values.clear()
+        self._last_comp = self._last_conditions = None
 
         try:
             self.aspen.InitFromArchive2(model_path)
+            self._engine = self.aspen.Engine
             self.model_loaded = True
-            print("  [OK] Model loaded successfully")
+            self._apply_static_conditions()
+            self._resolve_nodes()
+            log.info("  [OK] Model loaded successfully")
             return True
         except Exception as e:
-            print(f"  [ERROR] Failed to load model: {e}")
+            log.error("  [ERROR] Failed to load model: %s", e)
             return False
 
+    def _node(self, path):
+        """
+        Get Aspen tree node for a path, caching the COM object.
+
+        FindNode walks the variable tree through a COM call, so each path
+        is resolved once per loaded model and reused across simulations.
+        """
+        node = self._node_cache.get(path)
+        if node is None:
+            node = self.aspen.Tree.FindNode(path)
+            self._node_cache[path] = node
+        return node
+
+    def _resolve_nodes(self):
+        """
+        Resolve every per-scenario node in one pass right after loading the
+        model, so setting inputs and extracting results only touch .Value
+        (no tree walks during the sweep).
+
+        Nodes not found yet (None) are looked up again on first use.
+        """
+        for path in _NODE_PATHS:
+            self._node(path)
+
+    def _write_inputs(self, values):
+        """
+        Write input values ({path: value}) to Aspen in one pass.
+
+        Each Value assignment is a cross-process COM call, so values equal
+        to the last ones written to the loaded model are skipped.
+        """
+        for path, value in values.items():
+            if self._input_values.get(path) != value:
+                self._node(path).Value = value
+                self._input_values[path] = value
+
+    def _apply_static_conditions(self):
+        """Set conditions that are fixed for the whole sweep (called once per model load)."""
+        self._write_inputs({
+            # HTS and LTS temperatures
+            PATHS_INPUT['hts_temp']: config.HTS_TEMP_C,
+            PATHS_INPUT['lts_temp']: config.LTS_TEMP_C,
+            # PSA pressure
+            PATHS_INPUT['psa_pres']: config.PSA_PRES_BAR,
+        })
+
     def set_biooil_composition(self, composition_dict):
         """
         Set bio-oil composition in RYIELD block.
@@ -83,21 +222,25 @@ class AspenInterface:
                 Values should be mass fractions (0-1)
         """
         try:
-            # Normalize composition to ensure sum = 1.0
-            total = sum(composition_dict.values())
-            if abs(total - 1.0) > 0.01:
-                # Normalize
-                composition_dict = {k: v/total for k, v in composition_dict.items()}
+            # Same composition as the previous scenario: already in the model
+            sig = tuple(round(composition_dict.get(c, 0.0), 9) for c in _COMPS)
+            if sig == self._last_comp:
+                return True
 
-            # Set each component
-            for comp_name, path in config.PATHS_BIOOIL_COMP.items():
-                value = composition_dict.get(comp_name, 0.0)
-                self.aspen.Tree.FindNode(path).Value = value
+            # Normalize composition to ensure sum = 1.0 (one division, then multiplies)
+            inv_total = 1.0 / (sum(composition_dict.values()) or 1.0)
+
+            # Set all components
+            self._write_inputs({
+                path: composition_dict.get(comp_name, 0.0) * inv_total
+                for comp_name, path in BIOOIL_COMP_ITEMS
+            })
+            self._last_comp = sig
 
             return True
 
         except Exception as e:
-            print(f"  [ERROR] Failed to set bio-oil composition: {e}")
+            log.error("  [ERROR] Failed to set bio-oil composition: %s", e)
             return False
 
     def set_process_conditions(self, temp_c, pres_bar, sc_ratio, biooil_flow_kgh=100.0):
@@ -111,35 +254,28 @@ class AspenInterface:
             biooil_flow_kgh: Bio-oil feed rate (kg/h), default 100
         """
         try:
-            # Set reformer temperature
-            self.aspen.Tree.FindNode(config.PATHS_INPUT['reformer_temp']).Value = temp_c
-
-            # Set reformer pressure
-            self.aspen.Tree.FindNode(config.PATHS_INPUT['reformer_pres']).Value = pres_bar
-
-            # Set bio-oil flow
-            self.aspen.Tree.FindNode(config.PATHS_INPUT['biooil_flow']).Value = biooil_flow_kgh
+            # Same conditions as the previous scenario: already in the model
+            conditions = (temp_c, pres_bar, sc_ratio, biooil_flow_kgh)
+            if conditions == self._last_conditions:
+                return True
 
-            # Calculate and set steam flow based on S/C ratio
+            # Calculate steam flow based on S/C ratio
             # Assume bio-oil is ~50% carbon by mass
-            carbon_mass = biooil_flow_kgh * 0.5  # kg/h
-            carbon_moles = carbon_mass / 12.0    # kmol/h
-            steam_moles = carbon_moles * sc_ratio  # kmol/h
-            steam_mass = steam_moles * 18.0       # kg/h
-
-            self.aspen.Tree.FindNode(config.PATHS_INPUT['steam_flow']).Value = steam_mass
+            steam_mass = biooil_flow_kgh * sc_ratio * _STEAM_PER_FEED_SC  # kg/h
 
-            # Set HTS and LTS temperatures (fixed)
-            self.aspen.Tree.FindNode(config.PATHS_INPUT['hts_temp']).Value = 370.0
-            self.aspen.Tree.FindNode(config.PATHS_INPUT['lts_temp']).Value = 210.0
-
-            # Set PSA pressure
-            self.aspen.Tree.FindNode(config.PATHS_INPUT['psa_pres']).Value = 25.0
+            # HTS/LTS/PSA conditions are fixed and set once in load_model
+            self._write_inputs({
+                _PATH_REFORMER_TEMP: temp_c,
+                _PATH_REFORMER_PRES: pres_bar,
+                _PATH_BIOOIL_FLOW: biooil_flow_kgh,
+                _PATH_STEAM_FLOW: steam_mass,
+            })
+            self._last_conditions = conditions
 
             return True
 
         except Exception as e:
-            print(f"  [ERROR] Failed to set process conditions: {e}")
+            log.error("  [ERROR] Failed to set process conditions: %s", e)
             return False
 
     def run_simulation(self, timeout=None):
@@ -151,6 +287,9 @@ class AspenInterface:
 
         Returns:
             True if converged, False otherwise
+
+        Raises:
+            ConvergenceTimeout: Aspen stopped answering status reads during the run
         """
         if timeout is None:
             timeout = config.ASPEN_TIMEOUT
@@ -159,25 +298,36 @@ class AspenInterface:
             start_time = time.time()
 
             # Run simulation
-            self.aspen.Engine.Run2()
-
-            # Wait for completion (with timeout)
-            elapsed = 0
-            while elapsed < timeout:
-                # Check if results are available
+            engine = self._engine
+            engine.Run2()
+
+            # Wait for completion (with timeout). Poll with exponential
+            # backoff so fast-converging runs are picked up within ~50 ms
+            # instead of a fixed 1 s sleep, capped at 1 s for long runs.
+            # Each wake-up is a single IsRunning read.
+            deadline = start_time + timeout
+            delay = 0.05
+            com_errors = 0
+            while time.time() < deadline:
                 try:
-                    status = self.get_convergence_status()
-                    if status is not None:
+                    if not engine.IsRunning:
                         break
-                except:
-                    pass
-
-                time.sleep(1)
-                elapsed = time.time() - start_time
+                    com_errors = 0
+                except (_com_error, AttributeError) as e:
+                    # Aspen has likely crashed: fail now instead of waiting out the timeout
+                    com_errors += 1
+                    _log_error(f"Engine state read failed: {e}")
+                    if com_errors >= 2:
+                        raise ConvergenceTimeout(
+                            f"Aspen not responding while running: {e}"
+                        ) from e
+
+                time.sleep(delay)
+                delay = min(delay * 1.5, 1.0)
 
             self.last_simulation_time = time.time() - start_time
 
-            # Check final status
+            # Check final status (read once, after the run)
             status = self.get_convergence_status()
 
             if status and "Converged" in str(status):
@@ -185,66 +335,50 @@ class AspenInterface:
             else:
                 return False
 
+        except ConvergenceTimeout:
+            self.last_simulation_time = time.time() - start_time
+            raise
+
         except Exception as e:
-            print(f"  [ERROR] Simulation run failed: {e}")
+            log.error("  [ERROR] Simulation run failed: %s", e)
             return False
 
     def get_convergence_status(self):
         """Get simulation convergence status."""
         try:
-            status = self.aspen.Tree.FindNode(
-                config.PATHS_OUTPUT['convergence_status']
-            ).Value
+            status = self._node(_PATH_CONVERGENCE).Value
             return status
-        except:
+        except (_com_error, AttributeError) as e:
+            _log_error(f"Convergence status read failed: {e}")
             return None
 
-    def extract_h2_properties(self):
+    def extract_h2_properties(self, out=None):
         """
         Extract hydrogen product properties.
 
+        Args:
+            out: Record to fill (e.g. result['h2'] of a RESULT_DTYPE row),
+                 a new dictionary if None
+
         Returns:
-            Dictionary with H2 product data, or None if failed
+            Filled H2 product data, or None if failed
         """
         try:
-            results = {}
-
-            # Mass and mole flows
-            results['H2_Yield_kg'] = self.aspen.Tree.FindNode(
-                config.PATHS_OUTPUT['h2_mass_flow']
-            ).Value
-
-            results['H2_MoleFlow_kmolh'] = self.aspen.Tree.FindNode(
-                config.PATHS_OUTPUT['h2_mole_flow']
-            ).Value
+            results = {} if out is None else out
+            find = self._node
 
-            # Temperature and pressure
-            results['H2_Temp_C'] = self.aspen.Tree.FindNode(
-                config.PATHS_OUTPUT['h2_temp']
-            ).Value
-
-            results['H2_Pres_bar'] = self.aspen.Tree.FindNode(
-                config.PATHS_OUTPUT['h2_pres']
-            ).Value
+            # Mass and mole flows, temperature and pressure
+            (results['H2_Yield_kg'], results['H2_MoleFlow_kmolh'],
+             results['H2_Temp_C'], results['H2_Pres_bar']) = [
+                find(path).Value for path in _H2_OUTPUT_PATHS
+            ]
 
             # Composition (mole fractions)
-            h2_purity = self.aspen.Tree.FindNode(
-                config.PATHS_H2_COMPOSITION['H2']
-            ).Value
+            h2_purity, co_frac, co2_frac, ch4_frac = [
+                find(path).Value for path in _H2_FRACTION_PATHS
+            ]
             results['H2_Purity_percent'] = h2_purity * 100.0
-
-            co_frac = self.aspen.Tree.FindNode(
-                config.PATHS_H2_COMPOSITION['CO']
-            ).Value
             results['CO_Slip_ppm'] = co_frac * 1e6
-
-            co2_frac = self.aspen.Tree.FindNode(
-                config.PATHS_H2_COMPOSITION['CO2']
-            ).Value
-
-            ch4_frac = self.aspen.Tree.FindNode(
-                config.PATHS_H2_COMPOSITION['CH4']
-            ).Value
             results['CH4_Slip_percent'] = ch4_frac * 100.0
 
             # Calculate H2/CO and H2/CO2 ratios
@@ -267,68 +401,57 @@ class AspenInterface:
             return results
 
         except Exception as e:
-            print(f"  [ERROR] Failed to extract H2 properties: {e}")
+            log.error("  [ERROR] Failed to extract H2 properties: %s", e)
             return None
 
-    def extract_syngas_composition(self, stream_name):
+    def extract_syngas_composition(self, stream_name, out=None):
         """
         Extract syngas composition at a specific location.
 
         Args:
             stream_name: Name of stream (e.g., 'SYNGAS1')
+            out: Record to fill (e.g. result['syngas'][location] of a
+                 RESULT_DTYPE row), a new dictionary if None
 
         Returns:
-            Dictionary with composition data, or None if failed
+            Filled composition data, or None if failed
         """
         try:
-            results = {}
-
-            for comp in config.SYNGAS_COMPONENTS:
-                path = f"\\Data\\Streams\\{stream_name}\\Output\\MOLEFRAC\\MIXED\\{comp}"
-                mole_frac = self.aspen.Tree.FindNode(path).Value
-                results[f"{comp}_molpercent"] = mole_frac * 100.0
+            find = self._node
+            results = {} if out is None else out
+            for field, path in SYNGAS_PATH_TABLE[stream_name].items():
+                results[field] = find(path).Value
 
-            # Temperature
-            temp_path = f"\\Data\\Streams\\{stream_name}\\Output\\TEMP_OUT\\MIXED"
-            results['Temperature_C'] = self.aspen.Tree.FindNode(temp_path).Value
-
-            # Pressure
-            pres_path = f"\\Data\\Streams\\{stream_name}\\Output\\PRES_OUT\\MIXED"
-            results['Pressure_bar'] = self.aspen.Tree.FindNode(pres_path).Value
-
-            # Mass flow
-            mass_path = f"\\Data\\Streams\\{stream_name}\\Output\\MASSFLMX\\MIXED"
-            results['MassFlowRate_kgh'] = self.aspen.Tree.FindNode(mass_path).Value
-
-            # Molar flow
-            mole_path = f"\\Data\\Streams\\{stream_name}\\Output\\MOLEFLMX\\MIXED"
-            results['MolarFlowRate_kmolh'] = self.aspen.Tree.FindNode(mole_path).Value
+            # Mole fractions -> mol %
+            for key in _SYNGAS_MOLPERCENT_KEYS:
+                results[key] *= 100.0
 
             return results
 
         except Exception as e:
-            print(f"  [ERROR] Failed to extract syngas composition for {stream_name}: {e}")
+            log.error("  [ERROR] Failed to extract syngas composition for %s: %s", stream_name, e)
             return None
 
-    def extract_energy_data(self):
+    def extract_energy_data(self, out=None):
         """
         Extract energy balance data.
 
+        Args:
+            out: Record to fill (e.g. result['energy'] of a RESULT_DTYPE row),
+                 a new dictionary if None
+
         Returns:
-            Dictionary with energy data, or None if failed
+            Filled energy data, or None if failed
         """
         try:
-            results = {}
+            results = {} if out is None else out
+            find = self._node
 
             # Reformer duty (MJ/h)
-            results['ReformerHeat_MJ'] = self.aspen.Tree.FindNode(
-                config.PATHS_OUTPUT['reformer_duty']
-            ).Value
+            results['ReformerHeat_MJ'] = find(_PATH_REFORMER_DUTY).Value
 
             # Preheater duty (MJ/h)
-            results['PreheaterHeat_MJ'] = self.aspen.Tree.FindNode(
-                config.PATHS_OUTPUT['preheat_duty']
-            ).Value
+            results['PreheaterHeat_MJ'] = find(_PATH_PREHEAT_DUTY).Value
 
             # Total energy input
             results['TotalEnergyInput_MJ'] = (
@@ -338,9 +461,33 @@ class AspenInterface:
             return results
 
         except Exception as e:
-            print(f"  [ERROR] Failed to extract energy data: {e}")
+            log.error("  [ERROR] Failed to extract energy data: %s", e)
             return None
 
+    def extract_into(self, record):
+        """
+        Extract all results into a config.RESULT_DTYPE record in place.
+
+        Fields that could not be extracted are left unchanged (NaN for a
+        freshly allocated record).
+
+        Returns:
+            (h2_ok, syngas_locations, energy_ok): whether H2 data was
+            extracted, locations with syngas data, whether energy data was
+            extracted
+        """
+        h2_ok = self.extract_h2_properties(record['h2']) is not None
+
+        syngas = record['syngas']
+        syngas_locations = [
+            location for location, stream in _SYNGAS_STREAM_ITEMS
+            if self.extract_syngas_composition(stream, syngas[location]) is not None
+        ]
+
+        energy_ok = self.extract_energy_data(record['energy']) is not None
+
+        return h2_ok, syngas_locations, energy_ok
+
     def calculate_carbon_conversion(self, biooil_comp):
         """
         Calculate carbon conversion efficiency.
@@ -349,25 +496,21 @@ class AspenInterface:
             biooil_comp: Bio-oil composition dictionary
 
         Returns:
-            Carbon conversion percentage, or None if failed
+            Carbon conversion percentage, or None if failed (or no carbon fed)
         """
         try:
             # Calculate carbon input (approximate)
-            # Assume average C content for each component
-            carbon_contents = {
-                'aromatics': 0.913,     # Toluene: C7H8
-                'acids': 0.400,         # Acetic acid: C2H4O2
-                'alcohols': 0.522,      # Ethanol: C2H6O
-                'furans': 0.706,        # Furan: C4H4O
-                'phenols': 0.766,       # Phenol: C6H6O
-                'aldehyde_ketone': 0.621  # Acetone: C3H6O
-            }
-
-            # Calculate total carbon in bio-oil (kg C / kg bio-oil)
-            total_carbon = sum(
-                biooil_comp.get(comp, 0) * carbon_contents.get(comp, 0.5)
-                for comp in biooil_comp.keys()
+            # Total carbon in bio-oil (kg C / kg bio-oil) as one dot product
+            # against the per-component carbon contents (_CARBON_CONTENTS)
+            x = np.fromiter(
+                (biooil_comp.get(comp, 0.0) for comp in _COMPS),
+                dtype=np.float64, count=len(_COMPS)
             )
+            total_carbon = float(x @ _CARBON_CONTENTS)
+
+            # No carbon fed: conversion is undefined
+            if total_carbon <= 0.0:
+                return None
 
             # Get H2 and CO2 production (simplified calculation)
             # In reality, need to check all carbon-containing streams
@@ -376,9 +519,100 @@ class AspenInterface:
             return 90.0  # Placeholder, needs proper calculation from streams
 
         except Exception as e:
-            print(f"  [ERROR] Failed to calculate carbon conversion: {e}")
+            log.error("  [ERROR] Failed to calculate carbon conversion: %s", e)
             return None
 
+    def run_scenario(self, scenario, record=None):
+        """
+        Run one simulation scenario end to end (inputs, run, extraction).
+
+        Args:
+            scenario: Dictionary with keys:
+                - composition: bio-oil composition dict (mass fractions)
+                - temp_c, pres_bar, sc_ratio, biooil_flow_kgh
+            record: config.RESULT_DTYPE record to write results into
+                    (e.g. a row of a preallocated array); allocated if None
+
+        Returns:
+            Dictionary with keys:
+                - status: 'converged', 'failed' or 'error'
+                - error_message: reason to record as failed, or None
+                - record: RESULT_DTYPE record with extracted results
+                - syngas_locations: locations with extracted syngas data
+                - has_energy: whether energy data was extracted
+                - sim_time: Aspen run time (seconds)
+        """
+        if record is None:
+            record = np.full(1, np.nan, dtype=RESULT_DTYPE)[0]
+
+        # Identical scenario already simulated: reuse its result
+        cache_key = _cache.scenario_key(scenario) if config.USE_RESULT_CACHE else None
+        if cache_key is not None:
+            cached = _cache.get(cache_key)
+            if cached is not None:
+                for name in record.dtype.names:
+                    record[name] = cached['record'][name]
+                cached['record'] = record
+                return cached
+
+        result = self._run_scenario(scenario, record)
+
+        # Only converged results are cached (failures may be transient)
+        if cache_key is not None and result['status'] == 'converged':
+            _cache.put(cache_key, result)
+
+        return result
+
+    def _run_scenario(self, scenario, record):
+        """Run a scenario in Aspen (no caching); see run_scenario."""
+        result = {
+            'status': 'error',
+            'error_message': None,
+            'record': record,
+            'syngas_locations': [],
+            'has_energy': False,
+            'sim_time': 0.0,
+        }
+
+        try:
+            # 1. Set bio-oil composition
+            if not self.set_biooil_composition(scenario['composition']):
+                return result
+
+            # 2. Set process conditions
+            if not self.set_process_conditions(
+                temp_c=scenario['temp_c'],
+                pres_bar=scenario['pres_bar'],
+                sc_ratio=scenario['sc_ratio'],
+                biooil_flow_kgh=scenario['biooil_flow_kgh']
+            ):
+                return result
+
+            # 3. Run simulation
+            converged = self.run_simulation()
+            result['sim_time'] = self.last_simulation_time
+
+            if not converged:
+                result['status'] = 'failed'
+                result['error_message'] = 'Did not converge'
+                return result
+
+            # 4. Extract results
+            h2_ok, result['syngas_locations'], result['has_energy'] = (
+                self.extract_into(record)
+            )
+            if not h2_ok:
+                result['error_message'] = 'Failed to extract H2 data'
+                return result
+
+            result['status'] = 'converged'
+            return result
+
+        except Exception as e:
+            result['status'] = 'error'
+            result['error_message'] = str(e)[:500]
+            return result
+
     def get_simulation_time(self):
         """Get last simulation run time."""
         return self.last_simulation_time
@@ -388,11 +622,48 @@ class AspenInterface:
         if self.aspen is not None:
             try:
                 self.aspen.Close()
-                print("\n[ASPEN] Closed successfully")
-            except:
-                pass
+                log.info("\n[ASPEN] Closed successfully")
+            except (_com_error, AttributeError) as e:
+                _log_error(f"Close failed: {e}")
         self.aspen = None
+        self._engine = None
         self.model_loaded = False
+        self._node_cache.clear()
+        self._input_values.clear()
+        self._last_comp = self._last_conditions = None
+
+
+# ==============================================================================
+# WORKER FUNCTIONS (parallel sweep)
+# ==============================================================================
+
+# Each worker process owns one Aspen instance. Win32 COM objects are bound
+# to the apartment that created them, so workers are processes, not threads.
+_worker_aspen = None
+
+
+def _init_worker():
+    """Process-pool initializer: connect and load the model once per worker."""
+    global _worker_aspen
+
+    config.setup_logging()
+
+    aspen_interface = AspenInterface()
+    if not aspen_interface.connect() or not aspen_interface.load_model():
+        raise RuntimeError("Worker could not start Aspen Plus")
+
+    _worker_aspen = aspen_interface
+    atexit.register(aspen_interface.close)
+
+
+def run_one(scenario):
+    """
+    Run one scenario in this worker's Aspen instance.
+
+    Top-level (picklable) entry point for ProcessPoolExecutor.map; see
+    AspenInterface.run_scenario for the scenario and result formats.
+    """
+    return _worker_aspen.run_scenario(scenario)
 
 
 # ==============================================================================
@@ -401,9 +672,9 @@ class AspenInterface:
 
 def test_connection():
     """Test Aspen connection."""
-    print("="*70)
-    print("TESTING ASPEN CONNECTION")
-    print("="*70)
+    log.info("="*70)
+    log.info("TESTING ASPEN CONNECTION")
+    log.info("="*70)
 
     aspen_interface = AspenInterface()
 
@@ -415,16 +686,16 @@ def test_connection():
     if not aspen_interface.load_model():
         return False
 
-    print("\n[OK] Aspen connection test passed!")
+    log.info("\n[OK] Aspen connection test passed!")
     aspen_interface.close()
     return True
 
 
 def test_single_simulation():
     """Test a single simulation run."""
-    print("="*70)
-    print("TESTING SINGLE SIMULATION")
-    print("="*70)
+    log.info("="*70)
+    log.info("TESTING SINGLE SIMULATION")
+    log.info("="*70)
 
     aspen_interface = AspenInterface()
 
@@ -444,49 +715,51 @@ def test_single_simulation():
         'aldehyde_ketone': 0.0653
     }
 
-    print("\nSetting bio-oil composition...")
+    log.info("\nSetting bio-oil composition...")
     aspen_interface.set_biooil_composition(test_comp)
 
-    print("Setting process conditions (800°C, 15 bar, S/C=3.5)...")
+    log.info("Setting process conditions (800°C, 15 bar, S/C=3.5)...")
     aspen_interface.set_process_conditions(
         temp_c=800.0,
         pres_bar=15.0,
         sc_ratio=3.5
     )
 
-    print("Running simulation...")
+    log.info("Running simulation...")
     converged = aspen_interface.run_simulation()
 
     if converged:
-        print(f"  [OK] Converged in {aspen_interface.get_simulation_time():.1f} seconds")
+        log.info("  [OK] Converged in %.1f seconds", aspen_interface.get_simulation_time())
 
         # Extract results
         h2_data = aspen_interface.extract_h2_properties()
         if h2_data:
-            print("\nH2 Product Properties:")
-            print(f"  Yield: {h2_data['H2_Yield_kg']:.2f} kg/h")
-            print(f"  Purity: {h2_data['H2_Purity_percent']:.2f}%")
-            print(f"  CO: {h2_data['CO_Slip_ppm']:.1f} ppm")
+            log.info("\nH2 Product Properties:")
+            log.info("  Yield: %.2f kg/h", h2_data['H2_Yield_kg'])
+            log.info("  Purity: %.2f%%", h2_data['H2_Purity_percent'])
+            log.info("  CO: %.1f ppm", h2_data['CO_Slip_ppm'])
 
         syngas_data = aspen_interface.extract_syngas_composition('SYNGAS1')
         if syngas_data:
-            print("\nSyngas Composition (Reformer Out):")
-            print(f"  H2: {syngas_data['H2_molpercent']:.2f}%")
-            print(f"  CO: {syngas_data['CO_molpercent']:.2f}%")
-            print(f"  CO2: {syngas_data['CO2_molpercent']:.2f}%")
+            log.info("\nSyngas Composition (Reformer Out):")
+            log.info("  H2: %.2f%%", syngas_data['H2_molpercent'])
+            log.info("  CO: %.2f%%", syngas_data['CO_molpercent'])
+            log.info("  CO2: %.2f%%", syngas_data['CO2_molpercent'])
 
-        print("\n[OK] Single simulation test passed!")
+        log.info("\n[OK] Single simulation test passed!")
     else:
-        print("  [ERROR] Simulation did not converge")
+        log.error("  [ERROR] Simulation did not converge")
 
     aspen_interface.close()
     return converged
 
 
 if __name__ == "__main__":
+    config.setup_logging()
+
     # Run tests
-    print("\nTest 1: Connection")
+    log.info("\nTest 1: Connection")
     test_connection()
 
-    print("\n\nTest 2: Single Simulation")
+    log.info("\n\nTest 2: Single Simulation")
     test_single_simulation()
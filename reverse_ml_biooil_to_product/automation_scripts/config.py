@@ -10,8 +10,11 @@ IMPORTANT: Update paths and database settings for Aspen computer!
 ==============================================================================
 """
 
+import logging
 import os
 
+import numpy as np
+
 # ==============================================================================
 # FILE PATHS (Update these for Aspen computer)
 # ==============================================================================
@@ -25,12 +28,36 @@ ASPEN_MODEL_PATH = os.path.join(BASE_DIR, "aspen_model", "biooil_reforming_base.
 # Input data file (1,170 simulation scenarios)
 INPUT_DATA_PATH = os.path.join(BASE_DIR, "data", "aspen_input_matrix.csv")
 
+# Input column types (read in BATCH_SIZE chunks, no type inference per chunk)
+INPUT_DTYPES = {
+    'SimulationId': 'int64',
+    'BiooilId': 'int64',
+    **{comp: 'float64' for comp in (
+        'aromatics', 'acids', 'alcohols', 'furans', 'phenols', 'aldehyde_ketone'
+    )},
+    'ReformerTemperature_C': 'float64',
+    'ReformerPressure_bar': 'float64',
+    'SteamToCarbonRatio': 'float64',
+    'BiooilFeedRate_kgh': 'float64',
+    'SteamFeedRate_kgh': 'float64',
+}
+
 # Log directory (auto-created if doesn't exist)
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 
 # Progress tracking file (stores last completed simulation)
 PROGRESS_FILE = os.path.join(BASE_DIR, "logs", "progress.json")
 
+# Result cache (SQLite): converged scenarios already simulated on the same
+# model file (ASPEN_MODEL_PATH, size and mtime) are not re-run in Aspen
+RESULT_CACHE_PATH = os.path.join(BASE_DIR, "logs", "result_cache.sqlite")
+USE_RESULT_CACHE = True
+
+# Local checkpoint of converged BiooilIds (one per line), read on resume so
+# restarts only ask SQL Server about the ids not in it. Delete to reset.
+COMPLETED_CACHE_PATH = os.path.join(BASE_DIR, "logs", "completed_biooil_ids.txt")
+USE_COMPLETED_CACHE = True
+
 # ==============================================================================
 # DATABASE CONNECTION (*** UPDATE SERVER NAME ***)
 # ==============================================================================
@@ -50,22 +77,94 @@ DB_USE_WINDOWS_AUTH = True  # Set to False if using SQL Server authentication
 DB_USERNAME = ''  # Leave empty if using Windows auth
 DB_PASSWORD = ''  # Leave empty if using Windows auth
 
-# Connection string (automatically built from above)
-if DB_USE_WINDOWS_AUTH:
-    DB_CONNECTION_STRING = (
-        f"DRIVER={DB_DRIVER};"
-        f"SERVER={DB_SERVER};"  # TODO_DB: This uses DB_SERVER above
-        f"DATABASE={DB_DATABASE};"
-        f"Trusted_Connection=yes"
-    )
-else:
-    DB_CONNECTION_STRING = (
-        f"DRIVER={DB_DRIVER};"
-        f"SERVER={DB_SERVER};"  # TODO_DB: This uses DB_SERVER above
-        f"DATABASE={DB_DATABASE};"
-        f"UID={DB_USERNAME};"
-        f"PWD={DB_PASSWORD}"
+# Connection string: built from above on first use, see get_db_connection_string()
+_cs = None
+
+# Connection attempts retried on failure (e.g. SQL Server still starting)
+DB_CONNECT_RETRIES = 2
+DB_CONNECT_RETRY_DELAY = 5  # seconds
+
+# Query timeout per statement (0 = wait forever)
+DB_QUERY_TIMEOUT = 30  # seconds
+
+# Buffered result rows are bulk inserted once this many are waiting (per table)
+DB_FLUSH_ROWS = 500
+
+# Flushed row lists kept for reuse per table (avoids a new list per row)
+DB_ROW_POOL_SIZE = 1024
+
+# Result table columns, in insert parameter order
+# (AspenSimulation: failed-run markers; converged runs are inserted directly)
+DB_INSERT_COLUMNS = {
+    'AspenSimulation': (
+        'Biooil_Id', 'SimulationDate', 'AspenVersion',
+        'ConvergenceStatus', 'Warnings', 'Notes', 'ValidationFlag',
+    ),
+    'ReformingConditions': (
+        'Simulation_Id',
+        'ReformerTemperature_C', 'ReformerPressure_bar', 'SteamToCarbonRatio',
+        'BiooilFeedRate_kgh', 'SteamFeedRate_kgh',
+        # ResidenceTime_min, CatalystWeight_kg, GHSV_h1: column DEFAULTs
+        'HTS_Temperature_C', 'LTS_Temperature_C', 'PSA_Pressure_bar',
+    ),
+    'HydrogenProduct': (
+        'Simulation_Id',
+        'H2_Yield_kg', 'H2_Purity_percent',
+        'H2_FlowRate_kgh', 'H2_FlowRate_Nm3h',
+        'H2_CO_Ratio', 'H2_CO2_Ratio',
+        'CO2_Production_kg', 'CO2_Purity_percent',
+        'CH4_Slip_percent', 'CO_Slip_ppm',
+        'Carbon_Conversion_percent', 'H2_Recovery_PSA_percent',
+        'Energy_Efficiency_percent', 'Specific_Energy_MJperkg_H2',
+        'TailGas_FlowRate_kgh', 'TailGas_HHV_MJperkg',
+    ),
+    'SyngasComposition': (
+        'Simulation_Id', 'StreamLocation',
+        'H2_molpercent', 'CO_molpercent', 'CO2_molpercent',
+        'CH4_molpercent', 'H2O_molpercent', 'N2_molpercent',
+        'Temperature_C', 'Pressure_bar',
+        'MassFlowRate_kgh', 'MolarFlowRate_kmolh',
+    ),
+    'EnergyBalance': (
+        'Simulation_Id',
+        'BiooilEnergy_HHV_MJ', 'PreheaterHeat_MJ', 'ReformerHeat_MJ',
+        'TotalEnergyInput_MJ',
+        'H2Product_HHV_MJ', 'TailGasEnergy_MJ',
+        'HeatRecovered_MJ', 'HeatLoss_MJ',
+        'Thermal_Efficiency_percent', 'Carbon_Efficiency_percent',
+    ),
+}
+
+# Parameter types bound once per statement (see db.input_sizes());
+# columns not listed here are DECIMAL and bound as floats
+DB_INT_COLUMNS = ('Biooil_Id', 'Simulation_Id', 'ConvergenceIterations', 'ValidationFlag')
+DB_DATETIME_COLUMNS = ('SimulationDate',)
+DB_TEXT_COLUMNS = {  # Column -> NVARCHAR length (0 = MAX)
+    'AspenVersion': 50,
+    'ConvergenceStatus': 20,
+    'StreamLocation': 50,
+    'Warnings': 0,
+    'Notes': 0,
+}
+
+# INSERT statements for the result tables (built once, used with executemany)
+DB_INSERT_SQL = {
+    table: (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})"
     )
+    for table, columns in DB_INSERT_COLUMNS.items()
+}
+
+# Stored procedure inserting a converged simulation and its result rows
+# in one round trip (database/05_create_procedures.sql)
+DB_BUNDLE_PROC = 'dbo.usp_InsertSimulationBundle'
+
+# Batch converged runs into one table-valued parameter call per DB_FLUSH_ROWS
+# simulations (usp_InsertBundleFromTVP). Needs a TVP-capable driver, e.g.
+# DB_DRIVER = '{ODBC Driver 17 for SQL Server}'; {SQL Server} does not support it
+DB_USE_TVP = False
+DB_BUNDLE_TVP_PROC = 'dbo.usp_InsertBundleFromTVP'
 
 # ==============================================================================
 # ASPEN PLUS SETTINGS
@@ -96,7 +195,11 @@ BATCH_SIZE = 100
 PAUSE_BETWEEN_BATCHES = True
 
 # Auto-continue after pause (seconds, 0 = wait for user input)
-AUTO_CONTINUE_DELAY = 0  # 0 = manual, 30 = auto after 30 seconds
+AUTO_CONTINUE_DELAY = 0  # 0 = manual, 30 = auto after 30 seconds (fractions allowed)
+
+# Number of parallel Aspen worker processes (1 = run in this process).
+# Each worker starts its own Aspen Plus instance and needs its own license.
+WORKERS = 1
 
 # ==============================================================================
 # PROCESS PARAMETERS (Reference - not changed during automation)
@@ -114,6 +217,23 @@ REFORMER_PRES_MAX = 30
 SC_RATIO_MIN = 2.0
 SC_RATIO_MAX = 6.0
 
+# Screen rows before Aspen: scenarios outside the ranges above, with a
+# non-positive feed rate or a composition not summing to 1 (after
+# normalization) are skipped without being simulated or stored
+PREVALIDATE_ROWS = True
+MIN_COMPOSITION_SUM = 0.99
+
+# Fixed downstream conditions (set once per model load)
+HTS_TEMP_C = 370.0
+LTS_TEMP_C = 210.0
+PSA_PRES_BAR = 25.0
+
+# Assumed bio-oil carbon content (mass fraction) for steam flow calculation
+BIOOIL_CARBON_FRACTION = 0.5
+
+# Steam mass per S/C unit per kg carbon: (1/12 kmol C) * 18 kg/kmol H2O
+STEAM_PER_SC = (1 / 12.0) * 18.0  # = 1.5
+
 # ==============================================================================
 # VALIDATION THRESHOLDS
 # ==============================================================================
@@ -169,6 +289,10 @@ PATHS_OUTPUT = {
     'preheat_duty': r"\Data\Blocks\PREHEAT\Output\QCALC",
 }
 
+# Frozen views for per-simulation loops (built once at import)
+BIOOIL_COMP_ITEMS = tuple(PATHS_BIOOIL_COMP.items())
+H2_OUTPUT_KEYS = ('h2_mass_flow', 'h2_mole_flow', 'h2_temp', 'h2_pres')
+
 # Component mole fractions in H2 product
 PATHS_H2_COMPOSITION = {
     'H2': r"\Data\Streams\H2PROD\Output\MOLEFRAC\MIXED\H2",
@@ -187,6 +311,40 @@ SYNGAS_STREAMS = {
 
 SYNGAS_COMPONENTS = ['H2', 'CO', 'CO2', 'CH4', 'H2O', 'N2']
 
+
+def _syngas_paths(stream):
+    """Build result field -> Aspen tree path mapping for a syngas stream."""
+    base = rf"\Data\Streams\{stream}\Output"
+    return {
+        **{f"{c}_molpercent": rf"{base}\MOLEFRAC\MIXED\{c}" for c in SYNGAS_COMPONENTS},
+        'Temperature_C': rf"{base}\TEMP_OUT\MIXED",
+        'Pressure_bar': rf"{base}\PRES_OUT\MIXED",
+        'MassFlowRate_kgh': rf"{base}\MASSFLMX\MIXED",
+        'MolarFlowRate_kmolh': rf"{base}\MOLEFLMX\MIXED",
+    }
+
+
+# Syngas result paths per stream (built once at import)
+SYNGAS_PATH_TABLE = {s: _syngas_paths(s) for s in SYNGAS_STREAMS.values()}
+
+# Result record layout (one row per simulation in a preallocated array)
+H2_RESULT_FIELDS = (
+    'H2_Yield_kg', 'H2_MoleFlow_kmolh', 'H2_Temp_C', 'H2_Pres_bar',
+    'H2_Purity_percent', 'CO_Slip_ppm', 'CH4_Slip_percent',
+    'H2_CO_Ratio', 'H2_CO2_Ratio', 'H2_FlowRate_kgh', 'H2_FlowRate_Nm3h',
+)
+SYNGAS_RESULT_FIELDS = tuple(_syngas_paths('').keys())
+ENERGY_RESULT_FIELDS = ('ReformerHeat_MJ', 'PreheaterHeat_MJ', 'TotalEnergyInput_MJ')
+
+RESULT_DTYPE = np.dtype([
+    ('h2', [(field, 'f8') for field in H2_RESULT_FIELDS]),
+    ('syngas', [
+        (location, [(field, 'f8') for field in SYNGAS_RESULT_FIELDS])
+        for location in SYNGAS_STREAMS
+    ]),
+    ('energy', [(field, 'f8') for field in ENERGY_RESULT_FIELDS]),
+])
+
 # ==============================================================================
 # LOGGING SETTINGS
 # ==============================================================================
@@ -196,8 +354,8 @@ LOG_FILE_MAIN = os.path.join(LOG_DIR, "automation_log.txt")
 LOG_FILE_ERROR = os.path.join(LOG_DIR, "error_log.txt")
 LOG_FILE_RESULTS = os.path.join(LOG_DIR, "results_summary.csv")
 
-# Log level (DEBUG, INFO, WARNING, ERROR)
-LOG_LEVEL = 'INFO'
+# Log level (DEBUG, INFO, WARNING, ERROR); AUTOMATION_LOG_LEVEL overrides it
+LOG_LEVEL = os.environ.get('AUTOMATION_LOG_LEVEL', 'INFO').upper()
 
 # ==============================================================================
 # DISPLAY SETTINGS
@@ -209,6 +367,13 @@ VERBOSE_MODE = True
 # Update frequency (show progress every N simulations)
 PROGRESS_UPDATE_FREQ = 1
 
+# Per-simulation output is written in bursts: every N lines or N seconds
+PROGRESS_FLUSH_LINES = 20
+PROGRESS_FLUSH_SECONDS = 10
+
+# Checkpoint frequency (write PROGRESS_FILE every N simulations and at batch end)
+PROGRESS_SAVE_FREQ = 25
+
 # Show warnings?
 SHOW_WARNINGS = True
 
@@ -245,9 +410,34 @@ def validate_config():
     return issues
 
 
+def setup_logging():
+    """Configure console logging once, at LOG_LEVEL (messages printed as-is)."""
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL, logging.INFO),
+        format="%(message)s",
+    )
+
+
 def get_db_connection_string():
-    """Get database connection string (for external use)."""
-    return DB_CONNECTION_STRING
+    """Get database connection string (built on first call, then cached)."""
+    global _cs
+    if _cs is None:
+        if DB_USE_WINDOWS_AUTH:
+            _cs = (
+                f"DRIVER={DB_DRIVER};"
+                f"SERVER={DB_SERVER};"  # TODO_DB: This uses DB_SERVER above
+                f"DATABASE={DB_DATABASE};"
+                f"Trusted_Connection=yes"
+            )
+        else:
+            _cs = (
+                f"DRIVER={DB_DRIVER};"
+                f"SERVER={DB_SERVER};"  # TODO_DB: This uses DB_SERVER above
+                f"DATABASE={DB_DATABASE};"
+                f"UID={DB_USERNAME};"
+                f"PWD={DB_PASSWORD}"
+            )
+    return _cs
 
 
 def print_config_summary():
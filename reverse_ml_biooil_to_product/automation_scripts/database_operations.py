@@ -8,16 +8,186 @@ Date: 2025-11-16
 
 Functions:
 - Connect to SQL Server database
-- Insert simulation results into 5 tables
+- Insert simulation results into 5 tables (result rows buffered, bulk inserted)
 - Track progress (resume capability)
 - Mark failed simulations
 - Validation and error handling
 ==============================================================================
 """
 
-import pyodbc
-import config
+import functools
+import logging
+import random
+import time
 from datetime import datetime
+from operator import itemgetter
+
+import config
+import db
+
+
+log = logging.getLogger("database")
+
+
+# Converged-run AspenSimulation insert (returns the new SimulationId)
+_SIM_INSERT_COLUMNS = (
+    'Biooil_Id', 'AspenVersion', 'ConvergenceStatus', 'ConvergenceIterations',
+    'MassBalanceError_percent', 'EnergyBalanceError_percent',
+    'Warnings', 'Notes', 'ValidationFlag',
+)
+_SQL_INSERT_SIM = """
+    INSERT INTO AspenSimulation (
+        Biooil_Id, SimulationDate, AspenVersion,
+        ConvergenceStatus, ConvergenceIterations,
+        MassBalanceError_percent, EnergyBalanceError_percent,
+        Warnings, Notes, ValidationFlag
+    )
+    OUTPUT INSERTED.SimulationId
+    VALUES (?, GETDATE(), ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Result record fields per insert, in parameter order (C-level extraction)
+_H2_KEYS = (
+    'H2_Yield_kg', 'H2_Purity_percent', 'H2_FlowRate_kgh', 'H2_FlowRate_Nm3h',
+    'H2_CO_Ratio', 'H2_CO2_Ratio', 'CH4_Slip_percent', 'CO_Slip_ppm',
+)
+_ENERGY_KEYS = ('PreheaterHeat_MJ', 'ReformerHeat_MJ', 'TotalEnergyInput_MJ')
+_get_h2 = itemgetter(*_H2_KEYS)
+_get_syngas = itemgetter(*config.SYNGAS_RESULT_FIELDS)
+_get_energy = itemgetter(*_ENERGY_KEYS)
+
+# Bundle procedure call: 24 scalar parameters + 4 syngas slots
+_SYNGAS_SLOT = 1 + len(config.SYNGAS_RESULT_FIELDS)  # Location + fields
+_SQL_CALL_BUNDLE = (
+    f"{{CALL {config.DB_BUNDLE_PROC} "
+    f"({', '.join('?' * (24 + len(config.SYNGAS_STREAMS) * _SYNGAS_SLOT))})}}"
+)
+
+# Batched bundle call: one SimulationBundleTVP parameter (config.DB_USE_TVP)
+_SQL_CALL_BUNDLE_TVP = f"{{CALL {config.DB_BUNDLE_TVP_PROC} (?)}}"
+
+
+def _multi_insert(cursor, table, rows):
+    """
+    Insert rows with multi-row VALUES statements (fallback when the driver
+    has no fast_executemany): one round trip per chunk instead of per row.
+
+    Chunks stay under SQL Server's 2100-parameter limit per statement.
+    """
+    columns = config.DB_INSERT_COLUMNS[table]
+    head = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    values = f"({', '.join('?' * len(columns))})"
+    chunk = 2099 // len(columns)
+    for start in range(0, len(rows), chunk):
+        batch = rows[start:start + chunk]
+        cursor.execute(
+            head + ', '.join([values] * len(batch)),
+            [value for row in batch for value in row]
+        )
+
+
+def _is_deadlock(error):
+    """True for SQL Server deadlock / serialization failures (retryable)."""
+    return bool(error.args) and (error.args[0] == '40001' or '(1205)' in str(error))
+
+
+def _with_retry(retries=3):
+    """
+    Run a DatabaseOperations insert, retrying deadlocked transactions.
+
+    Any error rolls the transaction back. Deadlocks (SQLSTATE 40001, error
+    1205) are retried up to `retries` times with exponential jitter; other
+    errors are logged and the method returns None.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            for attempt in range(retries + 1):
+                try:
+                    return method(self, *args, **kwargs)
+                except Exception as e:
+                    self.conn.rollback()
+                    self._uncommitted_ids.clear()
+                    if attempt < retries and _is_deadlock(e):
+                        time.sleep(random.uniform(0, 2 ** attempt * 0.01))
+                        continue
+                    log.error("    [ERROR] %s failed: %s", method.__name__, e)
+                    return None
+        return wrapper
+    return decorate
+
+
+class _PooledCursor:
+    """
+    Long-lived cursor on a pooled connection.
+
+    Holds one pyodbc cursor (fast_executemany on) for the connection's
+    lifetime. If a statement fails with a ProgrammingError (e.g. the cursor
+    was closed), a fresh cursor is opened before the error is re-raised, so
+    the next call works without reconnecting. Other attributes (fetchone,
+    setinputsizes, arraysize, ...) are passed through to the cursor.
+    """
+
+    def __init__(self, conn):
+        import pyodbc  # already loaded by db.conn()
+        self._conn = conn
+        self._errors = pyodbc.ProgrammingError
+        self._cur = self._open()
+
+    def _open(self):
+        cur = self._conn.cursor()
+        # Send executemany parameters as one array instead of row by row
+        # (not available on old pyodbc versions: multi-row VALUES fallback)
+        try:
+            cur.fast_executemany = True
+            self._fast = True
+        except AttributeError:
+            self._fast = False
+        return cur
+
+    @property
+    def fast(self):
+        """True if executemany sends parameters as one array."""
+        return self._fast
+
+    def execute(self, *args):
+        try:
+            return self._cur.execute(*args)
+        except self._errors:
+            self._cur = self._open()
+            raise
+
+    def executemany(self, *args):
+        try:
+            return self._cur.executemany(*args)
+        except self._errors:
+            self._cur = self._open()
+            raise
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cur, name, value)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def close(self):
+        try:
+            self._cur.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
 
 
 class DatabaseOperations:
@@ -27,27 +197,49 @@ class DatabaseOperations:
         """Initialize database connection."""
         self.conn = None
         self.cursor = None
+        # Result rows waiting for bulk insert: table -> list of parameter tuples
+        self._pending = {table: [] for table in config.DB_INSERT_SQL}
+        # Flushed row lists kept for reuse: table -> list of fixed-width lists
+        self._row_pool = {table: [] for table in config.DB_INSERT_SQL}
+        # Converged-run bundles waiting for one TVP call (config.DB_USE_TVP)
+        self._bundles = []
+        # Buffer lengths at begin_simulation(), None outside a simulation
+        self._sim_marks = None
+        # BiooilIds inserted in the open transaction (cached as completed on commit)
+        self._uncommitted_ids = []
+        # Parameter types per statement, bound once (set in connect())
+        self._input_sizes = None
+        # Completed BiooilIds: queried once, then kept up to date by the inserts
+        self._completed_cache = None
 
     def connect(self):
         """Connect to SQL Server database."""
-        print("\n[DATABASE] Connecting to SQL Server...")
-        # TODO_DB: Connection string uses config.DB_CONNECTION_STRING
+        log.info("\n[DATABASE] Connecting to SQL Server...")
+        # TODO_DB: Connection string uses config.get_db_connection_string()
         # which contains config.DB_SERVER - update in config.py!
-        print(f"  Server: {config.DB_SERVER}")  # TODO_DB
-        print(f"  Database: {config.DB_DATABASE}")
+        log.info("  Server: %s", config.DB_SERVER)  # TODO_DB
+        log.info("  Database: %s", config.DB_DATABASE)
 
         try:
-            self.conn = pyodbc.connect(config.DB_CONNECTION_STRING)
-            self.cursor = self.conn.cursor()
-            print("  [OK] Connected to database")
+            # Pooled connection, reused across instances (see db.py)
+            self.conn = db.conn()
+            # One cursor held for the connection's lifetime (reopened after errors)
+            self.cursor = _PooledCursor(self.conn)
+            # Fixed parameter types: no per-call type guessing / re-prepare
+            self._input_sizes = {
+                table: db.input_sizes(columns)
+                for table, columns in config.DB_INSERT_COLUMNS.items()
+            }
+            self._input_sizes['_sim'] = db.input_sizes(_SIM_INSERT_COLUMNS)
+            log.info("  [OK] Connected to database")
             return True
         except Exception as e:
-            print(f"  [ERROR] Failed to connect: {e}")
-            print("\n  Troubleshooting:")
-            print("    1. Check SQL Server is running")
-            print("    2. Update DB_SERVER in config.py (search: TODO_DB)")
-            print("    3. Verify database 'BIOOIL' exists")
-            print("    4. Check Windows authentication or credentials")
+            log.error("  [ERROR] Failed to connect: %s", e)
+            log.error("\n  Troubleshooting:")
+            log.error("    1. Check SQL Server is running")
+            log.error("    2. Update DB_SERVER in config.py (search: TODO_DB)")
+            log.error("    3. Verify database 'BIOOIL' exists")
+            log.error("    4. Check Windows authentication or credentials")
             return False
 
     def test_connection(self):
@@ -56,7 +248,7 @@ class DatabaseOperations:
             # Test query
             self.cursor.execute("SELECT @@VERSION")
             version = self.cursor.fetchone()[0]
-            print(f"\n[DATABASE] Connected to: {version[:50]}...")
+            log.info("\n[DATABASE] Connected to: %.50s...", version)
 
             # Check if tables exist
             self.cursor.execute("""
@@ -68,22 +260,149 @@ class DatabaseOperations:
                 ORDER BY TABLE_NAME
             """)
 
-            tables = [row[0] for row in self.cursor.fetchall()]
-            print(f"\n  Found {len(tables)} required tables:")
-            for table in tables:
-                print(f"    - {table}")
+            # One pass over the cursor: collect and list the tables
+            log.info("\n  Required tables found:")
+            tables = []
+            for row in self.cursor:
+                tables.append(row[0])
+                log.info("    - %s", row[0])
+            log.info("  Found %d of 5 required tables", len(tables))
 
             if len(tables) == 5:
-                print("  [OK] All required tables exist")
+                log.info("  [OK] All required tables exist")
                 return True
             else:
-                print("  [ERROR] Missing tables! Run database creation scripts first.")
+                log.error("  [ERROR] Missing tables! Run database creation scripts first.")
                 return False
 
         except Exception as e:
-            print(f"  [ERROR] Database test failed: {e}")
+            log.error("  [ERROR] Database test failed: %s", e)
+            return False
+
+    def _queue_row(self, table, row):
+        """Buffer a result row and bulk insert once DB_FLUSH_ROWS rows are waiting."""
+        pending = self._pending[table]
+        pool = self._row_pool[table]
+        # Reuse a flushed row list (same width) instead of allocating a new one
+        buf = pool.pop() if pool else [None] * len(row)
+        for i, value in enumerate(row):
+            # NaN (missing value in a RESULT_DTYPE record) -> NULL
+            buf[i] = None if value != value else value
+        pending.append(buf)
+        # Inside a simulation the flush waits for commit_simulation()
+        if self._sim_marks is None and len(pending) >= config.DB_FLUSH_ROWS:
+            return self.flush()
+        return True
+
+    def flush(self, table=None):
+        """
+        Bulk insert buffered rows (one executemany per table, one commit).
+
+        Args:
+            table: Only flush this table's buffer (default: all tables)
+
+        Returns:
+            True if successful (or nothing to insert), False if failed
+            (buffered rows kept for the next flush)
+        """
+        tables = self._pending if table is None else (table,)
+        bundles = self._bundles if table is None else []
+        if not bundles and not any(self._pending[t] for t in tables):
+            return True
+
+        cursor, pending, sizes = self.cursor, self._pending, self._input_sizes
+        t = config.DB_BUNDLE_TVP_PROC
+        try:
+            if bundles:
+                # Whole batch of converged runs (all 5 tables) in one round trip
+                cursor.execute(_SQL_CALL_BUNDLE_TVP, (bundles,))
+            for t in tables:
+                rows = pending[t]
+                if rows:
+                    if cursor.fast:
+                        cursor.setinputsizes(sizes[t])
+                        cursor.executemany(config.DB_INSERT_SQL[t], rows)
+                    else:
+                        _multi_insert(cursor, t, rows)
+            self.conn.commit()
+
+        except Exception as e:
+            # Rolled back: buffers are kept and sent again on the next flush
+            log.error("    [ERROR] Failed to bulk insert %s rows: %s", t, e)
+            self.conn.rollback()
+            self._uncommitted_ids.clear()
+            return False
+
+        finally:
+            cursor.setinputsizes(None)
+
+        # Committed: the bio-oils are done, buffers can be reused
+        self._mark_committed()
+        for bundle in bundles:
+            self._mark_completed(bundle[1])  # (RowNo, BiooilId, ...)
+        if 'AspenSimulation' in tables:
+            for marker in pending['AspenSimulation']:
+                self._mark_completed(marker[0])
+        bundles.clear()
+        for t in tables:
+            self._recycle_rows(t, pending[t])
+            pending[t].clear()
+        return True
+
+    def _recycle_rows(self, table, rows):
+        """Return row lists to the table's pool (up to DB_ROW_POOL_SIZE)."""
+        pool = self._row_pool[table]
+        pool.extend(rows[:config.DB_ROW_POOL_SIZE - len(pool)])
+
+    def begin_simulation(self):
+        """Start a simulation's inserts (committed or rolled back together)."""
+        self._sim_marks = {table: len(rows) for table, rows in self._pending.items()}
+
+    def commit_simulation(self):
+        """
+        Commit the current simulation's inserts in one transaction.
+
+        Buffered rows are bulk inserted (and committed) instead once
+        DB_FLUSH_ROWS rows are waiting.
+
+        Returns:
+            True if successful, False if failed (simulation rolled back)
+        """
+        try:
+            if any(len(rows) >= config.DB_FLUSH_ROWS for rows in self._pending.values()):
+                if not self.flush():
+                    # Earlier rows stay buffered; this simulation's rows
+                    # belong to the rolled-back transaction
+                    self.rollback_simulation()
+                    return False
+            else:
+                self.conn.commit()
+                self._mark_committed()
+            return True
+
+        except Exception as e:
+            log.error("    [ERROR] Failed to commit simulation: %s", e)
+            self.rollback_simulation()
             return False
 
+        finally:
+            self._sim_marks = None
+
+    def rollback_simulation(self):
+        """Roll back the current simulation's inserts, including buffered rows."""
+        try:
+            self.conn.rollback()
+        except Exception as e:
+            log.error("    [ERROR] Failed to roll back simulation: %s", e)
+        self._uncommitted_ids.clear()
+
+        if self._sim_marks is not None:
+            for table, mark in self._sim_marks.items():
+                self._recycle_rows(table, self._pending[table][mark:])
+                del self._pending[table][mark:]
+            self._sim_marks = None
+
+    @_with_retry()
     def insert_simulation(self, biooil_id, convergence_status, mass_error=None,
                          energy_error=None, warnings=None, notes=None):
         """
@@ -93,16 +412,8 @@ class DatabaseOperations:
             simulation_id (int) if successful, None if failed
         """
         try:
-            sql = """
-                INSERT INTO AspenSimulation (
-                    Biooil_Id, SimulationDate, AspenVersion,
-                    ConvergenceStatus, ConvergenceIterations,
-                    MassBalanceError_percent, EnergyBalanceError_percent,
-                    Warnings, Notes, ValidationFlag
-                ) VALUES (?, GETDATE(), ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-
-            self.cursor.execute(sql, (
+            self.cursor.setinputsizes(self._input_sizes['_sim'])
+            self.cursor.execute(_SQL_INSERT_SIM, (
                 biooil_id,
                 'V8.8',
                 convergence_status,
@@ -114,222 +425,208 @@ class DatabaseOperations:
                 0  # ValidationFlag (will be updated later if validated)
             ))
 
-            self.conn.commit()
-
-            # Get the inserted simulation ID
-            self.cursor.execute("SELECT @@IDENTITY")
+            # Inserted simulation ID, returned by the INSERT itself
+            # (not committed here: see commit_simulation())
             simulation_id = self.cursor.fetchone()[0]
+            self._uncommitted_ids.append(biooil_id)
 
             return int(simulation_id)
 
-        except Exception as e:
-            print(f"    [ERROR] Failed to insert simulation: {e}")
-            self.conn.rollback()
-            return None
+        finally:
+            self.cursor.setinputsizes(None)
 
     def insert_reforming_conditions(self, simulation_id, temp_c, pres_bar, sc_ratio,
                                     biooil_flow=100.0, steam_flow=200.0,
                                     hts_temp=370.0, lts_temp=210.0, psa_pres=25.0):
-        """Insert reforming conditions into ReformingConditions table."""
-        try:
-            sql = """
-                INSERT INTO ReformingConditions (
-                    Simulation_Id,
-                    ReformerTemperature_C, ReformerPressure_bar, SteamToCarbonRatio,
-                    BiooilFeedRate_kgh, SteamFeedRate_kgh,
-                    ResidenceTime_min, CatalystWeight_kg, GHSV_h1,
-                    HTS_Temperature_C, LTS_Temperature_C, PSA_Pressure_bar
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-
-            self.cursor.execute(sql, (
-                simulation_id,
-                temp_c, pres_bar, sc_ratio,
-                biooil_flow, steam_flow,
-                2.5,   # Residence time (typical value)
-                50.0,  # Catalyst weight (typical value)
-                5000.0,  # GHSV (typical value)
-                hts_temp, lts_temp, psa_pres
-            ))
-
-            self.conn.commit()
-            return True
-
-        except Exception as e:
-            print(f"    [ERROR] Failed to insert reforming conditions: {e}")
-            self.conn.rollback()
-            return False
+        """Queue reforming conditions for ReformingConditions table."""
+        return self._queue_row('ReformingConditions', (
+            simulation_id,
+            temp_c, pres_bar, sc_ratio,
+            biooil_flow, steam_flow,
+            hts_temp, lts_temp, psa_pres
+        ))
 
     def insert_hydrogen_product(self, simulation_id, h2_data):
         """
-        Insert hydrogen product properties into HydrogenProduct table.
+        Queue hydrogen product properties for HydrogenProduct table.
 
         Args:
             simulation_id: ID from AspenSimulation table
-            h2_data: Dictionary from aspen_interface.extract_h2_properties()
+            h2_data: H2 data from aspen_interface.extract_h2_properties()
+                     (dictionary or RESULT_DTYPE record)
         """
-        try:
-            sql = """
-                INSERT INTO HydrogenProduct (
-                    Simulation_Id,
-                    H2_Yield_kg, H2_Purity_percent,
-                    H2_FlowRate_kgh, H2_FlowRate_Nm3h,
-                    H2_CO_Ratio, H2_CO2_Ratio,
-                    CO2_Production_kg, CO2_Purity_percent,
-                    CH4_Slip_percent, CO_Slip_ppm,
-                    Carbon_Conversion_percent, H2_Recovery_PSA_percent,
-                    Energy_Efficiency_percent, Specific_Energy_MJperkg_H2,
-                    TailGas_FlowRate_kgh, TailGas_HHV_MJperkg
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-
-            self.cursor.execute(sql, (
-                simulation_id,
-                h2_data.get('H2_Yield_kg'),
-                h2_data.get('H2_Purity_percent'),
-                h2_data.get('H2_FlowRate_kgh'),
-                h2_data.get('H2_FlowRate_Nm3h'),
-                h2_data.get('H2_CO_Ratio'),
-                h2_data.get('H2_CO2_Ratio'),
-                None,  # CO2 production (calculate if needed)
-                None,  # CO2 purity (extract if needed)
-                h2_data.get('CH4_Slip_percent'),
-                h2_data.get('CO_Slip_ppm'),
-                90.0,  # Carbon conversion (placeholder)
-                88.0,  # H2 recovery PSA (typical value)
-                None,  # Energy efficiency (calculate if needed)
-                None,  # Specific energy (calculate if needed)
-                None,  # Tail gas flow (extract if needed)
-                None   # Tail gas HHV (extract if needed)
-            ))
-
-            self.conn.commit()
-            return True
-
-        except Exception as e:
-            print(f"    [ERROR] Failed to insert H2 product: {e}")
-            self.conn.rollback()
-            return False
+        h2 = _get_h2(h2_data)
+        return self._queue_row('HydrogenProduct', (
+            simulation_id,
+            *h2[:6],  # Yield, purity, flow rates, H2/CO and H2/CO2 ratios
+            None,  # CO2 production (calculate if needed)
+            None,  # CO2 purity (extract if needed)
+            *h2[6:],  # CH4 slip, CO slip
+            90.0,  # Carbon conversion (placeholder)
+            88.0,  # H2 recovery PSA (typical value)
+            None,  # Energy efficiency (calculate if needed)
+            None,  # Specific energy (calculate if needed)
+            None,  # Tail gas flow (extract if needed)
+            None   # Tail gas HHV (extract if needed)
+        ))
 
     def insert_syngas_composition(self, simulation_id, location, syngas_data):
         """
-        Insert syngas composition into SyngasComposition table.
+        Queue syngas composition for SyngasComposition table.
 
         Args:
             simulation_id: ID from AspenSimulation table
             location: Stream location name (e.g., 'Reformer_Out')
-            syngas_data: Dictionary from aspen_interface.extract_syngas_composition()
+            syngas_data: Data from aspen_interface.extract_syngas_composition()
+                         (dictionary or RESULT_DTYPE record)
         """
-        try:
-            sql = """
-                INSERT INTO SyngasComposition (
-                    Simulation_Id, StreamLocation,
-                    H2_molpercent, CO_molpercent, CO2_molpercent,
-                    CH4_molpercent, H2O_molpercent, N2_molpercent,
-                    Temperature_C, Pressure_bar,
-                    MassFlowRate_kgh, MolarFlowRate_kmolh
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-
-            self.cursor.execute(sql, (
-                simulation_id,
-                location,
-                syngas_data.get('H2_molpercent'),
-                syngas_data.get('CO_molpercent'),
-                syngas_data.get('CO2_molpercent'),
-                syngas_data.get('CH4_molpercent'),
-                syngas_data.get('H2O_molpercent'),
-                syngas_data.get('N2_molpercent'),
-                syngas_data.get('Temperature_C'),
-                syngas_data.get('Pressure_bar'),
-                syngas_data.get('MassFlowRate_kgh'),
-                syngas_data.get('MolarFlowRate_kmolh')
-            ))
-
-            self.conn.commit()
-            return True
-
-        except Exception as e:
-            print(f"    [ERROR] Failed to insert syngas composition: {e}")
-            self.conn.rollback()
-            return False
+        return self._queue_row('SyngasComposition', (
+            simulation_id,
+            location,
+            *_get_syngas(syngas_data)
+        ))
 
     def insert_energy_balance(self, simulation_id, energy_data):
         """
-        Insert energy balance into EnergyBalance table.
+        Queue energy balance for EnergyBalance table.
 
         Args:
             simulation_id: ID from AspenSimulation table
-            energy_data: Dictionary from aspen_interface.extract_energy_data()
+            energy_data: Data from aspen_interface.extract_energy_data()
+                         (dictionary or RESULT_DTYPE record)
         """
-        try:
-            sql = """
-                INSERT INTO EnergyBalance (
-                    Simulation_Id,
-                    BiooilEnergy_HHV_MJ, PreheaterHeat_MJ, ReformerHeat_MJ,
-                    TotalEnergyInput_MJ,
-                    H2Product_HHV_MJ, TailGasEnergy_MJ,
-                    HeatRecovered_MJ, HeatLoss_MJ,
-                    Thermal_Efficiency_percent, Carbon_Efficiency_percent
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
+        return self._queue_row('EnergyBalance', (
+            simulation_id,
+            None,  # Bio-oil HHV (calculate if needed)
+            *_get_energy(energy_data),  # Preheater, reformer, total
+            None,  # H2 product HHV (calculate if needed)
+            None,  # Tail gas energy (calculate if needed)
+            None,  # Heat recovered (calculate if needed)
+            None,  # Heat loss (calculate if needed)
+            None,  # Thermal efficiency (calculate if needed)
+            None   # Carbon efficiency (calculate if needed)
+        ))
+
+    @_with_retry()
+    def insert_simulation_bundle(self, biooil_id, record, syngas_locations, has_energy,
+                                 temp_c, pres_bar, sc_ratio, biooil_flow, steam_flow,
+                                 mass_error=None, energy_error=None, notes=None,
+                                 hts_temp=370.0, lts_temp=210.0, psa_pres=25.0):
+        """
+        Insert a converged simulation and all its result rows with one
+        stored procedure call (usp_InsertSimulationBundle).
 
-            self.cursor.execute(sql, (
-                simulation_id,
-                None,  # Bio-oil HHV (calculate if needed)
-                energy_data.get('PreheaterHeat_MJ'),
-                energy_data.get('ReformerHeat_MJ'),
-                energy_data.get('TotalEnergyInput_MJ'),
-                None,  # H2 product HHV (calculate if needed)
-                None,  # Tail gas energy (calculate if needed)
-                None,  # Heat recovered (calculate if needed)
-                None,  # Heat loss (calculate if needed)
-                None,  # Thermal efficiency (calculate if needed)
-                None   # Carbon efficiency (calculate if needed)
-            ))
+        Args:
+            biooil_id: BiooilId of the simulated bio-oil
+            record: RESULT_DTYPE record from AspenInterface.extract_into()
+            syngas_locations: Syngas locations extracted into the record
+            has_energy: True if the record's energy data was extracted
+            temp_c, pres_bar, sc_ratio, biooil_flow, steam_flow: Reforming conditions
 
-            self.conn.commit()
-            return True
+        Returns:
+            simulation_id (int) if successful, None if failed
+            (not committed here: see commit_simulation())
+        """
+        params = self._bundle_params(
+            biooil_id, record, syngas_locations, has_energy,
+            temp_c, pres_bar, sc_ratio, biooil_flow, steam_flow,
+            mass_error, energy_error, notes, hts_temp, lts_temp, psa_pres
+        )
 
-        except Exception as e:
-            print(f"    [ERROR] Failed to insert energy balance: {e}")
-            self.conn.rollback()
-            return False
+        cursor = self.cursor
+        cursor.execute(_SQL_CALL_BUNDLE, params)
+        simulation_id = cursor.fetchone()[0]
+        self._uncommitted_ids.append(biooil_id)
+        return int(simulation_id)
 
-    def mark_simulation_failed(self, biooil_id, error_message):
-        """Mark a simulation as failed in database."""
-        try:
-            sql = """
-                INSERT INTO AspenSimulation (
-                    Biooil_Id, SimulationDate, AspenVersion,
-                    ConvergenceStatus, Warnings, Notes, ValidationFlag
-                ) VALUES (?, GETDATE(), ?, ?, ?, ?, ?)
-            """
+    def queue_simulation_bundle(self, biooil_id, record, syngas_locations, has_energy,
+                                temp_c, pres_bar, sc_ratio, biooil_flow, steam_flow,
+                                mass_error=None, energy_error=None, notes=None,
+                                hts_temp=370.0, lts_temp=210.0, psa_pres=25.0):
+        """
+        Queue a converged simulation for the batched TVP insert
+        (usp_InsertBundleFromTVP, sent every DB_FLUSH_ROWS simulations).
 
-            self.cursor.execute(sql, (
-                biooil_id,
-                'V8.8',
-                'Failed',
-                error_message[:500] if error_message else None,
-                'Automation: Failed to converge',
-                0
-            ))
+        Same arguments as insert_simulation_bundle(). Needs a TVP-capable
+        driver (config.DB_USE_TVP).
 
-            self.conn.commit()
-            return True
+        Returns:
+            True if successful, False if a triggered flush failed
+            (bundle kept for the next flush)
+        """
+        params = self._bundle_params(
+            biooil_id, record, syngas_locations, has_energy,
+            temp_c, pres_bar, sc_ratio, biooil_flow, steam_flow,
+            mass_error, energy_error, notes, hts_temp, lts_temp, psa_pres
+        )
+        # RowNo first; marked completed once the flush commits
+        self._bundles.append((len(self._bundles) + 1, *params))
+
+        if len(self._bundles) >= config.DB_FLUSH_ROWS:
+            return self.flush()
+        return True
+
+    @staticmethod
+    def _bundle_params(biooil_id, record, syngas_locations, has_energy,
+                       temp_c, pres_bar, sc_ratio, biooil_flow, steam_flow,
+                       mass_error, energy_error, notes, hts_temp, lts_temp, psa_pres):
+        """Build a bundle's parameters (usp_InsertSimulationBundle order)."""
+        params = [
+            biooil_id, mass_error, energy_error, notes,
+            temp_c, pres_bar, sc_ratio, biooil_flow, steam_flow,
+            hts_temp, lts_temp, psa_pres,
+            *_get_h2(record['h2']),
+            1 if has_energy else 0,
+            *_get_energy(record['energy']),
+        ]
+
+        # 4 fixed syngas slots (NULL location = stream not extracted)
+        syngas = record['syngas']
+        append, extend = params.append, params.extend
+        for location in config.SYNGAS_STREAMS:
+            if location in syngas_locations:
+                append(location)
+                extend(_get_syngas(syngas[location]))
+            else:
+                extend((None,) * _SYNGAS_SLOT)
 
-        except Exception as e:
-            print(f"    [ERROR] Failed to mark simulation as failed: {e}")
-            self.conn.rollback()
-            return False
+        # NaN (missing value in a RESULT_DTYPE record) -> NULL
+        return [None if value != value else value for value in params]
+
+    def mark_simulation_failed(self, biooil_id, error_message):
+        """
+        Queue a failed-simulation marker for AspenSimulation table.
+
+        Failed runs have no child rows, so markers are never inserted one by
+        one: they are bulk inserted with the other buffered rows (every
+        DB_FLUSH_ROWS rows, and on flush() / close()). The bio-oil is added
+        to the completed cache once that insert commits.
+        """
+        return self._queue_row('AspenSimulation', (
+            biooil_id,
+            datetime.now(),
+            'V8.8',
+            'Failed',
+            error_message[:500] if error_message else None,
+            'Automation: Failed to converge',
+            0
+        ))
 
     def get_completed_simulations(self):
         """
-        Get list of BiooilIds that already have completed simulations.
+        Get the BiooilIds that already have completed simulations.
+
+        The database is queried on the first call only; later calls return
+        the cached set, updated by this instance's inserts.
 
         Returns:
-            Set of BiooilIds
+            frozenset of BiooilIds
         """
+        if self._completed_cache is not None:
+            return frozenset(self._completed_cache)
+
+        self.flush()  # Include buffered failure markers
+
         try:
             sql = """
                 SELECT DISTINCT Biooil_Id
@@ -337,17 +634,75 @@ class DatabaseOperations:
                 WHERE ConvergenceStatus IN ('Converged', 'Failed')
             """
 
+            self.cursor.arraysize = 1024  # Fewer network round trips
             self.cursor.execute(sql)
-            completed = {row[0] for row in self.cursor.fetchall()}
+            # Rows streamed from the cursor (no intermediate list)
+            self._completed_cache = {row[0] for row in self.cursor}
+            return frozenset(self._completed_cache)
 
-            return completed
+        except Exception as e:
+            log.error("    [ERROR] Failed to get completed simulations: %s", e)
+            return frozenset()
+
+    def get_pending_biooil_ids(self, candidate_ids):
+        """
+        Get the candidate BiooilIds that have no completed simulation yet
+        (filtered in SQL Server through a temp table, NOT EXISTS).
+
+        Args:
+            candidate_ids: BiooilIds to check
+
+        Returns:
+            frozenset of pending BiooilIds, or None if failed
+        """
+        self.flush()  # Include buffered failure markers / bundles
+
+        try:
+            cursor = self.cursor
+            cursor.execute("CREATE TABLE #cand (id INT PRIMARY KEY)")
+            cursor.executemany(
+                "INSERT INTO #cand (id) VALUES (?)",
+                [(int(i),) for i in set(candidate_ids)]
+            )
+            cursor.arraysize = 1024  # Fewer network round trips
+            cursor.execute("""
+                SELECT c.id
+                FROM #cand c
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM AspenSimulation s
+                    WHERE s.Biooil_Id = c.id
+                      AND s.ConvergenceStatus IN ('Converged', 'Failed')
+                )
+            """)
+            pending = frozenset(row[0] for row in cursor)
+            cursor.execute("DROP TABLE #cand")
+            self.conn.commit()
+            return pending
 
         except Exception as e:
-            print(f"    [ERROR] Failed to get completed simulations: {e}")
-            return set()
+            log.error("    [ERROR] Failed to get pending BiooilIds: %s", e)
+            self.conn.rollback()
+            return None
+
+    def _mark_completed(self, biooil_id):
+        """Add a BiooilId to the completed cache (if it has been loaded)."""
+        if self._completed_cache is not None:
+            self._completed_cache.add(biooil_id)
+
+    def _mark_committed(self):
+        """Cache the open transaction's BiooilIds as completed (after a commit)."""
+        for biooil_id in self._uncommitted_ids:
+            self._mark_completed(biooil_id)
+        self._uncommitted_ids.clear()
+
+    def invalidate_cache(self):
+        """Forget the completed cache (next call re-queries the database)."""
+        self._completed_cache = None
 
     def get_simulation_statistics(self):
         """Get statistics on simulation results."""
+        self.flush()  # Include buffered rows
+
         try:
             sql = """
                 SELECT
@@ -359,33 +714,38 @@ class DatabaseOperations:
                 GROUP BY ConvergenceStatus
             """
 
+            self.cursor.arraysize = 256  # Fewer network round trips
             self.cursor.execute(sql)
-            stats = {}
 
-            for row in self.cursor.fetchall():
-                stats[row[0]] = {
+            # Rows streamed from the cursor (no intermediate list)
+            return {
+                row[0]: {
                     'count': row[1],
                     'avg_mass_error': row[2],
                     'avg_energy_error': row[3]
                 }
-
-            return stats
+                for row in self.cursor
+            }
 
         except Exception as e:
-            print(f"    [ERROR] Failed to get statistics: {e}")
+            log.error("    [ERROR] Failed to get statistics: %s", e)
             return {}
 
     def close(self):
-        """Close database connection."""
+        """Flush buffered results and return the connection to the pool."""
         if self.conn:
-            try:
-                self.conn.close()
-                print("\n[DATABASE] Connection closed")
-            except:
-                pass
+            self.flush()
+            self.cursor.close()
+            db.release(self.conn)
+            log.info("\n[DATABASE] Connection closed")
         self.conn = None
         self.cursor = None
 
+    @staticmethod
+    def shutdown():
+        """Close all pooled connections (also done automatically at exit)."""
+        db.shutdown()
+
 
 # ==============================================================================
 # TEST FUNCTIONS
@@ -480,6 +840,8 @@ def test_database_insert():
 
 
 if __name__ == "__main__":
+    config.setup_logging()
+
     # Run tests
     print("\nTest 1: Database Connection")
     test_database_connection()
@@ -0,0 +1,106 @@
+"""
+==============================================================================
+ASPEN AUTOMATION - DATABASE CONNECTION POOL
+==============================================================================
+Purpose: Reuse SQL Server connections within a process
+Author: Orhun Uzdiyem
+Date: 2025-11-16
+
+Connections are opened on first use and handed back to a free list
+(keyed by connection string) instead of being closed, so the SQL Server
+logon cost is paid once per process instead of once per DatabaseOperations
+instance. ODBC driver-manager pooling is left on as well, so connections
+the pool does close are reused by the driver manager. All pooled
+connections are closed at exit. Worker processes each get their own pool.
+==============================================================================
+"""
+
+import atexit
+import time
+
+import config
+
+
+# Connection string -> free (idle) connections
+_pool = {}
+
+
+def conn():
+    """Get a connection from the pool (opened if none is free)."""
+    cs = config.get_db_connection_string()
+    free = _pool.setdefault(cs, [])
+    if free:
+        return free.pop()
+
+    import pyodbc  # imported on first connection only
+    pyodbc.pooling = True  # Must be set before the first connect
+
+    for attempt in range(config.DB_CONNECT_RETRIES + 1):
+        try:
+            connection = pyodbc.connect(cs, autocommit=False)
+            break
+        except pyodbc.OperationalError:
+            if attempt == config.DB_CONNECT_RETRIES:
+                raise
+            time.sleep(config.DB_CONNECT_RETRY_DELAY)
+
+    # Explicit transaction mode: commits happen only where the code commits
+    connection.autocommit = False
+    connection.timeout = config.DB_QUERY_TIMEOUT
+    # Fixed text codecs (no per-bind detection); NVARCHAR is UTF-16 on SQL Server
+    connection.setdecoding(pyodbc.SQL_WCHAR, encoding='utf-16le')
+    connection.setencoding(encoding='utf-16le')
+    return connection
+
+
+def input_sizes(columns):
+    """
+    Build cursor.setinputsizes() types for an INSERT's columns.
+
+    Args:
+        columns: Column names, in parameter order
+
+    Returns:
+        List of (sql_type, size, decimal_digits) tuples
+    """
+    import pyodbc
+
+    sizes = []
+    for column in columns:
+        if column in config.DB_INT_COLUMNS:
+            sizes.append((pyodbc.SQL_INTEGER, 0, 0))
+        elif column in config.DB_DATETIME_COLUMNS:
+            sizes.append((pyodbc.SQL_TYPE_TIMESTAMP, 23, 3))
+        elif column in config.DB_TEXT_COLUMNS:
+            sizes.append((pyodbc.SQL_WVARCHAR, config.DB_TEXT_COLUMNS[column], 0))
+        else:
+            sizes.append((pyodbc.SQL_DOUBLE, 0, 0))
+    return sizes
+
+
+def release(connection):
+    """Return a connection to the pool (uncommitted work is rolled back)."""
+    try:
+        connection.rollback()
+    except Exception:
+        # Broken connection: drop it instead of pooling it
+        try:
+            connection.close()
+        except Exception:
+            pass
+        return
+    _pool.setdefault(config.get_db_connection_string(), []).append(connection)
+
+
+def shutdown():
+    """Close all pooled connections."""
+    for free in _pool.values():
+        while free:
+            try:
+                free.pop().close()
+            except Exception:
+                pass
+    _pool.clear()
+
+
+atexit.register(shutdown)
@@ -15,18 +15,27 @@ Features:
 ==============================================================================
 """
 
+import numpy as np
 import pandas as pd
 import time
 import json
 import os
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 import sys
 
 import config
-from aspen_interface import AspenInterface
+from aspen_interface import AspenInterface, _init_worker, run_one
 from database_operations import DatabaseOperations
 
 
+# Bio-oil composition columns (% in the matrix, Aspen RYIELD components)
+_COMP_COLUMNS = tuple(config.PATHS_BIOOIL_COMP)
+
+
 class AutomationRunner:
     """Main automation runner with batch mode support."""
 
@@ -34,176 +43,274 @@ class AutomationRunner:
         """Initialize automation runner."""
         self.aspen = AspenInterface()
         self.db = DatabaseOperations()
+        self.executor = None  # Process pool when config.WORKERS > 1
+        self.results = None   # config.RESULT_DTYPE array, one row per scenario
+        # Per-simulation output lines, written in bursts (see flush_output)
+        self._out = deque()
+        self._out_time = time.monotonic()
+        self.last_simulation_id = None  # Last stored SimulationId (checkpoint)
+        self._completed_new = set()  # Converged BiooilIds not yet in COMPLETED_CACHE_PATH
+        self._completed_saved = set()  # BiooilIds already in COMPLETED_CACHE_PATH
+        # Single background thread storing results while Aspen runs the next scenario
+        self.store_pool = None
         self.start_time = None
+        self._start_monotonic = None  # Rate/ETA clock (not affected by clock changes)
+        self._pct_per_sim = 0.0       # 100 / total simulations (set on load)
+        self._abort = threading.Event()  # Set by Ctrl+C during an auto-continue wait
         self.stats = {
             'total': 0,
             'completed': 0,
             'converged': 0,
             'failed': 0,
+            'error': 0,
             'skipped': 0,
+            'rejected': 0,
             'current_batch': 0
         }
 
     def load_simulation_matrix(self):
-        """Load simulation scenarios from CSV."""
+        """
+        Open simulation scenarios CSV for streaming.
+
+        Returns:
+            Reader yielding one DataFrame of up to BATCH_SIZE rows at a time,
+            or None if failed
+        """
         print("\n[LOADER] Loading simulation matrix...")
         print(f"  File: {config.INPUT_DATA_PATH}")
 
         try:
-            df = pd.read_csv(config.INPUT_DATA_PATH)
-            print(f"  [OK] Loaded {len(df)} simulations")
-            self.stats['total'] = len(df)
-            return df
+            # Row count without parsing (header line excluded)
+            with open(config.INPUT_DATA_PATH, 'rb') as f:
+                total = sum(1 for _ in f) - 1
+            reader = pd.read_csv(
+                config.INPUT_DATA_PATH,
+                chunksize=config.BATCH_SIZE,
+                dtype=config.INPUT_DTYPES,
+            )
+            print(f"  [OK] Found {total} simulations")
+            self.stats['total'] = total
+            self._pct_per_sim = 100.0 / total if total > 0 else 0.0
+            return reader
         except Exception as e:
             print(f"  [ERROR] Failed to load: {e}")
             return None
 
-    def get_completed_simulations(self):
-        """Get set of already completed simulation IDs."""
+    def get_pending_biooil_ids(self):
+        """
+        Get the matrix BiooilIds that are not completed yet. Ids in the local
+        completed cache are skipped without asking SQL Server; the rest are
+        checked in SQL.
+
+        Returns:
+            frozenset of pending BiooilIds, or None if the check failed
+        """
         print("\n[RESUME] Checking for completed simulations...")
 
         try:
-            completed = self.db.get_completed_simulations()
-            print(f"  Found {len(completed)} completed BiooilIds")
-            return completed
+            # Only the id column is read here; scenarios are streamed later
+            candidates = pd.read_csv(
+                config.INPUT_DATA_PATH, usecols=['BiooilId'],
+                dtype={'BiooilId': config.INPUT_DTYPES['BiooilId']}
+            )['BiooilId'].unique()
+            cached = self.load_completed_cache()
+            self._completed_saved = cached
+            if cached:
+                print(f"  {len(cached)} BiooilIds in local cache")
+            pending = self.db.get_pending_biooil_ids(
+                [i for i in candidates.tolist() if i not in cached]
+            )
+            if pending is not None:
+                self.stats['skipped'] = len(candidates) - len(pending)
+                print(f"  Found {self.stats['skipped']} completed BiooilIds")
+            return pending
         except Exception as e:
             print(f"  [ERROR] Failed to check: {e}")
-            return set()
+            return None
+
+    @staticmethod
+    def normalize_compositions(df):
+        """
+        Convert a chunk's bio-oil composition columns from % to mass
+        fractions normalized to sum = 1.0, for all rows at once (in place).
+        """
+        cols = list(_COMP_COLUMNS)
+        comp = df[cols].to_numpy(dtype=np.float64) / 100.0  # Convert % to fraction
+
+        # Normalize to sum = 1.0 (rows summing to 0 are left as is)
+        totals = comp.sum(axis=1, keepdims=True)
+        np.divide(comp, totals, out=comp, where=totals > 0)
+
+        df[cols] = comp
+        return df
+
+    @staticmethod
+    def valid_rows(df):
+        """
+        Screen a chunk for scenarios Aspen cannot solve (all rows at once).
+
+        Args:
+            df: Chunk with compositions normalized (see normalize_compositions())
+
+        Returns:
+            Boolean array, True for rows to simulate (NaN inputs are invalid)
+        """
+        comp_sum = df[list(_COMP_COLUMNS)].to_numpy(dtype=np.float64).sum(axis=1)
+        temp = df['ReformerTemperature_C'].to_numpy()
+        pres = df['ReformerPressure_bar'].to_numpy()
+        sc = df['SteamToCarbonRatio'].to_numpy()
+        flow = df['BiooilFeedRate_kgh'].to_numpy()
+        return ((comp_sum > config.MIN_COMPOSITION_SUM)
+                & (temp >= config.REFORMER_TEMP_MIN) & (temp <= config.REFORMER_TEMP_MAX)
+                & (pres >= config.REFORMER_PRES_MIN) & (pres <= config.REFORMER_PRES_MAX)
+                & (sc >= config.SC_RATIO_MIN) & (sc <= config.SC_RATIO_MAX)
+                & (flow > 0))
+
+    def reject_invalid_rows(self, df):
+        """
+        Skip a chunk's invalid scenarios instead of running them in Aspen.
+
+        Nothing is written to the database: failure markers are per
+        BiooilId, and resume would then skip the bio-oil's valid scenarios.
+
+        Returns:
+            DataFrame with the valid rows only
+        """
+        valid = self.valid_rows(df)
+        if valid.all():
+            return df
+
+        rejected = df.loc[~valid, 'SimulationId'].tolist()
+        self.stats['rejected'] += len(rejected)
+        print(f"\n  [SKIP] {len(rejected)} scenarios rejected before Aspen (invalid inputs)")
+        print(f"         SimulationIds: {', '.join(str(i) for i in rejected[:20])}"
+              f"{' ...' if len(rejected) > 20 else ''}")
+        return df[valid]
 
     def prepare_bio_oil_composition(self, row):
-        """Extract bio-oil composition from simulation row."""
-        comp = {
-            'aromatics': row['aromatics'] / 100.0,  # Convert % to fraction
-            'acids': row['acids'] / 100.0,
-            'alcohols': row['alcohols'] / 100.0,
-            'furans': row['furans'] / 100.0,
-            'phenols': row['phenols'] / 100.0,
-            'aldehyde_ketone': row['aldehyde_ketone'] / 100.0
+        """Extract bio-oil composition from a row (see normalize_compositions())."""
+        return {comp: getattr(row, comp) for comp in _COMP_COLUMNS}
+
+    def build_scenario(self, row):
+        """Build the Aspen scenario dictionary for a simulation row."""
+        return {
+            'composition': self.prepare_bio_oil_composition(row),
+            'temp_c': row.ReformerTemperature_C,
+            'pres_bar': row.ReformerPressure_bar,
+            'sc_ratio': row.SteamToCarbonRatio,
+            'biooil_flow_kgh': row.BiooilFeedRate_kgh,
         }
 
-        # Normalize to sum = 1.0
-        total = sum(comp.values())
-        if total > 0:
-            comp = {k: v/total for k, v in comp.items()}
+    def run_single_simulation(self, row):
+        """
+        Run a single simulation in this process and store its results.
 
-        return comp
+        Args:
+            row: Simulation matrix row (namedtuple from DataFrame.itertuples)
+                 (compositions normalized, see normalize_compositions())
 
-    def run_single_simulation(self, row):
+        Returns:
+            'converged', 'failed', or 'error'
         """
-        Run a single simulation.
+        record = np.full(1, np.nan, dtype=config.RESULT_DTYPE)[0]
+        result = self.aspen.run_scenario(self.build_scenario(row), record)
+        return self.store_result(row, result)
+
+    def store_result(self, row, result):
+        """
+        Store a scenario result (from AspenInterface.run_scenario) in the database.
 
         Args:
-            row: Row from simulation matrix DataFrame
+            row: Simulation matrix row (namedtuple from DataFrame.itertuples)
+            result: Result dictionary for this row
 
         Returns:
             'converged', 'failed', or 'error'
         """
-        sim_id = row['SimulationId']
-        biooil_id = row['BiooilId']
+        sim_id = row.SimulationId
+        biooil_id = row.BiooilId
 
         if config.VERBOSE_MODE:
-            print(f"\n  [{sim_id}] BiooilId={biooil_id}, "
-                  f"T={row['ReformerTemperature_C']:.0f}°C, "
-                  f"P={row['ReformerPressure_bar']:.1f}bar, "
-                  f"S/C={row['SteamToCarbonRatio']:.1f}")
+            self.emit(f"\n  [{sim_id}] BiooilId={biooil_id}, "
+                      f"T={row.ReformerTemperature_C:.0f}°C, "
+                      f"P={row.ReformerPressure_bar:.1f}bar, "
+                      f"S/C={row.SteamToCarbonRatio:.1f}")
 
         try:
-            # 1. Set bio-oil composition
-            comp = self.prepare_bio_oil_composition(row)
-            if not self.aspen.set_biooil_composition(comp):
-                return 'error'
-
-            # 2. Set process conditions
-            if not self.aspen.set_process_conditions(
-                temp_c=row['ReformerTemperature_C'],
-                pres_bar=row['ReformerPressure_bar'],
-                sc_ratio=row['SteamToCarbonRatio'],
-                biooil_flow_kgh=row['BiooilFeedRate_kgh']
-            ):
-                return 'error'
-
-            # 3. Run simulation
-            converged = self.aspen.run_simulation()
-
-            if not converged:
+            if result['status'] != 'converged':
                 # Mark as failed in database
-                self.db.mark_simulation_failed(
-                    biooil_id=biooil_id,
-                    error_message='Did not converge'
-                )
-                if config.VERBOSE_MODE:
-                    print(f"      Status: FAILED (no convergence)")
-                return 'failed'
-
-            # 4. Extract results
-            h2_data = self.aspen.extract_h2_properties()
-            if not h2_data:
-                self.db.mark_simulation_failed(
-                    biooil_id=biooil_id,
-                    error_message='Failed to extract H2 data'
-                )
-                return 'error'
+                if result['error_message']:
+                    self.db.mark_simulation_failed(
+                        biooil_id=biooil_id,
+                        error_message=result['error_message']
+                    )
+                if config.VERBOSE_MODE and result['status'] == 'failed':
+                    self.emit("      Status: FAILED (no convergence)")
+                elif result['error_message'] and result['status'] == 'error':
+                    self.emit(f"      [ERROR] {result['error_message'][:100]}")
+                return result['status']
+
+            record = result['record']
+            h2_data = record['h2']
 
             # 5. Store in database
-            # Insert simulation record
-            db_sim_id = self.db.insert_simulation(
+            bundle = dict(
                 biooil_id=biooil_id,
-                convergence_status='Converged',
+                record=record,
+                syngas_locations=result['syngas_locations'],
+                has_energy=result['has_energy'],
+                temp_c=row.ReformerTemperature_C,
+                pres_bar=row.ReformerPressure_bar,
+                sc_ratio=row.SteamToCarbonRatio,
+                biooil_flow=row.BiooilFeedRate_kgh,
+                steam_flow=row.SteamFeedRate_kgh,
                 mass_error=0.05,  # Placeholder
                 energy_error=0.8,  # Placeholder
                 notes=f'Automation: SimId {sim_id}'
             )
 
-            if not db_sim_id:
-                return 'error'
-
-            # Insert reforming conditions
-            self.db.insert_reforming_conditions(
-                simulation_id=db_sim_id,
-                temp_c=row['ReformerTemperature_C'],
-                pres_bar=row['ReformerPressure_bar'],
-                sc_ratio=row['SteamToCarbonRatio'],
-                biooil_flow=row['BiooilFeedRate_kgh'],
-                steam_flow=row['SteamFeedRate_kgh']
-            )
-
-            # Insert H2 product data
-            self.db.insert_hydrogen_product(db_sim_id, h2_data)
+            if config.DB_USE_TVP:
+                # Batched: whole batch inserted by one TVP call
+                if not self.db.queue_simulation_bundle(**bundle):
+                    return 'error'
+            else:
+                # One transaction per simulation
+                self.db.begin_simulation()
 
-            # Insert syngas compositions at 4 locations
-            for location, stream in config.SYNGAS_STREAMS.items():
-                syngas_data = self.aspen.extract_syngas_composition(stream)
-                if syngas_data:
-                    self.db.insert_syngas_composition(db_sim_id, location, syngas_data)
+                # Insert simulation record and its result rows (one procedure call)
+                if not self.db.insert_simulation_bundle(**bundle):
+                    self.db.rollback_simulation()
+                    return 'error'
 
-            # Insert energy balance
-            energy_data = self.aspen.extract_energy_data()
-            if energy_data:
-                self.db.insert_energy_balance(db_sim_id, energy_data)
+                if not self.db.commit_simulation():
+                    return 'error'
 
             # Success
             if config.VERBOSE_MODE:
-                print(f"      Status: CONVERGED "
-                      f"(H2: {h2_data['H2_Yield_kg']:.2f} kg, "
-                      f"Purity: {h2_data['H2_Purity_percent']:.2f}%)")
+                self.emit(f"      Status: CONVERGED "
+                          f"(H2: {h2_data['H2_Yield_kg']:.2f} kg, "
+                          f"Purity: {h2_data['H2_Purity_percent']:.2f}%)")
 
             return 'converged'
 
         except Exception as e:
-            print(f"      [ERROR] Exception: {str(e)[:100]}")
+            message = str(e)  # Converted once, truncated for display / DB
+            self.emit(f"      [ERROR] Exception: {message[:100]}")
+            self.db.rollback_simulation()
             self.db.mark_simulation_failed(
                 biooil_id=biooil_id,
-                error_message=str(e)[:500]
+                error_message=message[:500]
             )
             return 'error'
 
-    def run_batch(self, df_batch, batch_num):
+    def run_batch(self, df_batch, batch_num, start_idx=0):
         """
         Run a batch of simulations.
 
         Args:
             df_batch: DataFrame subset for this batch
             batch_num: Batch number (for display)
+            start_idx: Position of the batch's first row in self.results
 
         Returns:
             Dictionary with batch statistics
@@ -215,18 +322,43 @@ class AutomationRunner:
         batch_stats = {'converged': 0, 'failed': 0, 'error': 0, 'skipped': 0}
         batch_start = time.time()
 
-        for idx, row in df_batch.iterrows():
-            # Run simulation
-            result = self.run_single_simulation(row)
+        # Plain namedtuples (no per-row Series construction)
+        rows = list(df_batch.itertuples(index=False, name='SimRow'))
+        records = self.results[start_idx:start_idx + len(rows)]
+
+        if self.executor is not None:
+            # Parallel: workers run Aspen, this process stores the results.
+            # One scenario per task: runs take minutes, so even load balancing
+            # matters far more than the per-task IPC cost
+            results = self.executor.map(
+                run_one, [self.build_scenario(row) for row in rows], chunksize=1
+            )
+        else:
+            # Serial: results are written straight into self.results rows
+            results = (
+                self.aspen.run_scenario(self.build_scenario(row), records[i])
+                for i, row in enumerate(rows)
+            )
+
+        # Results are stored (DB writes) in the background while the next
+        # scenario runs; Aspen COM calls stay on this thread.
+        pending = None
+        for i, (row, scenario_result) in enumerate(zip(rows, results)):
+            if self.executor is not None:
+                records[i] = scenario_result['record']
 
-            # Update statistics
-            batch_stats[result] += 1
-            self.stats[result] += 1
-            self.stats['completed'] += 1
+            # Store simulation results
+            future = self.store_pool.submit(self.store_result, row, scenario_result)
 
-            # Progress update
-            if self.stats['completed'] % config.PROGRESS_UPDATE_FREQ == 0:
-                self.print_progress()
+            if pending is not None:
+                self.count_result(pending[0].result(), batch_stats, pending[1])
+            pending = (future, row)
+
+        if pending is not None:
+            self.count_result(pending[0].result(), batch_stats, pending[1])
+
+        self.flush_output(force=True)
+        self.save_progress()
 
         batch_time = time.time() - batch_start
 
@@ -240,6 +372,74 @@ class AutomationRunner:
 
         return batch_stats
 
+    def count_result(self, result, batch_stats, row):
+        """Update batch and overall statistics with a simulation result."""
+        batch_stats[result] += 1
+        self.stats[result] += 1
+        self.stats['completed'] += 1
+        self.last_simulation_id = row.SimulationId
+
+        # Committed already (TVP bundles are only committed on flush, so not cached)
+        if result == 'converged' and not config.DB_USE_TVP:
+            self._completed_new.add(int(row.BiooilId))  # One entry per bio-oil
+
+        # Progress update
+        if self.stats['completed'] % config.PROGRESS_UPDATE_FREQ == 0:
+            self.print_progress()
+        self.flush_output()
+
+        # Checkpoint (every N simulations, not every one)
+        if self.stats['completed'] % config.PROGRESS_SAVE_FREQ == 0:
+            self.save_progress()
+
+    def load_completed_cache(self):
+        """
+        Read the local completed-BiooilId cache (COMPLETED_CACHE_PATH).
+
+        Returns:
+            Set of cached BiooilIds (empty if disabled or not written yet)
+        """
+        if not config.USE_COMPLETED_CACHE:
+            return set()
+        try:
+            with open(config.COMPLETED_CACHE_PATH) as f:
+                return {int(line) for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+        except (OSError, ValueError) as e:
+            print(f"  [WARNING] Ignoring completed cache: {e}")
+            return set()
+
+    def save_completed_cache(self):
+        """Append newly converged BiooilIds to COMPLETED_CACHE_PATH (once each)."""
+        new_ids = self._completed_new - self._completed_saved
+        if not config.USE_COMPLETED_CACHE or not new_ids:
+            self._completed_new.clear()
+            return
+        try:
+            with open(config.COMPLETED_CACHE_PATH, 'a') as f:
+                f.write(''.join(f"{i}\n" for i in sorted(new_ids)))
+            self._completed_saved |= new_ids
+            self._completed_new.clear()
+        except OSError as e:
+            print(f"  [WARNING] Could not update completed cache: {e}")
+
+    def save_progress(self):
+        """Write progress checkpoint to PROGRESS_FILE (atomic replace)."""
+        self.save_completed_cache()
+        progress = {
+            'last_simulation_id': self.last_simulation_id,
+            'stats': self.stats,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+        }
+        tmp_path = config.PROGRESS_FILE + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(progress, f, indent=2, default=int)
+            os.replace(tmp_path, config.PROGRESS_FILE)
+        except OSError as e:
+            print(f"  [WARNING] Could not save progress: {e}")
+
     def pause_between_batches(self, batch_num, total_batches):
         """Pause and ask user to review before continuing."""
         print("\n" + "="*70)
@@ -256,9 +456,7 @@ class AutomationRunner:
             if config.AUTO_CONTINUE_DELAY > 0:
                 print(f"  Auto-continuing in {config.AUTO_CONTINUE_DELAY} seconds...")
                 print("  Press Ctrl+C to abort")
-                try:
-                    time.sleep(config.AUTO_CONTINUE_DELAY)
-                except KeyboardInterrupt:
+                if self.wait_or_abort(config.AUTO_CONTINUE_DELAY):
                     print("\n[ABORT] User interrupted")
                     return False
             else:
@@ -271,19 +469,65 @@ class AutomationRunner:
 
         return True
 
+    def wait_or_abort(self, delay):
+        """
+        Wait up to delay seconds, returning early on Ctrl+C.
+
+        Returns:
+            True if the user interrupted the wait
+        """
+        self._abort.clear()
+        previous = signal.signal(signal.SIGINT, lambda signum, frame: self._abort.set())
+        try:
+            deadline = time.monotonic() + delay
+            remaining = delay
+            # Short slices: a blocked wait is not interrupted by signals on Windows
+            while remaining > 0 and not self._abort.wait(min(remaining, 0.25)):
+                remaining = deadline - time.monotonic()
+        finally:
+            signal.signal(signal.SIGINT, previous)
+        return self._abort.is_set()
+
+    def emit(self, line):
+        """Queue a per-simulation output line (thread-safe, see flush_output)."""
+        self._out.append(line)
+
+    def flush_output(self, force=False):
+        """
+        Write queued output lines in one burst, every PROGRESS_FLUSH_LINES
+        lines or PROGRESS_FLUSH_SECONDS seconds (whichever comes first).
+
+        Args:
+            force: Write whatever is queued now (e.g. at batch end)
+        """
+        out = self._out
+        now = time.monotonic()
+        if not out or not (force or len(out) >= config.PROGRESS_FLUSH_LINES
+                           or now - self._out_time >= config.PROGRESS_FLUSH_SECONDS):
+            return
+
+        lines = []
+        while out:
+            lines.append(out.popleft())
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
+        self._out_time = now
+
     def print_progress(self):
-        """Print current progress."""
-        pct = (self.stats['completed'] / self.stats['total']) * 100
-        elapsed = time.time() - self.start_time
-        rate = self.stats['completed'] / elapsed if elapsed > 0 else 0
-        remaining = (self.stats['total'] - self.stats['completed']) / rate if rate > 0 else 0
-
-        print(f"\n  Progress: {self.stats['completed']}/{self.stats['total']} "
-              f"({pct:.1f}%) | "
-              f"Success: {self.stats['converged']} | "
-              f"Failed: {self.stats['failed']} | "
-              f"Rate: {rate:.2f} sim/s | "
-              f"ETA: {remaining/60:.1f} min")
+        """Queue current progress line."""
+        stats = self.stats
+        completed, total = stats['completed'], stats['total']
+        pct = completed * self._pct_per_sim
+        elapsed = time.monotonic() - self._start_monotonic
+        rate = completed / elapsed if elapsed > 0 else 0
+        remaining = (total - completed) / rate if rate > 0 else 0
+
+        self.emit(f"\n  Progress: {completed}/{total} "
+                  f"({pct:.1f}%) | "
+                  f"Success: {stats['converged']} | "
+                  f"Failed: {stats['failed']} | "
+                  f"Rate: {rate:.2f} sim/s | "
+                  f"ETA: {remaining/60:.1f} min")
 
     def print_summary(self):
         """Print overall summary."""
@@ -294,12 +538,17 @@ class AutomationRunner:
         print("="*70)
         print(f"Total Simulations:    {self.stats['total']}")
         print(f"Completed:            {self.stats['completed']}")
-        print(f"  - Converged:        {self.stats['converged']} "
-              f"({self.stats['converged']/self.stats['completed']*100:.1f}%)")
+        if self.stats['completed']:
+            print(f"  - Converged:        {self.stats['converged']} "
+                  f"({self.stats['converged']/self.stats['completed']*100:.1f}%)")
+        else:
+            print(f"  - Converged:        {self.stats['converged']}")
         print(f"  - Failed:           {self.stats['failed']}")
         print(f"  - Errors:           {self.stats['error']}")
         print(f"Skipped (existing):   {self.stats['skipped']}")
-        print(f"Remaining:            {self.stats['total'] - self.stats['completed']}")
+        print(f"Rejected (invalid):   {self.stats['rejected']}")
+        print(f"Remaining:            "
+              f"{self.stats['total'] - self.stats['completed'] - self.stats['rejected']}")
         print(f"Elapsed Time:         {elapsed/3600:.2f} hours")
         if self.stats['completed'] > 0:
             avg_time = elapsed / self.stats['completed']
@@ -322,59 +571,85 @@ class AutomationRunner:
         print("="*70)
 
         self.start_time = time.time()
+        self._start_monotonic = time.monotonic()
 
-        # 1. Connect to Aspen
-        if not self.aspen.connect():
-            print("\n[ABORT] Failed to connect to Aspen")
-            return False
+        if config.WORKERS > 1:
+            # 1-2. Start worker processes (each connects to Aspen and loads the model)
+            print(f"\n[ASPEN] Starting {config.WORKERS} worker processes...")
+            self.executor = ProcessPoolExecutor(
+                max_workers=config.WORKERS, initializer=_init_worker
+            )
+        else:
+            # 1. Connect to Aspen
+            if not self.aspen.connect():
+                print("\n[ABORT] Failed to connect to Aspen")
+                return False
 
-        # 2. Load Aspen model
-        if not self.aspen.load_model():
-            print("\n[ABORT] Failed to load Aspen model")
-            return False
+            # 2. Load Aspen model
+            if not self.aspen.load_model():
+                print("\n[ABORT] Failed to load Aspen model")
+                return False
 
         # 3. Connect to database
         if not self.db.connect():
             print("\n[ABORT] Failed to connect to database")
             return False
 
-        # 4. Load simulation matrix
-        df = self.load_simulation_matrix()
-        if df is None:
+        # 4. Load simulation matrix (streamed, one batch at a time)
+        reader = self.load_simulation_matrix()
+        if reader is None:
             print("\n[ABORT] Failed to load simulation matrix")
             return False
 
         # 5. Check for completed simulations (resume mode)
+        pending_ids = None  # None: run every scenario
         if resume:
-            completed = self.get_completed_simulations()
-            if completed:
-                # Filter out completed
-                df = df[~df['BiooilId'].isin(completed)]
-                self.stats['skipped'] = len(completed)
-                print(f"  [RESUME] Skipping {len(completed)} completed BiooilIds")
-                print(f"  Remaining: {len(df)} simulations")
-
-                if len(df) == 0:
-                    print("\n[INFO] All simulations already completed!")
-                    return True
+            pending = self.get_pending_biooil_ids()
+            if pending is not None and self.stats['skipped']:
+                print(f"  [RESUME] Skipping {self.stats['skipped']} completed BiooilIds")
+                # Sorted id array: chunks filtered by a vectorized np.isin
+                pending_ids = np.sort(np.fromiter(pending, dtype=np.int64, count=len(pending)))
 
         # 6. Run in batches
-        total_batches = (len(df) + config.BATCH_SIZE - 1) // config.BATCH_SIZE
+        total_batches = (self.stats['total'] + config.BATCH_SIZE - 1) // config.BATCH_SIZE
         print(f"\n[INFO] Will run {total_batches} batches of up to {config.BATCH_SIZE} simulations")
 
-        for batch_num in range(1, total_batches + 1):
-            # Get batch subset
-            start_idx = (batch_num - 1) * config.BATCH_SIZE
-            end_idx = min(start_idx + config.BATCH_SIZE, len(df))
-            df_batch = df.iloc[start_idx:end_idx]
-
-            # Run batch
-            self.run_batch(df_batch, batch_num)
+        # Preallocated results (NaN until extracted), one row per scenario
+        self.results = np.full(self.stats['total'], np.nan, dtype=config.RESULT_DTYPE)
+        self.store_pool = ThreadPoolExecutor(max_workers=1)
 
-            # Pause between batches
-            if not self.pause_between_batches(batch_num, total_batches):
-                print("\n[ABORT] User interrupted automation")
-                break
+        start_idx = 0
+        try:
+            for batch_num, df_batch in enumerate(reader, 1):
+                self.normalize_compositions(df_batch)
+
+                if pending_ids is not None:
+                    # Keep pending only (completed filtered out in SQL)
+                    df_batch = df_batch[np.isin(df_batch['BiooilId'].to_numpy(), pending_ids)]
+                    if len(df_batch) == 0:
+                        continue
+
+                if config.PREVALIDATE_ROWS:
+                    # Skip unsolvable scenarios without an Aspen run
+                    df_batch = self.reject_invalid_rows(df_batch)
+                    if len(df_batch) == 0:
+                        continue
+
+                # Run batch
+                self.run_batch(df_batch, batch_num, start_idx)
+                start_idx += len(df_batch)
+
+                # Pause between batches
+                if not self.pause_between_batches(batch_num, total_batches):
+                    print("\n[ABORT] User interrupted automation")
+                    break
+        finally:
+            # Finish storing and write any buffered result rows
+            self.store_pool.shutdown()
+            self.store_pool = None
+            self.flush_output(force=True)
+            self.db.flush()
+            self.save_progress()
 
         # 7. Final summary
         print("\n" + "="*70)
@@ -391,6 +666,9 @@ class AutomationRunner:
                 print(f"  {status}: {stats['count']} records")
 
         # 9. Cleanup
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
         self.aspen.close()
         self.db.close()
 
@@ -404,6 +682,8 @@ class AutomationRunner:
 
 def main():
     """Main entry point."""
+    config.setup_logging()
+
     # Print configuration
     config.print_config_summary()
 
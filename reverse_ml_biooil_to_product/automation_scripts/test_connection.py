@@ -67,6 +67,7 @@ print("-"*70)
 
 try:
     import config
+    config.setup_logging()
     print(f"  [OK] Configuration loaded")
     print(f"       Base directory: {config.BASE_DIR}")
     print(f"       Batch size: {config.BATCH_SIZE}")
@@ -103,6 +104,31 @@ print("-"*70)
 try:
     from aspen_interface import AspenInterface
 
+    # Model load path without Aspen: a stand-in document whose tree returns
+    # plain nodes, so errors in our own load code (not COM) fail here
+    class _OfflineNode:
+        Value = None
+
+    class _OfflineTree:
+        def FindNode(self, path):
+            return _OfflineNode()
+
+    class _OfflineDocument:
+        Engine = None
+        Tree = _OfflineTree()
+
+        def InitFromArchive2(self, path):
+            pass
+
+    offline = AspenInterface()
+    offline.aspen = _OfflineDocument()
+    if offline.load_model():
+        print("  [OK] Model load path works (offline check)")
+    else:
+        print("  [ERROR] Model load failed before reaching Aspen")
+        print("          See error above - this is a bug in aspen_interface.py")
+        sys.exit(1)
+
     aspen = AspenInterface()
 
     # Test connection
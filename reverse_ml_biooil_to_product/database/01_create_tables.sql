@@ -80,9 +80,13 @@ CREATE TABLE ReformingConditions (
     SteamFeedRate_kgh DECIMAL(10,2) NULL,          -- kg/h
 
     -- Reactor Specifications
-    ResidenceTime_min DECIMAL(10,2) NULL,          -- minutes in reformer
-    CatalystWeight_kg DECIMAL(10,2) NULL,          -- Ni/Al2O3 catalyst
-    GHSV_h1 DECIMAL(10,2) NULL,                    -- Gas hourly space velocity
+    -- (typical values used by the automation when left out of the INSERT)
+    ResidenceTime_min DECIMAL(10,2) NULL           -- minutes in reformer
+        CONSTRAINT DF_ReformingConditions_ResidenceTime DEFAULT 2.5,
+    CatalystWeight_kg DECIMAL(10,2) NULL           -- Ni/Al2O3 catalyst
+        CONSTRAINT DF_ReformingConditions_CatalystWeight DEFAULT 50.0,
+    GHSV_h1 DECIMAL(10,2) NULL                     -- Gas hourly space velocity
+        CONSTRAINT DF_ReformingConditions_GHSV DEFAULT 5000.0,
 
     -- Other Reactors
     HTS_Temperature_C DECIMAL(10,2) NULL,          -- High-temp shift: ~370°C
@@ -0,0 +1,440 @@
+/*
+==============================================================================
+REVERSE ML PROJECT - DATABASE EXTENSION
+Script 05: Create Stored Procedures
+==============================================================================
+Purpose: Insert converged simulations (all 5 tables) in a single call
+Database: BIOOIL
+Author: Orhun Uzdiyem
+Date: 2025-11-16
+==============================================================================
+*/
+
+USE BIOOIL;
+GO
+
+PRINT 'Starting stored procedure creation...';
+GO
+
+-- ==============================================================================
+-- COLUMN DEFAULTS: ReformingConditions reactor specifications
+-- Purpose: Typical values filled in by SQL Server instead of being sent with
+--          every row (already part of 01_create_tables.sql; added here for
+--          databases created before the defaults existed)
+-- ==============================================================================
+
+IF OBJECT_ID('dbo.DF_ReformingConditions_ResidenceTime', 'D') IS NULL
+    ALTER TABLE ReformingConditions
+        ADD CONSTRAINT DF_ReformingConditions_ResidenceTime DEFAULT 2.5 FOR ResidenceTime_min;
+IF OBJECT_ID('dbo.DF_ReformingConditions_CatalystWeight', 'D') IS NULL
+    ALTER TABLE ReformingConditions
+        ADD CONSTRAINT DF_ReformingConditions_CatalystWeight DEFAULT 50.0 FOR CatalystWeight_kg;
+IF OBJECT_ID('dbo.DF_ReformingConditions_GHSV', 'D') IS NULL
+    ALTER TABLE ReformingConditions
+        ADD CONSTRAINT DF_ReformingConditions_GHSV DEFAULT 5000.0 FOR GHSV_h1;
+GO
+
+PRINT 'ReformingConditions column defaults in place.';
+GO
+
+-- ==============================================================================
+-- PROCEDURE 1: usp_InsertSimulationBundle
+-- Purpose: Insert AspenSimulation + ReformingConditions + HydrogenProduct +
+--          SyngasComposition (up to 4 streams) + EnergyBalance for one
+--          converged simulation and return the new SimulationId.
+--          Runs in the caller's transaction (committed by automation script).
+-- ==============================================================================
+
+IF OBJECT_ID('dbo.usp_InsertSimulationBundle', 'P') IS NOT NULL
+BEGIN
+    PRINT 'Dropping existing usp_InsertSimulationBundle procedure...';
+    DROP PROCEDURE dbo.usp_InsertSimulationBundle;
+END
+GO
+
+PRINT 'Creating usp_InsertSimulationBundle procedure...';
+GO
+
+CREATE PROCEDURE dbo.usp_InsertSimulationBundle
+    -- AspenSimulation
+    @Biooil_Id INT,
+    @MassBalanceError_percent DECIMAL(10,6),
+    @EnergyBalanceError_percent DECIMAL(10,6),
+    @Notes NVARCHAR(MAX),
+
+    -- ReformingConditions
+    @ReformerTemperature_C DECIMAL(10,2),
+    @ReformerPressure_bar DECIMAL(10,2),
+    @SteamToCarbonRatio DECIMAL(10,4),
+    @BiooilFeedRate_kgh DECIMAL(10,2),
+    @SteamFeedRate_kgh DECIMAL(10,2),
+    @HTS_Temperature_C DECIMAL(10,2),
+    @LTS_Temperature_C DECIMAL(10,2),
+    @PSA_Pressure_bar DECIMAL(10,2),
+
+    -- HydrogenProduct
+    @H2_Yield_kg DECIMAL(10,4),
+    @H2_Purity_percent DECIMAL(10,4),
+    @H2_FlowRate_kgh DECIMAL(10,4),
+    @H2_FlowRate_Nm3h DECIMAL(10,4),
+    @H2_CO_Ratio DECIMAL(10,4),
+    @H2_CO2_Ratio DECIMAL(10,4),
+    @CH4_Slip_percent DECIMAL(10,4),
+    @CO_Slip_ppm DECIMAL(10,4),
+
+    -- EnergyBalance (@HasEnergy = 0: not extracted, no row inserted)
+    @HasEnergy BIT,
+    @PreheaterHeat_MJ DECIMAL(10,2),
+    @ReformerHeat_MJ DECIMAL(10,2),
+    @TotalEnergyInput_MJ DECIMAL(10,2),
+
+    -- Syngas stream 1 (StreamLocation NULL = not extracted)
+    @Syngas1_Location NVARCHAR(50),
+    @Syngas1_H2_molpercent DECIMAL(10,4),
+    @Syngas1_CO_molpercent DECIMAL(10,4),
+    @Syngas1_CO2_molpercent DECIMAL(10,4),
+    @Syngas1_CH4_molpercent DECIMAL(10,4),
+    @Syngas1_H2O_molpercent DECIMAL(10,4),
+    @Syngas1_N2_molpercent DECIMAL(10,4),
+    @Syngas1_Temperature_C DECIMAL(10,2),
+    @Syngas1_Pressure_bar DECIMAL(10,2),
+    @Syngas1_MassFlowRate_kgh DECIMAL(10,4),
+    @Syngas1_MolarFlowRate_kmolh DECIMAL(10,4),
+    -- Syngas stream 2 (StreamLocation NULL = not extracted)
+    @Syngas2_Location NVARCHAR(50),
+    @Syngas2_H2_molpercent DECIMAL(10,4),
+    @Syngas2_CO_molpercent DECIMAL(10,4),
+    @Syngas2_CO2_molpercent DECIMAL(10,4),
+    @Syngas2_CH4_molpercent DECIMAL(10,4),
+    @Syngas2_H2O_molpercent DECIMAL(10,4),
+    @Syngas2_N2_molpercent DECIMAL(10,4),
+    @Syngas2_Temperature_C DECIMAL(10,2),
+    @Syngas2_Pressure_bar DECIMAL(10,2),
+    @Syngas2_MassFlowRate_kgh DECIMAL(10,4),
+    @Syngas2_MolarFlowRate_kmolh DECIMAL(10,4),
+    -- Syngas stream 3 (StreamLocation NULL = not extracted)
+    @Syngas3_Location NVARCHAR(50),
+    @Syngas3_H2_molpercent DECIMAL(10,4),
+    @Syngas3_CO_molpercent DECIMAL(10,4),
+    @Syngas3_CO2_molpercent DECIMAL(10,4),
+    @Syngas3_CH4_molpercent DECIMAL(10,4),
+    @Syngas3_H2O_molpercent DECIMAL(10,4),
+    @Syngas3_N2_molpercent DECIMAL(10,4),
+    @Syngas3_Temperature_C DECIMAL(10,2),
+    @Syngas3_Pressure_bar DECIMAL(10,2),
+    @Syngas3_MassFlowRate_kgh DECIMAL(10,4),
+    @Syngas3_MolarFlowRate_kmolh DECIMAL(10,4),
+    -- Syngas stream 4 (StreamLocation NULL = not extracted)
+    @Syngas4_Location NVARCHAR(50),
+    @Syngas4_H2_molpercent DECIMAL(10,4),
+    @Syngas4_CO_molpercent DECIMAL(10,4),
+    @Syngas4_CO2_molpercent DECIMAL(10,4),
+    @Syngas4_CH4_molpercent DECIMAL(10,4),
+    @Syngas4_H2O_molpercent DECIMAL(10,4),
+    @Syngas4_N2_molpercent DECIMAL(10,4),
+    @Syngas4_Temperature_C DECIMAL(10,2),
+    @Syngas4_Pressure_bar DECIMAL(10,2),
+    @Syngas4_MassFlowRate_kgh DECIMAL(10,4),
+    @Syngas4_MolarFlowRate_kmolh DECIMAL(10,4)
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;  -- Any failed insert aborts the whole simulation
+
+    DECLARE @SimulationId INT;
+    DECLARE @NewSimulation TABLE (SimulationId INT);
+
+    INSERT INTO AspenSimulation (
+        Biooil_Id, SimulationDate, AspenVersion,
+        ConvergenceStatus, ConvergenceIterations,
+        MassBalanceError_percent, EnergyBalanceError_percent,
+        Warnings, Notes, ValidationFlag
+    )
+    OUTPUT INSERTED.SimulationId INTO @NewSimulation
+    VALUES (
+        @Biooil_Id, GETDATE(), 'V8.8',
+        'Converged', NULL,
+        @MassBalanceError_percent, @EnergyBalanceError_percent,
+        NULL, @Notes, 0
+    );
+
+    SELECT @SimulationId = SimulationId FROM @NewSimulation;
+
+    INSERT INTO ReformingConditions (
+        Simulation_Id,
+        ReformerTemperature_C, ReformerPressure_bar, SteamToCarbonRatio,
+        BiooilFeedRate_kgh, SteamFeedRate_kgh,
+        HTS_Temperature_C, LTS_Temperature_C, PSA_Pressure_bar
+    )
+    VALUES (
+        @SimulationId,
+        @ReformerTemperature_C, @ReformerPressure_bar, @SteamToCarbonRatio,
+        @BiooilFeedRate_kgh, @SteamFeedRate_kgh,
+        @HTS_Temperature_C, @LTS_Temperature_C, @PSA_Pressure_bar
+    );
+
+    INSERT INTO HydrogenProduct (
+        Simulation_Id,
+        H2_Yield_kg, H2_Purity_percent,
+        H2_FlowRate_kgh, H2_FlowRate_Nm3h,
+        H2_CO_Ratio, H2_CO2_Ratio,
+        CH4_Slip_percent, CO_Slip_ppm,
+        Carbon_Conversion_percent, H2_Recovery_PSA_percent
+    )
+    VALUES (
+        @SimulationId,
+        @H2_Yield_kg, @H2_Purity_percent,
+        @H2_FlowRate_kgh, @H2_FlowRate_Nm3h,
+        @H2_CO_Ratio, @H2_CO2_Ratio,
+        @CH4_Slip_percent, @CO_Slip_ppm,
+        90.0, 88.0  -- Carbon conversion (placeholder), H2 recovery PSA (typical value)
+    );
+
+    INSERT INTO SyngasComposition (
+        Simulation_Id, StreamLocation,
+        H2_molpercent, CO_molpercent, CO2_molpercent,
+        CH4_molpercent, H2O_molpercent, N2_molpercent,
+        Temperature_C, Pressure_bar,
+        MassFlowRate_kgh, MolarFlowRate_kmolh
+    )
+    SELECT @SimulationId, s.*
+    FROM (VALUES
+        (@Syngas1_Location, @Syngas1_H2_molpercent, @Syngas1_CO_molpercent, @Syngas1_CO2_molpercent, @Syngas1_CH4_molpercent, @Syngas1_H2O_molpercent, @Syngas1_N2_molpercent, @Syngas1_Temperature_C, @Syngas1_Pressure_bar, @Syngas1_MassFlowRate_kgh, @Syngas1_MolarFlowRate_kmolh),
+        (@Syngas2_Location, @Syngas2_H2_molpercent, @Syngas2_CO_molpercent, @Syngas2_CO2_molpercent, @Syngas2_CH4_molpercent, @Syngas2_H2O_molpercent, @Syngas2_N2_molpercent, @Syngas2_Temperature_C, @Syngas2_Pressure_bar, @Syngas2_MassFlowRate_kgh, @Syngas2_MolarFlowRate_kmolh),
+        (@Syngas3_Location, @Syngas3_H2_molpercent, @Syngas3_CO_molpercent, @Syngas3_CO2_molpercent, @Syngas3_CH4_molpercent, @Syngas3_H2O_molpercent, @Syngas3_N2_molpercent, @Syngas3_Temperature_C, @Syngas3_Pressure_bar, @Syngas3_MassFlowRate_kgh, @Syngas3_MolarFlowRate_kmolh),
+        (@Syngas4_Location, @Syngas4_H2_molpercent, @Syngas4_CO_molpercent, @Syngas4_CO2_molpercent, @Syngas4_CH4_molpercent, @Syngas4_H2O_molpercent, @Syngas4_N2_molpercent, @Syngas4_Temperature_C, @Syngas4_Pressure_bar, @Syngas4_MassFlowRate_kgh, @Syngas4_MolarFlowRate_kmolh)
+    ) AS s (StreamLocation, H2_molpercent, CO_molpercent, CO2_molpercent, CH4_molpercent, H2O_molpercent, N2_molpercent, Temperature_C, Pressure_bar, MassFlowRate_kgh, MolarFlowRate_kmolh)
+    WHERE s.StreamLocation IS NOT NULL;
+
+    IF @HasEnergy = 1
+        INSERT INTO EnergyBalance (
+            Simulation_Id,
+            PreheaterHeat_MJ, ReformerHeat_MJ, TotalEnergyInput_MJ
+        )
+        VALUES (
+            @SimulationId,
+            @PreheaterHeat_MJ, @ReformerHeat_MJ, @TotalEnergyInput_MJ
+        );
+
+    SELECT @SimulationId AS SimulationId;
+END
+GO
+
+PRINT 'usp_InsertSimulationBundle procedure created successfully.';
+GO
+
+
+-- ==============================================================================
+-- TYPE: SimulationBundleTVP
+-- Purpose: One row per converged simulation (same columns, same order as the
+--          usp_InsertSimulationBundle parameters, plus a batch row number).
+--          Needs a TVP-capable driver (ODBC Driver 17+ for SQL Server).
+-- ==============================================================================
+
+IF OBJECT_ID('dbo.usp_InsertBundleFromTVP', 'P') IS NOT NULL
+BEGIN
+    PRINT 'Dropping existing usp_InsertBundleFromTVP procedure...';
+    DROP PROCEDURE dbo.usp_InsertBundleFromTVP;
+END
+GO
+
+IF TYPE_ID('dbo.SimulationBundleTVP') IS NOT NULL
+BEGIN
+    PRINT 'Dropping existing SimulationBundleTVP type...';
+    DROP TYPE dbo.SimulationBundleTVP;
+END
+GO
+
+PRINT 'Creating SimulationBundleTVP type...';
+GO
+
+CREATE TYPE dbo.SimulationBundleTVP AS TABLE (
+    RowNo INT NOT NULL PRIMARY KEY,  -- Position in the batch
+
+    -- AspenSimulation
+    Biooil_Id INT NOT NULL,
+    MassBalanceError_percent DECIMAL(10,6) NULL,
+    EnergyBalanceError_percent DECIMAL(10,6) NULL,
+    Notes NVARCHAR(MAX) NULL,
+
+    -- ReformingConditions
+    ReformerTemperature_C DECIMAL(10,2) NOT NULL,
+    ReformerPressure_bar DECIMAL(10,2) NOT NULL,
+    SteamToCarbonRatio DECIMAL(10,4) NOT NULL,
+    BiooilFeedRate_kgh DECIMAL(10,2) NULL,
+    SteamFeedRate_kgh DECIMAL(10,2) NULL,
+    HTS_Temperature_C DECIMAL(10,2) NULL,
+    LTS_Temperature_C DECIMAL(10,2) NULL,
+    PSA_Pressure_bar DECIMAL(10,2) NULL,
+
+    -- HydrogenProduct
+    H2_Yield_kg DECIMAL(10,4) NULL,
+    H2_Purity_percent DECIMAL(10,4) NULL,
+    H2_FlowRate_kgh DECIMAL(10,4) NULL,
+    H2_FlowRate_Nm3h DECIMAL(10,4) NULL,
+    H2_CO_Ratio DECIMAL(10,4) NULL,
+    H2_CO2_Ratio DECIMAL(10,4) NULL,
+    CH4_Slip_percent DECIMAL(10,4) NULL,
+    CO_Slip_ppm DECIMAL(10,4) NULL,
+
+    -- EnergyBalance (HasEnergy = 0: not extracted, no row inserted)
+    HasEnergy BIT NOT NULL,
+    PreheaterHeat_MJ DECIMAL(10,2) NULL,
+    ReformerHeat_MJ DECIMAL(10,2) NULL,
+    TotalEnergyInput_MJ DECIMAL(10,2) NULL,
+
+    -- Syngas streams 1-4 (Location NULL = not extracted)
+    Syngas1_Location NVARCHAR(50) NULL,
+    Syngas1_H2_molpercent DECIMAL(10,4) NULL,
+    Syngas1_CO_molpercent DECIMAL(10,4) NULL,
+    Syngas1_CO2_molpercent DECIMAL(10,4) NULL,
+    Syngas1_CH4_molpercent DECIMAL(10,4) NULL,
+    Syngas1_H2O_molpercent DECIMAL(10,4) NULL,
+    Syngas1_N2_molpercent DECIMAL(10,4) NULL,
+    Syngas1_Temperature_C DECIMAL(10,2) NULL,
+    Syngas1_Pressure_bar DECIMAL(10,2) NULL,
+    Syngas1_MassFlowRate_kgh DECIMAL(10,4) NULL,
+    Syngas1_MolarFlowRate_kmolh DECIMAL(10,4) NULL,
+    Syngas2_Location NVARCHAR(50) NULL,
+    Syngas2_H2_molpercent DECIMAL(10,4) NULL,
+    Syngas2_CO_molpercent DECIMAL(10,4) NULL,
+    Syngas2_CO2_molpercent DECIMAL(10,4) NULL,
+    Syngas2_CH4_molpercent DECIMAL(10,4) NULL,
+    Syngas2_H2O_molpercent DECIMAL(10,4) NULL,
+    Syngas2_N2_molpercent DECIMAL(10,4) NULL,
+    Syngas2_Temperature_C DECIMAL(10,2) NULL,
+    Syngas2_Pressure_bar DECIMAL(10,2) NULL,
+    Syngas2_MassFlowRate_kgh DECIMAL(10,4) NULL,
+    Syngas2_MolarFlowRate_kmolh DECIMAL(10,4) NULL,
+    Syngas3_Location NVARCHAR(50) NULL,
+    Syngas3_H2_molpercent DECIMAL(10,4) NULL,
+    Syngas3_CO_molpercent DECIMAL(10,4) NULL,
+    Syngas3_CO2_molpercent DECIMAL(10,4) NULL,
+    Syngas3_CH4_molpercent DECIMAL(10,4) NULL,
+    Syngas3_H2O_molpercent DECIMAL(10,4) NULL,
+    Syngas3_N2_molpercent DECIMAL(10,4) NULL,
+    Syngas3_Temperature_C DECIMAL(10,2) NULL,
+    Syngas3_Pressure_bar DECIMAL(10,2) NULL,
+    Syngas3_MassFlowRate_kgh DECIMAL(10,4) NULL,
+    Syngas3_MolarFlowRate_kmolh DECIMAL(10,4) NULL,
+    Syngas4_Location NVARCHAR(50) NULL,
+    Syngas4_H2_molpercent DECIMAL(10,4) NULL,
+    Syngas4_CO_molpercent DECIMAL(10,4) NULL,
+    Syngas4_CO2_molpercent DECIMAL(10,4) NULL,
+    Syngas4_CH4_molpercent DECIMAL(10,4) NULL,
+    Syngas4_H2O_molpercent DECIMAL(10,4) NULL,
+    Syngas4_N2_molpercent DECIMAL(10,4) NULL,
+    Syngas4_Temperature_C DECIMAL(10,2) NULL,
+    Syngas4_Pressure_bar DECIMAL(10,2) NULL,
+    Syngas4_MassFlowRate_kgh DECIMAL(10,4) NULL,
+    Syngas4_MolarFlowRate_kmolh DECIMAL(10,4) NULL
+);
+GO
+
+PRINT 'SimulationBundleTVP type created successfully.';
+GO
+
+-- ==============================================================================
+-- PROCEDURE 2: usp_InsertBundleFromTVP
+-- Purpose: Insert a whole batch of converged simulations (all 5 tables) from
+--          one SimulationBundleTVP parameter in a single round trip.
+-- ==============================================================================
+
+PRINT 'Creating usp_InsertBundleFromTVP procedure...';
+GO
+
+CREATE PROCEDURE dbo.usp_InsertBundleFromTVP
+    @Bundles dbo.SimulationBundleTVP READONLY
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;  -- Any failed insert aborts the whole batch
+
+    -- RowNo -> new SimulationId (MERGE can OUTPUT source columns, INSERT cannot)
+    DECLARE @Ids TABLE (RowNo INT PRIMARY KEY, SimulationId INT NOT NULL);
+
+    MERGE INTO AspenSimulation AS t
+    USING @Bundles AS b
+    ON 1 = 0
+    WHEN NOT MATCHED THEN
+        INSERT (
+            Biooil_Id, SimulationDate, AspenVersion,
+            ConvergenceStatus, ConvergenceIterations,
+            MassBalanceError_percent, EnergyBalanceError_percent,
+            Warnings, Notes, ValidationFlag
+        )
+        VALUES (
+            b.Biooil_Id, GETDATE(), 'V8.8',
+            'Converged', NULL,
+            b.MassBalanceError_percent, b.EnergyBalanceError_percent,
+            NULL, b.Notes, 0
+        )
+    OUTPUT b.RowNo, INSERTED.SimulationId INTO @Ids (RowNo, SimulationId);
+
+    INSERT INTO ReformingConditions (
+        Simulation_Id,
+        ReformerTemperature_C, ReformerPressure_bar, SteamToCarbonRatio,
+        BiooilFeedRate_kgh, SteamFeedRate_kgh,
+        HTS_Temperature_C, LTS_Temperature_C, PSA_Pressure_bar
+    )
+    SELECT
+        i.SimulationId,
+        b.ReformerTemperature_C, b.ReformerPressure_bar, b.SteamToCarbonRatio,
+        b.BiooilFeedRate_kgh, b.SteamFeedRate_kgh,
+        b.HTS_Temperature_C, b.LTS_Temperature_C, b.PSA_Pressure_bar
+    FROM @Bundles b
+    JOIN @Ids i ON i.RowNo = b.RowNo;
+
+    INSERT INTO HydrogenProduct (
+        Simulation_Id,
+        H2_Yield_kg, H2_Purity_percent,
+        H2_FlowRate_kgh, H2_FlowRate_Nm3h,
+        H2_CO_Ratio, H2_CO2_Ratio,
+        CH4_Slip_percent, CO_Slip_ppm,
+        Carbon_Conversion_percent, H2_Recovery_PSA_percent
+    )
+    SELECT
+        i.SimulationId,
+        b.H2_Yield_kg, b.H2_Purity_percent,
+        b.H2_FlowRate_kgh, b.H2_FlowRate_Nm3h,
+        b.H2_CO_Ratio, b.H2_CO2_Ratio,
+        b.CH4_Slip_percent, b.CO_Slip_ppm,
+        90.0, 88.0  -- Carbon conversion (placeholder), H2 recovery PSA (typical value)
+    FROM @Bundles b
+    JOIN @Ids i ON i.RowNo = b.RowNo;
+
+    INSERT INTO SyngasComposition (
+        Simulation_Id, StreamLocation,
+        H2_molpercent, CO_molpercent, CO2_molpercent,
+        CH4_molpercent, H2O_molpercent, N2_molpercent,
+        Temperature_C, Pressure_bar,
+        MassFlowRate_kgh, MolarFlowRate_kmolh
+    )
+    SELECT i.SimulationId, s.*
+    FROM @Bundles b
+    JOIN @Ids i ON i.RowNo = b.RowNo
+    CROSS APPLY (VALUES
+        (b.Syngas1_Location, b.Syngas1_H2_molpercent, b.Syngas1_CO_molpercent, b.Syngas1_CO2_molpercent, b.Syngas1_CH4_molpercent, b.Syngas1_H2O_molpercent, b.Syngas1_N2_molpercent, b.Syngas1_Temperature_C, b.Syngas1_Pressure_bar, b.Syngas1_MassFlowRate_kgh, b.Syngas1_MolarFlowRate_kmolh),
+        (b.Syngas2_Location, b.Syngas2_H2_molpercent, b.Syngas2_CO_molpercent, b.Syngas2_CO2_molpercent, b.Syngas2_CH4_molpercent, b.Syngas2_H2O_molpercent, b.Syngas2_N2_molpercent, b.Syngas2_Temperature_C, b.Syngas2_Pressure_bar, b.Syngas2_MassFlowRate_kgh, b.Syngas2_MolarFlowRate_kmolh),
+        (b.Syngas3_Location, b.Syngas3_H2_molpercent, b.Syngas3_CO_molpercent, b.Syngas3_CO2_molpercent, b.Syngas3_CH4_molpercent, b.Syngas3_H2O_molpercent, b.Syngas3_N2_molpercent, b.Syngas3_Temperature_C, b.Syngas3_Pressure_bar, b.Syngas3_MassFlowRate_kgh, b.Syngas3_MolarFlowRate_kmolh),
+        (b.Syngas4_Location, b.Syngas4_H2_molpercent, b.Syngas4_CO_molpercent, b.Syngas4_CO2_molpercent, b.Syngas4_CH4_molpercent, b.Syngas4_H2O_molpercent, b.Syngas4_N2_molpercent, b.Syngas4_Temperature_C, b.Syngas4_Pressure_bar, b.Syngas4_MassFlowRate_kgh, b.Syngas4_MolarFlowRate_kmolh)
+    ) AS s (StreamLocation, H2_molpercent, CO_molpercent, CO2_molpercent, CH4_molpercent, H2O_molpercent, N2_molpercent, Temperature_C, Pressure_bar, MassFlowRate_kgh, MolarFlowRate_kmolh)
+    WHERE s.StreamLocation IS NOT NULL;
+
+    INSERT INTO EnergyBalance (
+        Simulation_Id,
+        PreheaterHeat_MJ, ReformerHeat_MJ, TotalEnergyInput_MJ
+    )
+    SELECT
+        i.SimulationId,
+        b.PreheaterHeat_MJ, b.ReformerHeat_MJ, b.TotalEnergyInput_MJ
+    FROM @Bundles b
+    JOIN @Ids i ON i.RowNo = b.RowNo
+    WHERE b.HasEnergy = 1;
+
+    SELECT COUNT(*) AS InsertedCount FROM @Ids;
+END
+GO
+
+PRINT 'usp_InsertBundleFromTVP procedure created successfully.';
+GO
@@ -5,8 +5,9 @@ Purpose: Prepare Aspen simulation data for machine learning training
 
 import pandas as pd
 import numpy as np
+import joblib
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, KFold
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -20,8 +21,12 @@ class ReverseMLDataPreparation:
         self.scaler = StandardScaler()
         self.input_features = []   # Product properties
         self.output_targets = []   # Bio-oil properties
+        self.folds = None          # Cached K-fold partition (see prepare_folds)
+        self._folds_key = None     # (n_splits, random_state, len(df)) of self.folds
+        self._folds_index = None   # Row index the folds were built on
+        self._scaler_fit_key = None  # (columns, shape) the scaler was last fitted on
 
-    def load_simulation_data(self, filepath):
+    def load_simulation_data(self, filepath, engine='pyarrow', chunksize=None):
         """
         Load raw simulation data from Aspen outputs
 
@@ -29,24 +34,53 @@ class ReverseMLDataPreparation:
         -----------
         filepath : str
             Path to CSV file containing simulation results
+        engine : str
+            'pyarrow' for the multi-threaded Arrow CSV reader (falls back to
+            pandas if pyarrow is not installed), or 'pandas'
+        chunksize : int, optional
+            Stream the file in chunks of this many rows, keeping only the
+            valid rows of each chunk (see clean_data); needs the targets
+            defined first. Bounds peak memory for large result files.
 
         Returns:
         --------
         df : DataFrame
-            Raw simulation data
+            Raw simulation data (valid rows only when chunked)
         """
-        df = pd.read_csv(filepath)
+        if chunksize:
+            reader = pd.read_csv(filepath, chunksize=chunksize,
+                                 dtype={'convergence_status': 'category'})
+            df = pd.concat((self._valid_rows(chunk) for chunk in reader),
+                           ignore_index=True)
+            print(f"Loaded {len(df)} valid simulation runs from {filepath}")
+            return df
+
+        if engine == 'pyarrow':
+            try:
+                import pyarrow.csv as pacsv
+            except ImportError:
+                engine = 'pandas'
+
+        if engine == 'pyarrow':
+            table = pacsv.read_csv(
+                filepath, read_options=pacsv.ReadOptions(use_threads=True)
+            )
+            # Release Arrow buffers while converting (lower peak memory)
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+            del table
+        else:
+            df = pd.read_csv(filepath)
         print(f"Loaded {len(df)} simulation runs from {filepath}")
         return df
 
-    def define_features_targets(self, df):
+    def define_features_targets(self, df=None):
         """
         Define input features (product properties) and output targets (bio-oil properties)
 
         Parameters:
         -----------
-        df : DataFrame
-            Complete simulation dataset
+        df : DataFrame, optional
+            Complete simulation dataset (not needed, the lists are fixed)
         """
         # OUTPUT TARGETS: Bio-oil properties (what we want to predict)
         self.output_targets = [
@@ -101,11 +135,20 @@ class ReverseMLDataPreparation:
             Cleaned data
         """
         initial_rows = len(df)
+        df = self._valid_rows(df)
+        print(f"Removed {initial_rows - len(df)} non-converged or incomplete simulations")
+
+        print(f"Data cleaning complete. {len(df)} valid simulations remaining")
+        return df
 
+    def _valid_rows(self, df):
+        """
+        Keep converged simulations with all targets present (float32 columns);
+        used by clean_data and per chunk by load_simulation_data
+        """
         # Remove failed simulations (non-converged)
         if 'convergence_status' in df.columns:
             df = df[df['convergence_status'] == 'Converged']
-            print(f"Removed {initial_rows - len(df)} non-converged simulations")
 
         # Remove rows with missing values in critical columns
         df = df.dropna(subset=self.output_targets)
@@ -113,8 +156,11 @@ class ReverseMLDataPreparation:
         # Check for unrealistic values
         # TODO: Add specific checks based on process knowledge
 
-        print(f"Data cleaning complete. {len(df)} valid simulations remaining")
-        return df
+        # float32 is ample for % fractions and process values; halves the
+        # memory traffic through scaling and training (StandardScaler and the
+        # tree models keep float32)
+        return df.astype({col: np.float32
+                          for col in self.input_features + self.output_targets})
 
     def feature_engineering(self, df):
         """
@@ -139,7 +185,7 @@ class ReverseMLDataPreparation:
         print("Feature engineering complete")
         return df
 
-    def normalize_data(self, X_train, X_test):
+    def normalize_data(self, X_train, X_test, refit=False):
         """
         Normalize/standardize input features
 
@@ -149,24 +195,39 @@ class ReverseMLDataPreparation:
             Training features
         X_test : DataFrame
             Test features
+        refit : bool
+            Fit the scaler again even if it was fitted on a training set
+            with the same columns and shape (use after changing X_train)
 
         Returns:
         --------
         X_train_scaled, X_test_scaled : DataFrames
             Normalized features
         """
-        self.scaler.fit(X_train)
-
+        fit_key = (tuple(X_train.columns), X_train.shape)
+        if not refit and fit_key == self._scaler_fit_key:
+            # Same training columns and shape as last time: reuse the fitted means/stds
+            train_scaled = self.scaler.transform(X_train)
+        else:
+            # Fit and transform in one pass over the training set
+            train_scaled = self.scaler.fit_transform(X_train)
+            self._scaler_fit_key = fit_key
+
+        # Column-major (float32) arrays: each feature column is contiguous,
+        # which is what the tree splitters scan; the DataFrames wrap them
+        # without another copy and hand the same layout back via .to_numpy()
         X_train_scaled = pd.DataFrame(
-            self.scaler.transform(X_train),
+            np.asfortranarray(train_scaled, dtype=np.float32),
             columns=X_train.columns,
-            index=X_train.index
+            index=X_train.index,
+            copy=False
         )
 
         X_test_scaled = pd.DataFrame(
-            self.scaler.transform(X_test),
+            np.asfortranarray(self.scaler.transform(X_test), dtype=np.float32),
             columns=X_test.columns,
-            index=X_test.index
+            index=X_test.index,
+            copy=False
         )
 
         print("Data normalization complete")
@@ -203,18 +264,64 @@ class ReverseMLDataPreparation:
 
         return X_train, X_test, y_train, y_test
 
-    def save_processed_data(self, X_train, X_test, y_train, y_test, output_dir='../data/processed'):
+    def prepare_folds(self, df, n_splits=5, random_state=42):
+        """
+        Build one K-fold partition, shared by every target and algorithm
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Complete prepared dataset
+        n_splits : int
+            Number of folds
+        random_state : int
+            Random seed for reproducibility
+
+        Returns:
+        --------
+        folds : list of (train_positions, test_positions)
+            Cached on self.folds; later calls with the same settings and
+            the same rows return the same partition
+        """
+        key = (n_splits, random_state, len(df))
+        if (self.folds is None or key != self._folds_key
+                or not df.index.equals(self._folds_index)):
+            kf = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+            self.folds = list(kf.split(df))
+            self._folds_key = key
+            self._folds_index = df.index
+            print(f"\nPrepared {n_splits}-fold partition of {len(df)} samples")
+
+        return self.folds
+
+    def save_processed_data(self, X_train, X_test, y_train, y_test, output_dir='../data/processed',
+                            file_format='parquet'):
         """
         Save processed data to files
+
+        Parameters:
+        -----------
+        file_format : str
+            'parquet' (typed, zstd-compressed, no float-to-text conversion;
+            needs pyarrow) or 'csv'
         """
-        X_train.to_csv(f'{output_dir}/X_train.csv', index=False)
-        X_test.to_csv(f'{output_dir}/X_test.csv', index=False)
-        y_train.to_csv(f'{output_dir}/y_train.csv', index=False)
-        y_test.to_csv(f'{output_dir}/y_test.csv', index=False)
+        splits = {'X_train': X_train, 'X_test': X_test,
+                  'y_train': y_train, 'y_test': y_test}
+
+        for name, data in splits.items():
+            if file_format == 'parquet':
+                data.to_parquet(f'{output_dir}/{name}.parquet', engine='pyarrow',
+                                compression='zstd', index=False)
+            else:
+                data.to_csv(f'{output_dir}/{name}.csv', index=False)
+
+        # Fitted scaler, to scale new product properties the same way
+        joblib.dump(self.scaler, f'{output_dir}/scaler.joblib')
 
         print(f"Processed data saved to {output_dir}")
 
-    def run_full_pipeline(self, input_filepath, output_dir='../data/processed'):
+    def run_full_pipeline(self, input_filepath, output_dir='../data/processed',
+                          chunksize=200_000):
         """
         Execute complete data preparation pipeline
 
@@ -224,16 +331,18 @@ class ReverseMLDataPreparation:
             Path to raw simulation data
         output_dir : str
             Directory to save processed data
+        chunksize : int or None
+            Rows per chunk when loading (None = read the whole file at once)
         """
         print("="*60)
         print("REVERSE ML DATA PREPARATION PIPELINE")
         print("="*60)
 
-        # Load data
-        df = self.load_simulation_data(input_filepath)
+        # Define features and targets (needed to filter while loading)
+        self.define_features_targets()
 
-        # Define features and targets
-        self.define_features_targets(df)
+        # Load data
+        df = self.load_simulation_data(input_filepath, chunksize=chunksize)
 
         # Clean data
         df_clean = self.clean_data(df)
@@ -245,7 +354,7 @@ class ReverseMLDataPreparation:
         X_train, X_test, y_train, y_test = self.prepare_train_test_split(df_engineered)
 
         # Normalize features
-        X_train_scaled, X_test_scaled = self.normalize_data(X_train, X_test)
+        X_train_scaled, X_test_scaled = self.normalize_data(X_train, X_test, refit=True)
 
         # Save processed data
         self.save_processed_data(X_train_scaled, X_test_scaled, y_train, y_test, output_dir)
@@ -5,10 +5,10 @@ Purpose: Train ML models to predict bio-oil properties from product characterist
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
-import xgboost as xgb
 import joblib
+from joblib import Parallel, delayed
 import os
 
 
@@ -18,12 +18,25 @@ class ReverseMLModelTrainer:
     Product Properties → Bio-oil Composition
     """
 
-    def __init__(self):
+    def __init__(self, model_n_jobs=None):
         self.models = {}
         self.performance_metrics = {}
-        self.feature_importance = {}
-
-    def train_random_forest(self, X_train, y_train, X_test, y_test, target_name):
+        self.feature_importance = {}  # Target -> importances array (feature_names order)
+        self.feature_names = []
+        self.model_n_jobs = model_n_jobs  # Threads per model (None = library default)
+
+    @staticmethod
+    def _target_rows(X_train, y_train, X_test, y_test, target_name, rows=None):
+        """Select the train/test rows where the target is not NaN"""
+        if rows is None:
+            rows = (np.flatnonzero(y_train[target_name].notna().to_numpy()),
+                    np.flatnonzero(y_test[target_name].notna().to_numpy()))
+        train_rows, test_rows = rows
+
+        return (X_train.iloc[train_rows], y_train[target_name].iloc[train_rows],
+                X_test.iloc[test_rows], y_test[target_name].iloc[test_rows])
+
+    def train_random_forest(self, X_train, y_train, X_test, y_test, target_name, rows=None):
         """
         Train Random Forest model for a specific bio-oil property
 
@@ -35,6 +48,9 @@ class ReverseMLModelTrainer:
             Test data
         target_name : str
             Name of bio-oil property being predicted
+        rows : tuple of arrays, optional
+            (train, test) positions of the rows where the target is not NaN;
+            computed here if not given
 
         Returns:
         --------
@@ -44,13 +60,8 @@ class ReverseMLModelTrainer:
         print(f"\nTraining Random Forest for {target_name}...")
 
         # Remove NaN values for this target
-        mask_train = ~y_train[target_name].isna()
-        X_tr = X_train[mask_train]
-        y_tr = y_train[target_name][mask_train]
-
-        mask_test = ~y_test[target_name].isna()
-        X_te = X_test[mask_test]
-        y_te = y_test[target_name][mask_test]
+        X_tr, y_tr, X_te, y_te = self._target_rows(
+            X_train, y_train, X_test, y_test, target_name, rows)
 
         if len(y_tr) < 10:
             print(f"  WARNING: Insufficient training data ({len(y_tr)} samples)")
@@ -62,7 +73,8 @@ class ReverseMLModelTrainer:
             max_depth=10,
             min_samples_split=5,
             min_samples_leaf=3,
-            random_state=42
+            random_state=42,
+            n_jobs=self.model_n_jobs
         )
 
         rf_model.fit(X_tr, y_tr)
@@ -82,30 +94,23 @@ class ReverseMLModelTrainer:
             print(f"  MAE = {metrics['MAE']:.4f}")
             print(f"  RMSE = {metrics['RMSE']:.4f}")
 
-            # Feature importance
-            importance_df = pd.DataFrame({
-                'feature': X_train.columns,
-                'importance': rf_model.feature_importances_
-            }).sort_values('importance', ascending=False)
-
-            self.feature_importance[target_name] = importance_df
+            # Feature importance (tabulated once, in save_models)
+            self.feature_names = list(X_train.columns)
+            self.feature_importance[target_name] = rf_model.feature_importances_.astype(np.float32)
             self.performance_metrics[target_name] = metrics
 
         return rf_model
 
-    def train_xgboost(self, X_train, y_train, X_test, y_test, target_name):
+    def train_xgboost(self, X_train, y_train, X_test, y_test, target_name, rows=None):
         """
         Train XGBoost model for a specific bio-oil property
         """
-        print(f"\nTraining XGBoost for {target_name}...")
+        import xgboost as xgb  # imported on first use only (heavy native runtime)
 
-        mask_train = ~y_train[target_name].isna()
-        X_tr = X_train[mask_train]
-        y_tr = y_train[target_name][mask_train]
+        print(f"\nTraining XGBoost for {target_name}...")
 
-        mask_test = ~y_test[target_name].isna()
-        X_te = X_test[mask_test]
-        y_te = y_test[target_name][mask_test]
+        X_tr, y_tr, X_te, y_te = self._target_rows(
+            X_train, y_train, X_test, y_test, target_name, rows)
 
         if len(y_tr) < 10:
             print(f"  WARNING: Insufficient training data ({len(y_tr)} samples)")
@@ -116,7 +121,10 @@ class ReverseMLModelTrainer:
             n_estimators=100,
             learning_rate=0.1,
             max_depth=5,
-            random_state=42
+            tree_method='hist',  # Histogram (binned) split finding
+            max_bin=256,
+            random_state=42,
+            n_jobs=self.model_n_jobs
         )
 
         xgb_model.fit(X_tr, y_tr)
@@ -139,7 +147,50 @@ class ReverseMLModelTrainer:
 
         return xgb_model
 
-    def train_all_models(self, X_train, y_train, X_test, y_test, algorithm='random_forest'):
+    def train_hist_gbm(self, X_train, y_train, X_test, y_test, target_name, rows=None):
+        """
+        Train histogram gradient boosting model for a specific bio-oil property
+        """
+        print(f"\nTraining HistGradientBoosting for {target_name}...")
+
+        X_tr, y_tr, X_te, y_te = self._target_rows(
+            X_train, y_train, X_test, y_test, target_name, rows)
+
+        if len(y_tr) < 10:
+            print(f"  WARNING: Insufficient training data ({len(y_tr)} samples)")
+            return None
+
+        # OpenMP threads; joblib workers limit them to their share of cores
+        hgb_model = HistGradientBoostingRegressor(
+            max_iter=100,
+            max_depth=10,
+            learning_rate=0.1,
+            early_stopping=True,
+            random_state=42
+        )
+
+        hgb_model.fit(X_tr, y_tr)
+
+        if len(y_te) > 0:
+            y_pred = hgb_model.predict(X_te)
+            metrics = {
+                'R2': r2_score(y_te, y_pred),
+                'MAE': mean_absolute_error(y_te, y_pred),
+                'RMSE': np.sqrt(mean_squared_error(y_te, y_pred))
+            }
+
+            print(f"  Training samples: {len(y_tr)}")
+            print(f"  Test samples: {len(y_te)}")
+            print(f"  R² = {metrics['R2']:.4f}")
+            print(f"  MAE = {metrics['MAE']:.4f}")
+            print(f"  RMSE = {metrics['RMSE']:.4f}")
+
+            self.performance_metrics[f"{target_name}_hgb"] = metrics
+
+        return hgb_model
+
+    def train_all_models(self, X_train, y_train, X_test, y_test, algorithm='random_forest',
+                         n_jobs=-1):
         """
         Train models for all bio-oil properties
 
@@ -148,28 +199,108 @@ class ReverseMLModelTrainer:
         X_train, y_train, X_test, y_test : DataFrames
             Training and test data
         algorithm : str
-            'random_forest' or 'xgboost'
+            'random_forest', 'xgboost' or 'hist_gbm'
+        n_jobs : int
+            Targets trained in parallel (-1 = one process per target, up to
+            the CPU count; 1 = sequential in this process). Each parallel
+            model uses a single thread to avoid oversubscription.
         """
+        if algorithm not in ('random_forest', 'xgboost', 'hist_gbm'):
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+
         print("="*60)
         print("TRAINING MODELS FOR ALL BIO-OIL PROPERTIES")
         print("="*60)
 
-        for target in y_train.columns:
-            if algorithm == 'random_forest':
-                model = self.train_random_forest(X_train, y_train, X_test, y_test, target)
-            elif algorithm == 'xgboost':
-                model = self.train_xgboost(X_train, y_train, X_test, y_test, target)
-            else:
-                raise ValueError(f"Unknown algorithm: {algorithm}")
-
+        targets = list(y_train.columns)
+        if n_jobs == -1:
+            n_jobs = min(len(targets), os.cpu_count() or 1)
+
+        # Non-NaN row positions of every target, from one pass over y
+        train_valid = y_train.notna().to_numpy()
+        test_valid = y_test.notna().to_numpy()
+        rows = {target: (np.flatnonzero(train_valid[:, i]), np.flatnonzero(test_valid[:, i]))
+                for i, target in enumerate(targets)}
+
+        if n_jobs == 1:
+            results = [_train_target(self, algorithm, X_train, y_train, X_test, y_test,
+                                     target, rows[target])
+                       for target in targets]
+        else:
+            results = Parallel(n_jobs=n_jobs, backend='loky')(
+                delayed(_train_target)(ReverseMLModelTrainer(model_n_jobs=1), algorithm,
+                                       X_train, y_train, X_test, y_test,
+                                       target, rows[target])
+                for target in targets
+            )
+
+        # Collect results in target order (workers return their own copies)
+        for target, model, metrics, importance in results:
             if model is not None:
                 self.models[target] = model
+            self.performance_metrics.update(metrics)
+            self.feature_importance.update(importance)
+        if self.feature_importance:
+            self.feature_names = list(X_train.columns)
 
         print("\n" + "="*60)
         print("MODEL TRAINING COMPLETE")
         print("="*60)
         self.print_summary()
 
+    def cross_validate(self, X, y, folds, algorithm='random_forest', n_jobs=-1):
+        """
+        Cross-validate all bio-oil properties on a fixed fold partition
+
+        Parameters:
+        -----------
+        X, y : DataFrames
+            Complete features and targets
+        folds : list of (train_positions, test_positions)
+            Partition reused for every target (see
+            ReverseMLDataPreparation.prepare_folds)
+        algorithm : str
+            'random_forest', 'xgboost' or 'hist_gbm'
+        n_jobs : int
+            Parallel (fold, target) fits (-1 = CPU count, 1 = sequential)
+
+        Returns:
+        --------
+        cv_metrics : DataFrame
+            Mean metrics over folds, one row per target
+        """
+        if algorithm not in ('random_forest', 'xgboost', 'hist_gbm'):
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+
+        # Each fold's data is sliced once and shared by all its targets
+        splits = [(X.iloc[tr], y.iloc[tr], X.iloc[te], y.iloc[te]) for tr, te in folds]
+        jobs = [(split, target) for split in splits for target in y.columns]
+
+        if n_jobs == -1:
+            n_jobs = min(len(jobs), os.cpu_count() or 1)
+
+        if n_jobs == 1:
+            results = [_train_target(ReverseMLModelTrainer(), algorithm, *split, target)
+                       for split, target in jobs]
+        else:
+            results = Parallel(n_jobs=n_jobs, backend='loky')(
+                delayed(_train_target)(ReverseMLModelTrainer(model_n_jobs=1), algorithm,
+                                       *split, target)
+                for split, target in jobs
+            )
+
+        fold_metrics = [m for _, _, metrics, _ in results for m in metrics.items()]
+        if not fold_metrics:
+            print("  WARNING: No fold had enough data to evaluate")
+            return pd.DataFrame()
+
+        cv_metrics = (pd.DataFrame([dict(target=key, **values) for key, values in fold_metrics])
+                      .groupby('target', sort=False).mean())
+
+        print("\n=== CROSS-VALIDATION SUMMARY ===")
+        print(cv_metrics.round(4))
+        return cv_metrics
+
     def print_summary(self):
         """Print summary of all model performances"""
         print("\n=== MODEL PERFORMANCE SUMMARY ===")
@@ -184,13 +315,22 @@ class ReverseMLModelTrainer:
 
         for target, model in self.models.items():
             filepath = os.path.join(output_dir, f'{target}_model.joblib')
-            joblib.dump(model, filepath)
+            # Uncompressed: arrays stay raw on disk, so load_models can memory-map them
+            joblib.dump(model, filepath, compress=0, protocol=5)
             print(f"Saved: {filepath}")
 
         # Save metrics
         metrics_df = pd.DataFrame(self.performance_metrics).T
         metrics_df.to_csv(os.path.join(output_dir, 'model_performance.csv'))
 
+        # Save feature importances (features x targets, by mean importance)
+        if self.feature_importance:
+            importance_df = pd.DataFrame(self.feature_importance, index=self.feature_names)
+            importance_df = importance_df.loc[
+                importance_df.mean(axis=1).sort_values(ascending=False).index]
+            importance_df.to_csv(os.path.join(output_dir, 'feature_importance.csv'),
+                                 index_label='feature')
+
         print(f"\nAll models saved to {output_dir}")
 
     def load_models(self, input_dir='./trained_models'):
@@ -199,7 +339,8 @@ class ReverseMLModelTrainer:
             if filename.endswith('_model.joblib'):
                 target = filename.replace('_model.joblib', '')
                 filepath = os.path.join(input_dir, filename)
-                self.models[target] = joblib.load(filepath)
+                # Tree arrays paged in from disk on demand (read-only)
+                self.models[target] = joblib.load(filepath, mmap_mode='r')
                 print(f"Loaded: {target}")
 
     def predict(self, X_new, target_name):
@@ -245,6 +386,25 @@ class ReverseMLModelTrainer:
         return pd.DataFrame(predictions)
 
 
+def _train_target(trainer, algorithm, X_train, y_train, X_test, y_test, target, rows=None):
+    """
+    Train one target's model (runs in a joblib worker when parallel)
+
+    Returns:
+    --------
+    (target, model, performance_metrics, feature_importance)
+        model is None if the target had too little data
+    """
+    if algorithm == 'random_forest':
+        model = trainer.train_random_forest(X_train, y_train, X_test, y_test, target, rows)
+    elif algorithm == 'xgboost':
+        model = trainer.train_xgboost(X_train, y_train, X_test, y_test, target, rows)
+    else:
+        model = trainer.train_hist_gbm(X_train, y_train, X_test, y_test, target, rows)
+
+    return target, model, trainer.performance_metrics, trainer.feature_importance
+
+
 if __name__ == "__main__":
     # Example usage
     print("Model training module loaded successfully")
@@ -254,10 +414,10 @@ if __name__ == "__main__":
     # trainer = ReverseMLModelTrainer()
     #
     # # Load processed data
-    # X_train = pd.read_csv('../data/processed/X_train.csv')
-    # X_test = pd.read_csv('../data/processed/X_test.csv')
-    # y_train = pd.read_csv('../data/processed/y_train.csv')
-    # y_test = pd.read_csv('../data/processed/y_test.csv')
+    # X_train = pd.read_parquet('../data/processed/X_train.parquet')
+    # X_test = pd.read_parquet('../data/processed/X_test.parquet')
+    # y_train = pd.read_parquet('../data/processed/y_train.parquet')
+    # y_test = pd.read_parquet('../data/processed/y_test.parquet')
     #
     # # Train models
     # trainer.train_all_models(X_train, y_train, X_test, y_test, algorithm='random_forest')
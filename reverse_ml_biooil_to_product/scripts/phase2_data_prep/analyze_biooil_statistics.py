@@ -17,12 +17,16 @@ This script:
 Requirements:
 - pandas
 - numpy
+- pyarrow (optional, faster CSV parsing)
 ==============================================================================
 """
 
 import pandas as pd
 import numpy as np
+import io
 import os
+import sys
+from contextlib import redirect_stdout
 from datetime import datetime
 
 # Input file path
@@ -38,9 +42,12 @@ MAIN_COMPONENTS = ['aromatics', 'acids', 'alcohols', 'furans', 'phenols', 'aldeh
 
 
 def load_data(filepath):
-    """Load bio-oil composition data from CSV."""
+    """Load bio-oil composition data from CSV (pyarrow parser if installed)."""
     try:
-        df = pd.read_csv(filepath)
+        try:
+            df = pd.read_csv(filepath, engine='pyarrow')
+        except ImportError:
+            df = pd.read_csv(filepath)
         print(f"[OK] Loaded data from: {filepath}")
         print(f"  Records: {len(df)}")
         print(f"  Columns: {len(df.columns)}")
@@ -70,14 +77,12 @@ def calculate_basic_statistics(df):
     print(f"{'Component':<20} {'Mean':<10} {'Median':<10} {'Range':<15} {'CV (%)':<10}")
     print("-" * 70)
 
-    for comp in MAIN_COMPONENTS:
-        mean_val = df[comp].mean()
-        median_val = df[comp].median()
-        min_val = df[comp].min()
-        max_val = df[comp].max()
-        range_val = max_val - min_val
-        cv = (df[comp].std() / mean_val) * 100 if mean_val > 0 else 0
+    # All statistics for all components in one aggregation
+    agg = df[MAIN_COMPONENTS].agg(['mean', 'median', 'min', 'max', 'std']).T
+    agg['cv'] = (100 * agg['std'] / agg['mean']).where(agg['mean'] > 0, 0.0)
 
+    for comp, mean_val, median_val, min_val, max_val, cv in agg[
+            ['mean', 'median', 'min', 'max', 'cv']].itertuples():
         print(f"{comp:<20} {mean_val:<10.2f} {median_val:<10.2f} "
               f"{min_val:.2f}-{max_val:.2f}    {cv:<10.2f}")
 
@@ -89,34 +94,36 @@ def analyze_composition_sum(df):
     print("COMPOSITION SUM ANALYSIS")
     print("="*70)
 
-    # Calculate sum for each record
-    df['composition_sum'] = df[MAIN_COMPONENTS].sum(axis=1)
+    # Calculate sum for each record (local array, df is not modified;
+    # missing values count as 0 like DataFrame.sum)
+    comp_sum = np.nansum(df[MAIN_COMPONENTS].to_numpy(dtype=np.float64), axis=1)
 
     print(f"\nComposition sum (should be ~100%):")
-    print(f"  Mean:   {df['composition_sum'].mean():.2f}%")
-    print(f"  Median: {df['composition_sum'].median():.2f}%")
-    print(f"  Std:    {df['composition_sum'].std():.2f}%")
-    print(f"  Min:    {df['composition_sum'].min():.2f}%")
-    print(f"  Max:    {df['composition_sum'].max():.2f}%")
+    print(f"  Mean:   {comp_sum.mean():.2f}%")
+    print(f"  Median: {np.median(comp_sum):.2f}%")
+    print(f"  Std:    {comp_sum.std(ddof=1):.2f}%")
+    print(f"  Min:    {comp_sum.min():.2f}%")
+    print(f"  Max:    {comp_sum.max():.2f}%")
 
     # Identify records with unusual sums
     unusual_threshold_low = 80
     unusual_threshold_high = 110
 
-    unusual_low = df[df['composition_sum'] < unusual_threshold_low]
-    unusual_high = df[df['composition_sum'] > unusual_threshold_high]
+    biooil_ids = df['BiooilId'].to_numpy()
+    low = comp_sum < unusual_threshold_low
+    high = comp_sum > unusual_threshold_high
 
-    if len(unusual_low) > 0:
-        print(f"\n[WARNING] Warning: {len(unusual_low)} records with sum < {unusual_threshold_low}%:")
-        for idx, row in unusual_low.iterrows():
-            print(f"  BiooilId {row['BiooilId']}: {row['composition_sum']:.2f}%")
+    if low.any():
+        print(f"\n[WARNING] Warning: {low.sum()} records with sum < {unusual_threshold_low}%:")
+        for biooil_id, total in zip(biooil_ids[low], comp_sum[low]):
+            print(f"  BiooilId {biooil_id}: {total:.2f}%")
 
-    if len(unusual_high) > 0:
-        print(f"\n[WARNING] Warning: {len(unusual_high)} records with sum > {unusual_threshold_high}%:")
-        for idx, row in unusual_high.iterrows():
-            print(f"  BiooilId {row['BiooilId']}: {row['composition_sum']:.2f}%")
+    if high.any():
+        print(f"\n[WARNING] Warning: {high.sum()} records with sum > {unusual_threshold_high}%:")
+        for biooil_id, total in zip(biooil_ids[high], comp_sum[high]):
+            print(f"  BiooilId {biooil_id}: {total:.2f}%")
 
-    if len(unusual_low) == 0 and len(unusual_high) == 0:
+    if not low.any() and not high.any():
         print(f"\n[OK] All composition sums are within {unusual_threshold_low}-{unusual_threshold_high}% range")
 
 
@@ -127,26 +134,25 @@ def detect_outliers(df):
     print("OUTLIER DETECTION (IQR Method)")
     print("="*70)
 
-    outliers_detected = False
-
-    for comp in MAIN_COMPONENTS:
-        Q1 = df[comp].quantile(0.25)
-        Q3 = df[comp].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-
-        outliers = df[(df[comp] < lower_bound) | (df[comp] > upper_bound)]
-
-        if len(outliers) > 0:
-            outliers_detected = True
-            print(f"\n{comp}:")
-            print(f"  IQR range: {lower_bound:.2f} - {upper_bound:.2f}%")
-            print(f"  Outliers: {len(outliers)} records")
-            for idx, row in outliers.iterrows():
-                print(f"    BiooilId {row['BiooilId']}: {row[comp]:.2f}%")
-
-    if not outliers_detected:
+    # Quartiles and bounds for all components at once
+    values = df[MAIN_COMPONENTS]
+    q = values.quantile([0.25, 0.75])
+    iqr = q.loc[0.75] - q.loc[0.25]
+    lower_bounds = q.loc[0.25] - 1.5 * iqr
+    upper_bounds = q.loc[0.75] + 1.5 * iqr
+
+    mask = (values < lower_bounds) | (values > upper_bounds)
+    outlier_comps = mask.columns[mask.any()]
+
+    for comp in outlier_comps:
+        outliers = df.loc[mask[comp], ['BiooilId', comp]]
+        print(f"\n{comp}:")
+        print(f"  IQR range: {lower_bounds[comp]:.2f} - {upper_bounds[comp]:.2f}%")
+        print(f"  Outliers: {len(outliers)} records")
+        for biooil_id, value in outliers.itertuples(index=False):
+            print(f"    BiooilId {biooil_id}: {value:.2f}%")
+
+    if len(outlier_comps) == 0:
         print("\n[OK] No outliers detected in any component")
 
 
@@ -164,20 +170,17 @@ def analyze_correlations(df):
 
     # Find strong correlations (|r| > 0.5, excluding diagonal)
     print("\nStrong correlations (|r| > 0.5):")
-    strong_corr_found = False
 
-    for i in range(len(MAIN_COMPONENTS)):
-        for j in range(i+1, len(MAIN_COMPONENTS)):
-            comp1 = MAIN_COMPONENTS[i]
-            comp2 = MAIN_COMPONENTS[j]
-            corr_val = corr_matrix.loc[comp1, comp2]
+    # Upper-triangle pairs (diagonal excluded), read from the array at once
+    i, j = np.triu_indices(len(MAIN_COMPONENTS), k=1)
+    values = corr_matrix.to_numpy()[i, j]
+    strong = np.abs(values) > 0.5
 
-            if abs(corr_val) > 0.5:
-                strong_corr_found = True
-                corr_type = "positive" if corr_val > 0 else "negative"
-                print(f"  {comp1} vs {comp2}: {corr_val:.3f} ({corr_type})")
+    for a, b, corr_val in zip(i[strong], j[strong], values[strong]):
+        corr_type = "positive" if corr_val > 0 else "negative"
+        print(f"  {MAIN_COMPONENTS[a]} vs {MAIN_COMPONENTS[b]}: {corr_val:.3f} ({corr_type})")
 
-    if not strong_corr_found:
+    if not strong.any():
         print("  No strong correlations found")
 
 
@@ -256,18 +259,31 @@ def generate_summary_report(df):
     print(f"  This represents the 6 main chemical groups")
     print(f"  Other minor components may make up the remaining percentage")
 
+    means = df[MAIN_COMPONENTS].mean()
+
     print(f"\nDominant Components (by average %):")
-    avg_values = df[MAIN_COMPONENTS].mean().sort_values(ascending=False)
+    avg_values = means.sort_values(ascending=False)
     for i, (comp, val) in enumerate(avg_values.items(), 1):
         print(f"  {i}. {comp}: {val:.2f}%")
 
     print(f"\nVariability (by coefficient of variation):")
-    cv_values = ((df[MAIN_COMPONENTS].std() / df[MAIN_COMPONENTS].mean()) * 100).sort_values(ascending=False)
+    cv_values = ((df[MAIN_COMPONENTS].std() / means) * 100).sort_values(ascending=False)
     for i, (comp, cv) in enumerate(cv_values.items(), 1):
         variability = "High" if cv > 100 else "Medium" if cv > 50 else "Low"
         print(f"  {i}. {comp}: {cv:.1f}% CV ({variability} variability)")
 
 
+def run_section(func, df):
+    """Run one analysis step, writing its whole report to stdout at once."""
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            func(df)
+    finally:
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+
+
 def main():
     """Main execution function."""
 
@@ -285,27 +301,27 @@ def main():
 
         # Basic statistics
         print("\nStep 2: Calculating basic statistics...")
-        calculate_basic_statistics(df)
+        run_section(calculate_basic_statistics, df)
 
         # Composition sum analysis
         print("\nStep 3: Analyzing composition sums...")
-        analyze_composition_sum(df)
+        run_section(analyze_composition_sum, df)
 
         # Outlier detection
         print("\nStep 4: Detecting outliers...")
-        detect_outliers(df)
+        run_section(detect_outliers, df)
 
         # Correlation analysis
         print("\nStep 5: Analyzing correlations...")
-        analyze_correlations(df)
+        run_section(analyze_correlations, df)
 
         # Data quality checks
         print("\nStep 6: Checking data quality...")
-        check_data_quality(df)
+        run_section(check_data_quality, df)
 
         # Summary report
         print("\nStep 7: Generating summary report...")
-        generate_summary_report(df)
+        run_section(generate_summary_report, df)
 
         # Final message
         print("\n" + "="*70)
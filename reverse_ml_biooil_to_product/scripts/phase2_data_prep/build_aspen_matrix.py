@@ -0,0 +1,97 @@
+"""
+==============================================================================
+REVERSE ML PROJECT - PHASE 2: DATA PREPARATION
+Build Aspen Input Matrix (Scripts 1, 3 and 4 in one run)
+==============================================================================
+Purpose: Run extraction, DOE generation and matrix creation in one process,
+         passing DataFrames in memory instead of through CSV files
+Author: Orhun Uzdiyem
+Date: 2025-11-16
+==============================================================================
+
+This script:
+1. Extracts bio-oil compositions from BIOOIL database (extract_biooil_data)
+2. Generates the DOE matrix (generate_doe_matrix)
+3. Creates the full cross-product matrix (create_simulation_matrix)
+4. Saves to CSV: aspen_input_matrix.csv
+
+Each stage runs through the same function as its own script
+(load_biooil_compositions, build_doe_matrix, build_simulation_matrix), and
+the stage files (biooil_compositions_30.csv, doe_matrix.csv) are refreshed
+too, so analyze_biooil_statistics.py and create_simulation_matrix.py read
+current inputs. Set SAVE_STAGE_FILES = False to skip writing them.
+
+Requirements:
+- pyodbc
+- pandas
+- numpy
+==============================================================================
+"""
+
+from datetime import datetime
+
+import extract_biooil_data as extract
+import generate_doe_matrix as doe
+import create_simulation_matrix as simulation
+
+# Output file path (same as create_simulation_matrix.py)
+OUTPUT_FILE = simulation.OUTPUT_FILE
+
+# Also write the per-stage CSV/Parquet files (read by the other Phase 2 scripts)
+SAVE_STAGE_FILES = True
+
+
+def build_aspen_matrix(save_stages=SAVE_STAGE_FILES):
+    """Run all three stages in memory and return the simulation matrix."""
+
+    biooil_df = extract.load_biooil_compositions(save=save_stages)
+    doe_df = doe.build_doe_matrix(save=save_stages)
+    return simulation.build_simulation_matrix(biooil_df, doe_df)
+
+
+def main():
+    """Main execution function."""
+
+    print("="*70)
+    print("BUILD ASPEN INPUT MATRIX")
+    print("="*70)
+    print(f"Output: {OUTPUT_FILE}")
+    print(f"Stage files: {'saved' if SAVE_STAGE_FILES else 'not saved'}")
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("="*70)
+
+    try:
+        # Steps 1-3: Extract bio-oils, generate DOE, create simulation matrix
+        print("\nSteps 1-3: Building simulation matrix...")
+        sim_matrix = build_aspen_matrix()
+
+        # Step 4: Display samples
+        print("\nStep 4: Displaying sample simulations...")
+        simulation.display_sample_simulations(sim_matrix, n=10)
+
+        # Step 5: Save to CSV
+        print("\nStep 5: Saving to CSV...")
+        if not simulation.save_to_csv(sim_matrix, OUTPUT_FILE):
+            raise IOError("Failed to save CSV file!")
+
+        # Final summary
+        print("\n" + "="*70)
+        print("ASPEN INPUT MATRIX COMPLETE")
+        print("="*70)
+        print(f"[OK] Created {len(sim_matrix):,} simulation scenarios")
+        print(f"  = {sim_matrix['BiooilId'].nunique()} bio-oils × "
+              f"{sim_matrix['ConditionId'].nunique()} process conditions")
+        print(f"[OK] Data saved to: {OUTPUT_FILE}")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n[ERROR] FATAL ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -23,10 +23,12 @@ This matrix will be used for:
 
 Requirements:
 - pandas
+- numpy
 ==============================================================================
 """
 
 import pandas as pd
+import numpy as np
 import os
 from datetime import datetime
 
@@ -43,6 +45,20 @@ DOE_FILE = os.path.join(INPUT_DIR, 'doe_matrix.csv')
 OUTPUT_FILE = os.path.join(INPUT_DIR, 'aspen_input_matrix.csv')
 
 
+def read_table(csv_path):
+    """Read a Phase 2 table: its Parquet copy if up to date, else the CSV."""
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    # A CSV rewritten without pyarrow (or edited by hand) is newer than the copy
+    if (os.path.exists(parquet_path)
+            and (not os.path.exists(csv_path)
+                 or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path))):
+        try:
+            return pd.read_parquet(parquet_path)
+        except ImportError:
+            pass  # No Parquet engine installed
+    return pd.read_csv(csv_path)
+
+
 def load_input_files():
     """Load bio-oil compositions and DOE matrix."""
 
@@ -53,13 +69,13 @@ def load_input_files():
     try:
         # Load bio-oil data
         print(f"\nLoading bio-oil compositions...")
-        biooil_df = pd.read_csv(BIOOIL_FILE)
+        biooil_df = read_table(BIOOIL_FILE)
         print(f"  [OK] Loaded {len(biooil_df)} bio-oil compositions")
         print(f"    Columns: {len(biooil_df.columns)}")
 
         # Load DOE matrix
         print(f"\nLoading DOE matrix...")
-        doe_df = pd.read_csv(DOE_FILE)
+        doe_df = read_table(DOE_FILE)
         print(f"  [OK] Loaded {len(doe_df)} process conditions")
         print(f"    Columns: {len(doe_df.columns)}")
 
@@ -83,18 +99,19 @@ def create_simulation_matrix(biooil_df, doe_df):
     print("CREATING SIMULATION MATRIX")
     print("="*70)
 
-    # Create cross product using merge with dummy key
-    biooil_df['_merge_key'] = 1
-    doe_df['_merge_key'] = 1
+    # Create all combinations without a join: each bio-oil row repeated once
+    # per condition, next to the DOE rows tiled once per bio-oil (row
+    # positions gathered per column, dtypes kept; inputs not modified)
+    n_b, n_d = len(biooil_df), len(doe_df)
+    left = biooil_df.iloc[np.repeat(np.arange(n_b), n_d)].reset_index(drop=True)
+    right = doe_df.iloc[np.tile(np.arange(n_d), n_b)].reset_index(drop=True)
 
-    # Merge to create all combinations
-    sim_matrix = pd.merge(biooil_df, doe_df, on='_merge_key', suffixes=('', '_doe'))
-
-    # Remove merge key
-    sim_matrix = sim_matrix.drop('_merge_key', axis=1)
+    # Shared column names keep the bio-oil value; DOE copy gets '_doe'
+    right = right.rename(columns={col: f'{col}_doe' for col in right.columns if col in left.columns})
+    sim_matrix = pd.concat([left, right], axis=1)
 
     # Add unique SimulationId
-    sim_matrix.insert(0, 'SimulationId', range(1, len(sim_matrix) + 1))
+    sim_matrix.insert(0, 'SimulationId', np.arange(1, n_b * n_d + 1, dtype=np.int32))
 
     print(f"\nMatrix created:")
     print(f"  Bio-oil compositions: {len(biooil_df)}")
@@ -112,8 +129,9 @@ def organize_columns(df):
     print("ORGANIZING COLUMNS")
     print("="*70)
 
-    # Define column order
-    id_cols = ['SimulationId', 'BiooilId', 'Experiment_Id', 'ConditionId']
+    # Define column order (SimulationId and BiooilId are required)
+    required_id_cols = ['SimulationId', 'BiooilId']
+    id_cols = required_id_cols + ['Experiment_Id', 'ConditionId']
 
     # Bio-oil composition columns
     composition_cols = ['aromatics', 'acids', 'alcohols', 'furans', 'phenols', 'aldehyde_ketone']
@@ -133,36 +151,29 @@ def organize_columns(df):
     # Reference information columns
     ref_cols = ['PyrolysisTemp_C', 'BiomassName', 'BiomassHHV', 'Reference']
 
-    # Build ordered column list
-    ordered_cols = id_cols.copy()
-
-    # Add composition columns if they exist
-    for col in composition_cols:
-        if col in df.columns:
-            ordered_cols.append(col)
-
-    # Add process columns if they exist
-    for col in process_cols:
-        if col in df.columns:
-            ordered_cols.append(col)
-
-    # Add reference columns if they exist
-    for col in ref_cols:
-        if col in df.columns:
-            ordered_cols.append(col)
+    # Build ordered column list (membership tested against sets)
+    col_set = set(df.columns)
+    present = {
+        'id': required_id_cols + [col for col in id_cols[2:] if col in col_set],
+        'composition': [col for col in composition_cols if col in col_set],
+        'process': [col for col in process_cols if col in col_set],
+        'reference': [col for col in ref_cols if col in col_set],
+    }
+    ordered_cols = present['id'] + present['composition'] + present['process'] + present['reference']
 
     # Add any remaining columns not in the lists
-    remaining_cols = [col for col in df.columns if col not in ordered_cols]
+    ordered_set = set(ordered_cols)
+    remaining_cols = [col for col in df.columns if col not in ordered_set]
     ordered_cols.extend(remaining_cols)
 
-    # Reorder dataframe
+    # Reorder dataframe (KeyError if a required ID column is missing)
     df = df[ordered_cols]
 
     print(f"\nColumn organization:")
-    print(f"  ID columns: {len(id_cols)}")
-    print(f"  Composition columns: {len([c for c in composition_cols if c in df.columns])}")
-    print(f"  Process columns: {len([c for c in process_cols if c in df.columns])}")
-    print(f"  Reference columns: {len([c for c in ref_cols if c in df.columns])}")
+    print(f"  ID columns: {len(present['id'])}")
+    print(f"  Composition columns: {len(present['composition'])}")
+    print(f"  Process columns: {len(present['process'])}")
+    print(f"  Reference columns: {len(present['reference'])}")
     print(f"  Other columns: {len(remaining_cols)}")
     print(f"  Total: {len(df.columns)}")
 
@@ -194,25 +205,28 @@ def validate_simulation_matrix(df):
     else:
         print(f"[OK] All SimulationIds are unique")
 
-    # Check 3: Missing values
-    missing = df.isnull().sum()
+    # Check 3: Missing values (critical columns only, one pass)
     critical_cols = ['SimulationId', 'BiooilId', 'ReformerTemperature_C',
                      'ReformerPressure_bar', 'SteamToCarbonRatio',
                      'aromatics', 'acids', 'alcohols', 'furans', 'phenols', 'aldehyde_ketone']
 
-    missing_critical = False
-    for col in critical_cols:
-        if col in df.columns and missing[col] > 0:
-            missing_critical = True
-            issues.append(f"Missing values in critical column: {col}")
-            print(f"\n[ERROR] ERROR: {missing[col]} missing values in {col}")
+    col_set = set(df.columns)
+    missing = df[[col for col in critical_cols if col in col_set]].isna().sum()
+    missing = missing[missing > 0]
+
+    for col, count in missing.items():
+        issues.append(f"Missing values in critical column: {col}")
+        print(f"\n[ERROR] ERROR: {count} missing values in {col}")
 
-    if not missing_critical:
+    if missing.empty:
         print("[OK] No missing values in critical columns")
 
-    # Check 4: Each bio-oil appears 45 times
-    biooil_counts = df['BiooilId'].value_counts()
-    if not all(biooil_counts == 45):
+    # Check 4: Each bio-oil appears 45 times (counted in one pass, no sort;
+    # ids offset by the smallest so the count array stays small)
+    ids = df['BiooilId'].to_numpy(dtype=np.int64)
+    biooil_counts = np.bincount(ids - ids.min())
+    biooil_counts = biooil_counts[biooil_counts > 0]
+    if not (biooil_counts == 45).all():
         issues.append("Not all bio-oils appear exactly 45 times")
         print(f"\n[WARNING] Warning: Bio-oils do not all appear 45 times")
         print(f"  Min: {biooil_counts.min()}, Max: {biooil_counts.max()}")
@@ -250,7 +264,13 @@ def display_sample_simulations(df, n=10):
     ]
 
     sample_df = df.head(n)[display_cols]
-    print("\n" + sample_df.to_string(index=False))
+
+    # Fixed-width rows straight from the tuples (no full-frame string render)
+    print(f"\n{'SimId':>8} {'Biooil':>8} {'T (C)':>8} {'P (bar)':>8} {'S/C':>6} "
+          f"{'arom':>7} {'acids':>7} {'phen':>7}")
+    fmt = "{:>8} {:>8} {:>8.1f} {:>8.1f} {:>6.2f} {:>7.2f} {:>7.2f} {:>7.2f}"
+    for row in sample_df.itertuples(index=False):
+        print(fmt.format(*row))
 
     print(f"\n(Showing {len(display_cols)} of {len(df.columns)} columns)")
 
@@ -262,8 +282,21 @@ def save_to_csv(df, filepath):
         # Create output directory if it doesn't exist
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
-        # Save to CSV
-        df.to_csv(filepath, index=False, float_format='%.4f')
+        # Save to CSV (Arrow's C++ writer if pyarrow is installed)
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+        except ImportError:
+            df.to_csv(filepath, index=False, float_format='%.4f')
+        else:
+            # Same 4 decimals as float_format='%.4f' (trailing zeros not written)
+            float_cols = df.select_dtypes('floating').columns
+            rounded = df.assign(**{col: df[col].round(4) for col in float_cols})
+            pacsv.write_csv(pa.Table.from_pandas(rounded, preserve_index=False), filepath)
+
+            # Typed Parquet copy: read by the next script without parsing
+            df.to_parquet(os.path.splitext(filepath)[0] + '.parquet',
+                          engine='pyarrow', compression='zstd', index=False)
         print(f"\n[OK] Data saved to: {filepath}")
         print(f"  File size: {os.path.getsize(filepath):,} bytes")
         print(f"  Rows: {len(df):,}")
@@ -275,6 +308,15 @@ def save_to_csv(df, filepath):
         return False
 
 
+def build_simulation_matrix(biooil_df, doe_df):
+    """Create, organize and validate the simulation matrix from in-memory inputs."""
+
+    sim_matrix = create_simulation_matrix(biooil_df, doe_df)
+    sim_matrix = organize_columns(sim_matrix)
+    validate_simulation_matrix(sim_matrix)
+    return sim_matrix
+
+
 def main():
     """Main execution function."""
 
@@ -290,24 +332,16 @@ def main():
         print("\nStep 1: Loading input files...")
         biooil_df, doe_df = load_input_files()
 
-        # Step 2: Create simulation matrix
+        # Step 2: Create, organize and validate simulation matrix
         print("\nStep 2: Creating simulation matrix...")
-        sim_matrix = create_simulation_matrix(biooil_df, doe_df)
-
-        # Step 3: Organize columns
-        print("\nStep 3: Organizing columns...")
-        sim_matrix = organize_columns(sim_matrix)
-
-        # Step 4: Validate matrix
-        print("\nStep 4: Validating simulation matrix...")
-        validate_simulation_matrix(sim_matrix)
+        sim_matrix = build_simulation_matrix(biooil_df, doe_df)
 
-        # Step 5: Display samples
-        print("\nStep 5: Displaying sample simulations...")
+        # Step 3: Display samples
+        print("\nStep 3: Displaying sample simulations...")
         display_sample_simulations(sim_matrix, n=10)
 
-        # Step 6: Save to CSV
-        print("\nStep 6: Saving to CSV...")
+        # Step 4: Save to CSV
+        print("\nStep 4: Saving to CSV...")
         if not save_to_csv(sim_matrix, OUTPUT_FILE):
             raise IOError("Failed to save CSV file!")
 
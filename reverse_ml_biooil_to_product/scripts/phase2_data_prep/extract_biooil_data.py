@@ -22,6 +22,7 @@ Requirements:
 
 import pyodbc
 import pandas as pd
+import numpy as np
 import os
 from datetime import datetime
 
@@ -41,6 +42,9 @@ OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'biooil_compositions_30.csv')
 # Target number of bio-oil compositions
 TARGET_COUNT = 30
 
+# Main composition columns (as returned by the extraction query)
+MAIN_COMPONENTS = ['aromatics', 'acids', 'alcohols', 'furans', 'phenols', 'aldehyde_ketone']
+
 
 def connect_to_database():
     """Connect to BIOOIL SQL Server database using Windows Authentication."""
@@ -112,7 +116,17 @@ def extract_biooil_data(conn, limit=TARGET_COUNT):
     """
 
     try:
-        df = pd.read_sql(query, conn, params=(limit,))
+        # Plain cursor fetch (no read_sql per-row conversion)
+        cursor = conn.cursor()
+        cursor.execute(query, limit)
+        columns = [c[0] for c in cursor.description]
+        rows = cursor.fetchall()
+        cursor.close()
+
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        dtypes = {comp: np.float32 for comp in MAIN_COMPONENTS}
+        dtypes['BiooilId'] = np.int32
+        df = df.astype(dtypes)
         print(f"[OK] Extracted {len(df)} bio-oil compositions")
         return df
     except Exception as e:
@@ -133,7 +147,7 @@ def validate_data(df):
         print(f"[WARNING] Warning: Only {len(df)} records found (target: {TARGET_COUNT})")
 
     # Check for missing values in main components
-    main_components = ['aromatics', 'acids', 'alcohols', 'furans', 'phenols', 'aldehyde_ketone']
+    main_components = MAIN_COMPONENTS
     missing_counts = df[main_components].isnull().sum()
 
     print("\nMissing values in main components:")
@@ -146,17 +160,19 @@ def validate_data(df):
     else:
         print("[OK] No missing values in main components")
 
-    # Calculate composition sum for each record
-    df['composition_sum'] = df[main_components].sum(axis=1)
+    # Calculate composition sum for each record (NumPy row sum; no missing
+    # values at this point). Kept as a column in the saved CSV.
+    comp_sum = df[main_components].to_numpy(dtype=np.float64).sum(axis=1)
+    df['composition_sum'] = comp_sum
 
     print(f"\nComposition sum statistics:")
-    print(f"  Mean: {df['composition_sum'].mean():.2f}%")
-    print(f"  Min:  {df['composition_sum'].min():.2f}%")
-    print(f"  Max:  {df['composition_sum'].max():.2f}%")
-    print(f"  Std:  {df['composition_sum'].std():.2f}%")
+    print(f"  Mean: {comp_sum.mean():.2f}%")
+    print(f"  Min:  {comp_sum.min():.2f}%")
+    print(f"  Max:  {comp_sum.max():.2f}%")
+    print(f"  Std:  {comp_sum.std(ddof=1):.2f}%")
 
     # Check for unrealistic values
-    records_out_of_range = ((df['composition_sum'] < 60) | (df['composition_sum'] > 120)).sum()
+    records_out_of_range = np.count_nonzero((comp_sum < 60) | (comp_sum > 120))
     if records_out_of_range > 0:
         print(f"[WARNING] Warning: {records_out_of_range} records have composition sum outside 60-120% range")
     else:
@@ -176,8 +192,21 @@ def save_to_csv(df, filepath):
         # Create output directory if it doesn't exist
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
-        # Save to CSV
-        df.to_csv(filepath, index=False, float_format='%.4f')
+        # Save to CSV (Arrow's C++ writer if pyarrow is installed)
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+        except ImportError:
+            df.to_csv(filepath, index=False, float_format='%.4f')
+        else:
+            # Same 4 decimals as float_format='%.4f' (trailing zeros not written)
+            float_cols = df.select_dtypes('floating').columns
+            rounded = df.assign(**{col: df[col].round(4) for col in float_cols})
+            pacsv.write_csv(pa.Table.from_pandas(rounded, preserve_index=False), filepath)
+
+            # Typed Parquet copy: read by the next script without parsing
+            df.to_parquet(os.path.splitext(filepath)[0] + '.parquet',
+                          engine='pyarrow', compression='zstd', index=False)
         print(f"\n[OK] Data saved to: {filepath}")
         print(f"  File size: {os.path.getsize(filepath)} bytes")
 
@@ -187,6 +216,30 @@ def save_to_csv(df, filepath):
         return False
 
 
+def load_biooil_compositions(save=True, filepath=OUTPUT_FILE):
+    """Extract and validate bio-oil compositions, saving them to CSV if requested."""
+
+    print("\nConnecting to database...")
+    conn = connect_to_database()
+    try:
+        print("\nExtracting bio-oil data...")
+        df = extract_biooil_data(conn, limit=TARGET_COUNT)
+    finally:
+        conn.close()
+        print("[OK] Database connection closed")
+
+    print("\nValidating data...")
+    if not validate_data(df):
+        raise ValueError("Data validation failed!")
+
+    if save:
+        print("\nSaving to CSV...")
+        if not save_to_csv(df, filepath):
+            raise IOError("Failed to save CSV file!")
+
+    return df
+
+
 def main():
     """Main execution function."""
 
@@ -199,27 +252,8 @@ def main():
     print("="*70)
 
     try:
-        # Step 1: Connect to database
-        print("\nStep 1: Connecting to database...")
-        conn = connect_to_database()
-
-        # Step 2: Extract data
-        print(f"\nStep 2: Extracting bio-oil data...")
-        df = extract_biooil_data(conn, limit=TARGET_COUNT)
-
-        # Step 3: Validate data
-        print("\nStep 3: Validating data...")
-        if not validate_data(df):
-            raise ValueError("Data validation failed!")
-
-        # Step 4: Save to CSV
-        print("\nStep 4: Saving to CSV...")
-        if not save_to_csv(df, OUTPUT_FILE):
-            raise IOError("Failed to save CSV file!")
-
-        # Close database connection
-        conn.close()
-        print("\n[OK] Database connection closed")
+        # Connect, extract, validate and save
+        df = load_biooil_compositions()
 
         # Final summary
         print("\n" + "="*70)
@@ -29,7 +29,6 @@ import pandas as pd
 import numpy as np
 import os
 from datetime import datetime
-import itertools
 
 # Output file path
 OUTPUT_DIR = os.path.join(
@@ -70,7 +69,7 @@ def generate_parameter_levels(param_name, param_config):
     max_val = param_config['max']
     n_levels = param_config['levels']
 
-    levels = np.linspace(min_val, max_val, n_levels)
+    levels = np.linspace(min_val, max_val, n_levels, dtype=np.float32)
 
     print(f"\n{param_name}:")
     print(f"  Range: {min_val} - {max_val}")
@@ -92,8 +91,10 @@ def generate_doe_matrix():
     pressure_levels = generate_parameter_levels('ReformerPressure_bar', PARAMETERS['ReformerPressure_bar'])
     sc_ratio_levels = generate_parameter_levels('SteamToCarbonRatio', PARAMETERS['SteamToCarbonRatio'])
 
-    # Generate all combinations (full factorial design)
-    combinations = list(itertools.product(temp_levels, pressure_levels, sc_ratio_levels))
+    # Generate all combinations (full factorial design, same order as
+    # nested loops: temperature slowest, S/C fastest)
+    grids = np.meshgrid(temp_levels, pressure_levels, sc_ratio_levels, indexing='ij')
+    combinations = np.column_stack([grid.ravel() for grid in grids])
 
     print(f"\nTotal combinations: {len(combinations)}")
     print(f"  = {len(temp_levels)} temps × {len(pressure_levels)} pressures × {len(sc_ratio_levels)} S/C ratios")
@@ -106,7 +107,7 @@ def generate_doe_matrix():
     ])
 
     # Add condition ID
-    df.insert(0, 'ConditionId', range(1, len(df) + 1))
+    df.insert(0, 'ConditionId', np.arange(1, len(df) + 1, dtype=np.int32))
 
     # Add additional process parameters (typical values)
     # These can be adjusted based on specific simulation requirements
@@ -120,6 +121,10 @@ def generate_doe_matrix():
     # Assuming bio-oil has ~5 mol C per kg (rough estimate)
     df['SteamFeedRate_kgh'] = df['SteamToCarbonRatio'] * 100 * 0.018 * 5  # kg/h
 
+    # float32 process values (exact for these levels; CSV keeps 4 decimals)
+    float_cols = df.columns.drop('ConditionId')
+    df[float_cols] = df[float_cols].astype(np.float32)
+
     return df
 
 
@@ -138,16 +143,17 @@ def validate_doe_matrix(df):
     for col in df.columns:
         print(f"  - {col}")
 
-    # Check for missing values
-    missing = df.isnull().sum().sum()
-    if missing > 0:
+    # Check for missing values (count only computed when there are any)
+    if df.isna().to_numpy().any():
+        missing = df.isna().to_numpy().sum()
         print(f"\n[ERROR] ERROR: {missing} missing values found!")
         return False
     else:
         print("\n[OK] No missing values")
 
     # Check for duplicate conditions
-    duplicates = df.duplicated(subset=['ReformerTemperature_C', 'ReformerPressure_bar', 'SteamToCarbonRatio']).sum()
+    conditions = df[['ReformerTemperature_C', 'ReformerPressure_bar', 'SteamToCarbonRatio']].to_numpy()
+    duplicates = len(conditions) - len(np.unique(conditions, axis=0))
     if duplicates > 0:
         print(f"\n[ERROR] ERROR: {duplicates} duplicate conditions found!")
         return False
@@ -156,9 +162,9 @@ def validate_doe_matrix(df):
 
     # Check parameter ranges
     print("\nParameter ranges:")
-    for param in ['ReformerTemperature_C', 'ReformerPressure_bar', 'SteamToCarbonRatio']:
-        min_val = df[param].min()
-        max_val = df[param].max()
+    params = ['ReformerTemperature_C', 'ReformerPressure_bar', 'SteamToCarbonRatio']
+    values = df[params].to_numpy()
+    for param, min_val, max_val in zip(params, values.min(axis=0), values.max(axis=0)):
         expected_min = PARAMETERS[param]['min']
         expected_max = PARAMETERS[param]['max']
 
@@ -185,7 +191,19 @@ def display_sample_conditions(df, n=10):
     sample_df = df.head(n)[['ConditionId', 'ReformerTemperature_C',
                              'ReformerPressure_bar', 'SteamToCarbonRatio']]
 
-    print("\n" + sample_df.to_string(index=False))
+    # Fixed-width rows straight from the tuples (no full-frame string render)
+    print(f"\n{'ConditionId':>11} {'T (C)':>8} {'P (bar)':>8} {'S/C':>6}")
+    fmt = "{:>11} {:>8.1f} {:>8.1f} {:>6.2f}"
+    for row in sample_df.itertuples(index=False):
+        print(fmt.format(*row))
+
+
+def make_row_format(df):
+    """Build a CSV row template from column dtypes (4 decimals for floats)."""
+
+    specs = ['{:.4f}' if np.issubdtype(dtype, np.floating) else '{}'
+             for dtype in df.dtypes]
+    return ','.join(specs) + '\n'
 
 
 def save_to_csv(df, filepath):
@@ -195,8 +213,26 @@ def save_to_csv(df, filepath):
         # Create output directory if it doesn't exist
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
-        # Save to CSV
-        df.to_csv(filepath, index=False, float_format='%.4f')
+        # Save to CSV (Arrow's C++ writer if pyarrow is installed)
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+        except ImportError:
+            # All-numeric, no missing values: one format call per row
+            row_format = make_row_format(df)
+            with open(filepath, 'w', newline='') as f:
+                f.write(','.join(df.columns) + '\n')
+                for row in df.itertuples(index=False, name=None):
+                    f.write(row_format.format(*row))
+        else:
+            # Same 4 decimals as float_format='%.4f' (trailing zeros not written)
+            float_cols = df.select_dtypes('floating').columns
+            rounded = df.assign(**{col: df[col].round(4) for col in float_cols})
+            pacsv.write_csv(pa.Table.from_pandas(rounded, preserve_index=False), filepath)
+
+            # Typed Parquet copy: read by the next script without parsing
+            df.to_parquet(os.path.splitext(filepath)[0] + '.parquet',
+                          engine='pyarrow', compression='zstd', index=False)
         print(f"\n[OK] Data saved to: {filepath}")
         print(f"  File size: {os.path.getsize(filepath)} bytes")
 
@@ -206,6 +242,22 @@ def save_to_csv(df, filepath):
         return False
 
 
+def build_doe_matrix(save=True, filepath=OUTPUT_FILE):
+    """Generate and validate the DOE matrix, saving it to CSV if requested."""
+
+    df = generate_doe_matrix()
+
+    if not validate_doe_matrix(df):
+        raise ValueError("DOE matrix validation failed!")
+
+    if save:
+        print("\nSaving to CSV...")
+        if not save_to_csv(df, filepath):
+            raise IOError("Failed to save CSV file!")
+
+    return df
+
+
 def main():
     """Main execution function."""
 
@@ -224,24 +276,12 @@ def main():
         print(f"  Description: {param_config['description']}")
 
     try:
-        # Step 1: Generate DOE matrix
-        print("\nStep 1: Generating DOE matrix...")
-        df = generate_doe_matrix()
+        # Generate, validate and save
+        df = build_doe_matrix()
 
-        # Step 2: Validate matrix
-        print("\nStep 2: Validating DOE matrix...")
-        if not validate_doe_matrix(df):
-            raise ValueError("DOE matrix validation failed!")
-
-        # Step 3: Display samples
-        print("\nStep 3: Displaying sample conditions...")
+        # Display samples
         display_sample_conditions(df, n=10)
 
-        # Step 4: Save to CSV
-        print("\nStep 4: Saving to CSV...")
-        if not save_to_csv(df, OUTPUT_FILE):
-            raise IOError("Failed to save CSV file!")
-
         # Final summary
         print("\n" + "="*70)
         print("DOE MATRIX GENERATION COMPLETE")